@@ -5,6 +5,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import json
 import os
 import re
 import sys
@@ -18,12 +19,15 @@ from tornado.process import Subprocess
 from tornado.web import HTTPError
 
 import core4.const
+import core4.error
 import core4.queue.job
 import core4.queue.main
 import core4.util.data
 import core4.util.node
 from core4.api.v1.request.main import CoreRequestHandler
-from core4.service.introspect.command import KILL, REMOVE, RESTART, ENQUEUE_ARG
+from core4.queue.query import stdout_filter, stdout_slice
+from core4.service.introspect.command import (
+    KILL, REMOVE, RESTART, ENQUEUE_ARG, ENQUEUE_MANY)
 from core4.util.pager import CorePager
 
 STATE_STOPPED = (
@@ -68,6 +72,7 @@ class JobUnauthorized(JobError):
 
 ACTION = {
     "enqueue": ENQUEUE_ARG,
+    "enqueue_many": ENQUEUE_MANY,
     "kill": KILL,
     "restart": RESTART,
     "remove": REMOVE
@@ -149,7 +154,7 @@ class JobRequest(CoreRequestHandler):
     @property
     def queue(self):
         self._queue = getattr(self, "_queue", None) or \
-                      core4.queue.main.CoreQueue()
+                      core4.queue.main.AsyncCoreQueue()
         return self._queue
 
     async def post(self, args=None):
@@ -188,6 +193,34 @@ class JobRequest(CoreRequestHandler):
             >>> rv
             <Response [200]>
 
+        Methods:
+            POST /core4/api/v1/job/batch - enqueue multiple jobs
+
+        Parameters:
+            - qual_name (str)
+            - args (list): list of dict with job arguments, one for each job
+
+        Returns:
+            list of created ``job_id`` in the order of ``args``. Jobs which
+            exist with the same arguments are reported as ``null``.
+
+        Raises:
+            401: Unauthorized
+            403: Forbidden
+            404: Not Found
+            500: Server Error (failed to enqueue)
+
+        Examples:
+            >>> from requests import post
+            >>> rv = post("http://localhost:5001/core4/api/v1/job/batch",
+            ...           json={
+            ...               "qual_name": "core4.queue.helper.job.example.DummyJob",
+            ...               "args": [{"sleep": 5}, {"sleep": 10}]
+            ...           }, auth=("admin", "hans"))
+            ...
+            >>> rv
+            <Response [200]>
+
         Methods:
             POST /core4/api/v1/job/queue - retrieve current jobs list
 
@@ -196,10 +229,14 @@ class JobRequest(CoreRequestHandler):
             - per_page (int)
             - filter (dict): MongoDB json query
             - sort (list): list of 2-element list with key and direction
+            - after (str): continuation token of the next page for keyset
+              pagination, pass an empty ``after`` for the first page
 
         Returns:
             paginated list of job details from ``sys.queue``. Note that jobs
             without access permissions are masked with ``UnauthorizedJob``.
+            With keyset pagination the continuation token of the next page is
+            returned in ``after``.
 
         Raises:
             401: Unauthorized:
@@ -311,6 +348,32 @@ class JobRequest(CoreRequestHandler):
             >>> for line in rv:
             ...     print(line)
 
+        Methods:
+            GET /core4/api/v1/job/stdout/<_id> - stream job STDOUT
+
+        Parameters:
+            - _id (ObjectId): job _id
+            - offset (int): first byte, defaults to ``0``
+            - length (int): number of bytes, defaults to all bytes
+            - follow (bool): keep streaming the output of the running job
+              until the job finished, defaults to ``False``
+
+        Returns:
+            chunked ``text/plain`` response with the job STDOUT
+
+        Raises:
+            401: Unauthorized:
+            403: Forbidden
+            404: Not Found
+
+        Examples:
+            >>> from requests import get
+            >>> rv = get("http://localhost:5001/core4/api/v1/job/stdout/"
+            ...          "5f62217f4f5b043ae1b00a05?follow=1",
+            ...          auth=("admin", "hans"), stream=True)
+            >>> for line in rv.iter_lines():
+            ...     print(line)
+
         Methods:
             GET /core4/api/v1/job/list - retrieve paginated list of jobs
 
@@ -401,7 +464,12 @@ class JobRequest(CoreRequestHandler):
         args = self.get_argument("args", as_type=dict, default={})
         user_info = {"username": self.current_user}
         try:
-            _id = self.queue.enqueue(name=qual_name, by=user_info, **args)._id
+            job = await self.queue.enqueue(
+                name=qual_name, by=user_info, **args)
+            _id = job._id
+        except core4.error.CoreJobExists:
+            raise JobExists("job [{}] exists with args {}".format(
+                qual_name, args))
         except ImportError:
             stdout, stderr = await self.exec_project(
                 "enqueue", qual_name=qual_name, by=user_info, wait=False,
@@ -424,6 +492,39 @@ class JobRequest(CoreRequestHandler):
             self.logger.info("enqueued [%s] with _id [%s]", qual_name, _id)
             self.reply(_id)
 
+    async def _post_batch(self):
+        """
+        helper method to enqueue multiple jobs of the same class, see
+        :meth:`.AsyncCoreQueue.enqueue_many`
+        """
+        qual_name = self.get_argument("qual_name", as_type=str)
+        args = self.get_argument("args", as_type=list, default=[])
+        if not all([isinstance(a, dict) for a in args]):
+            raise JobArgumentError("args must be a list of dict")
+        if not await self.user.has_job_exec_access(qual_name):
+            raise JobUnauthorized("access denied to [{}]".format(qual_name))
+        user_info = {"username": self.current_user}
+        try:
+            ret = await self.queue.enqueue_many(name=qual_name, args=args,
+                                                by=user_info)
+        except ImportError:
+            stdout, stderr = await self.exec_project(
+                "enqueue_many", qual_name=qual_name, wait=False,
+                args=repr(args), by=repr(user_info))
+            if "ImportError: No module" in stderr:
+                raise JobNotFound(qual_name)
+            try:
+                ret = [None if i is None else ObjectId(i)
+                       for i in json.loads(stdout.split("\n")[-1])]
+            except ValueError:
+                error = stderr.strip().split("\n")[-1]
+                raise JobError("failed to enqueue {}: {}".format(
+                    qual_name, error))
+        self.logger.info("enqueued [%d] of [%d] [%s]",
+                         len([i for i in ret if i is not None]), len(ret),
+                         qual_name)
+        self.reply(ret)
+
     async def _post_queue(self):
         """
         helper method to list the queue with POST
@@ -463,18 +564,19 @@ class JobRequest(CoreRequestHandler):
             }
             cur = self.config.sys.queue.find(
                 filter, projection).skip(skip).sort(sort_by).limit(limit)
-            data = []
-            perm_cache = {}
-            for doc in await cur.to_list(limit):
-                doc = enrich_job(doc)
-                if doc["qual_name"] not in perm_cache:
-                    grant = await self.user.has_job_access(doc["qual_name"])
-                    perm_cache[doc["qual_name"]] = grant
-                if not perm_cache[doc["qual_name"]]:
-                    doc["qual_name"] = "UnauthorizedJob"
-                    doc["args"] = None
-                data.append(doc)
-            return data
+            return await cur.to_list(limit)
+
+        perm_cache = {}
+
+        async def _transform(doc):
+            doc = enrich_job(doc)
+            if doc["qual_name"] not in perm_cache:
+                grant = await self.user.has_job_access(doc["qual_name"])
+                perm_cache[doc["qual_name"]] = grant
+            if not perm_cache[doc["qual_name"]]:
+                doc["qual_name"] = "UnauthorizedJob"
+                doc["args"] = None
+            return doc
 
         per_page = int(
             self.get_argument("per_page", as_type=int, default=10))
@@ -483,13 +585,16 @@ class JobRequest(CoreRequestHandler):
         query_filter = self.get_argument("filter", as_type=dict, default={})
         sort_by = self.get_argument("sort", as_type=list,
                                     default=[["_id", 1]])
+        after = self.get_argument("after", as_type=str, default=None)
         pager = CorePager(
             per_page=per_page,
             current_page=current_page,
             length=_length,
             query=_query,
+            transform=_transform,
             sort_by=sort_by,
-            filter=query_filter
+            filter=query_filter,
+            after=after
         )
         self.reply(await pager.page())
 
@@ -555,6 +660,7 @@ class JobRequest(CoreRequestHandler):
         query_filter = self.get_argument("filter", as_type=dict, default={})
         sort_by = self.get_argument("sort", as_type=list,
                                     default=[["_id", 1]])
+        after = self.get_argument("after", as_type=str, default=None)
         query_filter["identifier"] = str(_id)
         pager = CorePager(
             per_page=per_page,
@@ -562,7 +668,8 @@ class JobRequest(CoreRequestHandler):
             length=_length,
             query=_query,
             sort_by=sort_by,
-            filter=query_filter
+            filter=query_filter,
+            after=after
         )
         self.reply(await pager.page())
 
@@ -715,8 +822,8 @@ class JobRequest(CoreRequestHandler):
         """
         if not args:
             raise JobArgumentError("missing job _id")
-        _id = args[0]
-        await self.exec_project("kill", job_id=_id)
+        doc = await self._exec_access(args[0])
+        await self.queue.kill_job(doc["_id"])
         self.reply(True)
 
     async def _put_remove(self, *args):
@@ -725,8 +832,8 @@ class JobRequest(CoreRequestHandler):
         """
         if not args:
             raise JobArgumentError("missing job _id")
-        _id = args[0]
-        await self.exec_project("remove", job_id=_id)
+        doc = await self._exec_access(args[0])
+        await self.queue.remove_job(doc["_id"])
         self.reply(True)
 
     async def _put_restart(self, *args):
@@ -736,13 +843,32 @@ class JobRequest(CoreRequestHandler):
         if not args:
             raise JobArgumentError("missing job _id")
         follow = self.get_argument("follow", as_type=bool, default=True)
-        _id = args[0]
-        stdout, stderr = await self.exec_project(
-            "restart", job_id=_id, wait=False)
+        doc = await self._exec_access(args[0])
+        _id = await self.queue.restart_job(doc["_id"])
+        if _id is None:
+            raise JobError("failed to restart job [{}]".format(doc["_id"]))
         if follow:
-            await self._get_follow(stdout.strip())
+            await self._get_follow(str(_id))
         else:
-            self.reply(stdout)
+            self.reply(str(_id))
+
+    async def _exec_access(self, job_id):
+        """
+        helper method to load a job from ``sys.queue`` and to verify
+        execution access permissions
+        """
+        try:
+            oid = ObjectId(job_id)
+        except Exception:
+            raise JobArgumentError("failed to parse job _id [{}]".format(
+                job_id))
+        doc = await self.config.sys.queue.find_one(
+            {"_id": oid}, projection=["name"])
+        if doc is None:
+            raise JobNotFound(job_id)
+        if not await self.user.has_job_exec_access(doc["name"]):
+            raise HTTPError(403, "access denied to [{}]".format(doc["name"]))
+        return doc
 
     async def _get_follow(self, *args):
         """
@@ -754,6 +880,56 @@ class JobRequest(CoreRequestHandler):
         await self.find_job(args[0])
         return await self._stream_log(args[0])
 
+    async def _get_stdout(self, *args):
+        """
+        helper method to stream the job STDOUT (byte range and follow)
+        """
+        if not args:
+            raise JobArgumentError("missing job _id")
+        # verify access
+        await self.find_job(args[0])
+        oid = ObjectId(args[0])
+        offset = self.get_argument("offset", as_type=int, default=0)
+        length = self.get_argument("length", as_type=int, default=None)
+        follow = self.get_argument("follow", as_type=bool, default=False)
+        end = None if length is None else offset + length
+        self.set_header("Content-Type", "text/plain; charset=UTF-8")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+        position = offset
+        found = False
+        while end is None or position < end:
+            remain = None if end is None else end - position
+            cur = self.config.sys.stdout.find(
+                stdout_filter(oid, position, remain), sort=[("offset", 1)])
+            async for doc in cur:
+                found = True
+                data = stdout_slice(doc, position, remain)
+                position += len(data)
+                if remain is not None:
+                    remain -= len(data)
+                self.write(data)
+                await self.flush()
+            if not follow:
+                break
+            doc = await self.config.sys.queue.find_one(
+                {"_id": oid}, projection=["state"])
+            if doc is None or doc["state"] in STATE_FINAL:
+                # read the final chunks once more
+                follow = False
+            else:
+                await tornado.gen.sleep(self.config.worker.stdout_interval)
+        if not found:
+            doc = await self.config.sys.stdout.find_one(
+                {"_id": oid, "stdout": {"$exists": True}})
+            if doc is not None:
+                # job STDOUT saved before chunking
+                body = doc["stdout"]
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.write(body[offset:end])
+        self.finish()
+
     async def sse(self, event, doc):
         """
         helper method to send server-sent-events (SSE)
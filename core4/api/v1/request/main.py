@@ -19,6 +19,7 @@ from uuid import uuid4
 import re
 
 import core4.const
+import core4.api.v1.request.error
 import core4.error
 import core4.util.node
 import dateutil.parser
@@ -33,7 +34,7 @@ import tornado.routing
 import tornado.template
 from bson.objectid import ObjectId
 from core4.api.v1.request.role.model import CoreRole
-from core4.base.main import CoreBase
+from core4.base.main import CoreBase, IDENTIFIER
 from core4.util.data import parse_boolean, json_encode, json_decode, rst2html
 from core4.util.pager import PageResult
 from tornado.web import RequestHandler, HTTPError
@@ -164,6 +165,8 @@ class CoreBaseHandler(CoreBase):
         Raises 401 error if authentication and authorization fails.
         """
         self.identifier = ObjectId()
+        # the request runs in its own task with its own context
+        IDENTIFIER.set(self.identifier)
         if self.request.method in ('OPTIONS'):
             # preflight / OPTIONS should always pass
             return
@@ -248,8 +251,7 @@ class CoreBaseHandler(CoreBase):
             payload = self.parse_token(token)
             username = payload.get("name")
             if username:
-                username = re.compile(username, re.IGNORECASE)
-                user = await CoreRole.find_one(name=username)
+                user = await CoreRole.find_name(username)
                 if user is None:
                     self.logger.warning(
                         "failed to load [%s] by [%s] from [%s]", username,
@@ -271,14 +273,13 @@ class CoreBaseHandler(CoreBase):
                     # self.set_header("token", token)
                     return user
         elif username and password:
-            username = re.compile(username, re.IGNORECASE)
             try:
-                user = await CoreRole.find_one(name=username)
+                user = await CoreRole.find_name(username)
             except Exception:
                 self.logger.warning(
                     "failed to load [%s] by [%s] from [%s]", username, *source)
             else:
-                if user and user.verify_password(password):
+                if user and await user.check_password(password):
                     self.token_exp = None
                     self.logger.debug(
                         "successfully loaded [%s] by [%s] from [%s]",
@@ -764,7 +765,7 @@ class CoreBaseHandler(CoreBase):
                     return ObjectId(ret)
                 return as_type(ret)
             except Exception:
-                raise core4.error.ArgumentParsingError(
+                raise core4.api.v1.request.error.ArgumentParsingError(
                     "parameter [%s] expected as_type [%s]", name,
                     as_type.__name__) from None
         if remove and name in self.request.arguments:
@@ -1071,6 +1072,8 @@ class CoreRequestHandler(CoreBaseHandler, RequestHandler):
             page["page"] = chunk.page
             page["per_page"] = chunk.per_page
             page["count"] = chunk.count
+            if chunk.after is not None:
+                page["after"] = chunk.after or None
             self.finish(page)
             return
         chunk = self._build_json(
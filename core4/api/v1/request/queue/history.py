@@ -36,6 +36,8 @@ class JobHistoryHandler(CoreRequestHandler):
             - filter (dict): optional mongodb filter
             - sort (str): ``1`` for ascending sorting, ``1`` for descending
               sorting, by default ``-1`` (desc) sorting
+            - after (str): continuation token of the next page for keyset
+              pagination, pass an empty ``after`` for the first page
 
         Returns:
             data element with list of aggregated job counts For pagination the
@@ -46,6 +48,8 @@ class JobHistoryHandler(CoreRequestHandler):
             - **page** (int): current page (starts counting with ``0``)
             - **page_count** (int): the total number of pages
             - **per_page** (int): the number of elements per page
+            - **after** (str): continuation token of the next page with
+              keyset pagination, ``None`` for the last page
 
         Raises:
             401: Unauthorized
@@ -75,6 +79,7 @@ class JobHistoryHandler(CoreRequestHandler):
                                          default={},
                                          dict_decode=self.dict_decode)
         sort = self.get_argument("sort", as_type=int, default=-1)
+        after = self.get_argument("after", as_type=str, default=None)
         coll = self.config.sys.event
         query = {
             "channel": core4.const.QUEUE_CHANNEL
@@ -82,32 +87,37 @@ class JobHistoryHandler(CoreRequestHandler):
         if query_filter:
             query.update(query_filter)
 
+        # keyset pagination requires a unique sort key
+        key = "$natural" if after is None else "_id"
+
         async def _length(filter):
             return await coll.count_documents(filter)
 
         async def _query(skip, limit, filter, sort_by):
             cur = coll.find(
                 filter,
-                projection={"created": 1, "data": 1, "_id": 0}
+                projection={"created": 1, "data": 1, "_id": 1}
             ).sort(
-                [("$natural", sort)]
+                sort_by
             ).skip(
                 skip
             ).limit(
                 limit
             )
-            ret = []
-            for doc in await cur.to_list(length=limit):
-                total = sum([v for v in doc["data"]["queue"].values()])
-                doc["data"]["queue"]["created"] = doc["created"]
-                doc["data"]["queue"]["total"] = total
-                ret.append(doc["data"]["queue"])
-            return ret
+            return await cur.to_list(length=limit)
+
+        def _transform(doc):
+            total = sum([v for v in doc["data"]["queue"].values()])
+            doc["data"]["queue"]["created"] = doc["created"]
+            doc["data"]["queue"]["total"] = total
+            return doc["data"]["queue"]
 
         pager = CorePager(per_page=per_page,
                           current_page=current_page,
                           length=_length, query=_query,
-                          filter=query)
+                          transform=_transform,
+                          sort_by=[(key, sort)],
+                          filter=query, after=after)
         page = await pager.page()
         return self.reply(page)
 
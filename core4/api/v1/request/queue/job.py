@@ -16,13 +16,12 @@ from tornado import gen
 from tornado.iostream import StreamClosedError
 from tornado.web import HTTPError
 
-import core4.const
 import core4.error
 import core4.queue.job
 import core4.queue.query
 import core4.util.node
 from core4.api.v1.request.main import CoreRequestHandler
-from core4.queue.main import CoreQueue
+from core4.queue.main import AsyncCoreQueue
 from core4.util.data import json_encode
 from core4.util.pager import CorePager
 
@@ -50,7 +49,7 @@ class JobHandler(CoreRequestHandler, core4.queue.query.QueryMixin):
     tag = "api jobs"  # idea is to have a FE app; remove api by then
 
     def initialize(self):
-        self.queue = CoreQueue()
+        self.queue = AsyncCoreQueue()
         self._collection = {}
 
     def collection(self, name):
@@ -233,7 +232,10 @@ class JobHandler(CoreRequestHandler, core4.queue.query.QueryMixin):
     async def get_listing(self):
         """
         Retrieve job listing from ``sys.queue``. Only jobs with read/execute
-        access permissions granted to the current user are returned.
+        access permissions granted to the current user are returned. The
+        user's ``job://`` permissions are applied as a MongoDB query, see
+        :meth:`.CoreRole.job_filter`. Pass the ``after`` continuation token
+        for keyset pagination, see :class:`.CorePager`.
 
         :return: :class:`.PageResult`
         """
@@ -243,25 +245,28 @@ class JobHandler(CoreRequestHandler, core4.queue.query.QueryMixin):
         query_filter = self.get_argument("filter", default={})
         sort_by = self.get_argument("sort", default="_id")
         sort_order = self.get_argument("order", default=1)
+        after = self.get_argument("after", default=None)
 
-        data = []
-        async for doc in self.collection("queue").find(query_filter).sort(
-                [(sort_by, int(sort_order))]):
-            if await self.user.has_job_access(doc["name"]):
-                data.append(doc)
+        perm_filter = await self.user.job_filter()
+        if perm_filter is not None:
+            if query_filter:
+                query_filter = {"$and": [query_filter, perm_filter]}
+            else:
+                query_filter = perm_filter
 
-        async def _length(*args, **kwargs):
-            return len(data)
+        async def _length(filter):
+            return await self.collection("queue").count_documents(filter)
 
-        async def _query(skip, limit, *args, **kwargs):
-            return data[skip:(skip + limit)]
+        async def _query(skip, limit, filter, sort_by):
+            cur = self.collection("queue").find(filter).sort(
+                sort_by).skip(skip).limit(limit)
+            return await cur.to_list(length=limit)
 
         pager = CorePager(per_page=int(per_page),
                           current_page=int(current_page),
                           length=_length, query=_query,
-                          # sort_by=[sort_by, int(sort_order)],
-                          # filter=query_filter
-                          )
+                          sort_by=[(sort_by, int(sort_order))],
+                          filter=query_filter, after=after)
         return await pager.page()
 
     async def get_detail(self, _id):
@@ -512,6 +517,7 @@ class JobHandler(CoreRequestHandler, core4.queue.query.QueryMixin):
                         self.application.container.identifier, _id):
                     ret = await queue.delete_one({"_id": _id})
                     if ret.raw_result["n"] == 1:
+                        await self.queue.count_state(old=job["state"])
                         doc = dict([(k, v) for k, v in job.items() if
                                     k in core4.queue.job.ENQUEUE_ARGS])
                         new_job = self.queue.job_factory(job["name"], **doc)
@@ -524,6 +530,8 @@ class JobHandler(CoreRequestHandler, core4.queue.query.QueryMixin):
                         new_doc = new_job.serialise()
                         ret = await queue.insert_one(new_doc)
                         new_doc["_id"] = ret.inserted_id
+                        await self.queue.count_state(
+                            new=core4.queue.job.STATE_PENDING)
                         self.logger.info(
                             'successfully enqueued [%s] with [%s]',
                             new_job.qual_name(), new_doc["_id"])
@@ -545,14 +553,7 @@ class JobHandler(CoreRequestHandler, core4.queue.query.QueryMixin):
         :param _id: job ``_id``
         :return: ``True`` if reservation succeeded, else ``False``
         """
-        try:
-            await self.collection("lock").insert_one(
-                {"_id": _id, "owner": identifier})
-            return True
-        except pymongo.errors.DuplicateKeyError:
-            return False
-        except:
-            raise
+        return await self.queue.lock_job(identifier, _id)
 
     def who(self):
         """
@@ -570,31 +571,28 @@ class JobHandler(CoreRequestHandler, core4.queue.query.QueryMixin):
 
     async def get_queue_count(self):
         """
-        Retrieves aggregated information about ``sys.queue`` state. This is
-
-        * ``n`` - the number of jobs in the given state
-        * ``state`` - job state
-        * ``flags`` - job flags ``zombie``, ``wall``, ``removed`` and
-          ``killed``
+        Retrieves the number of jobs in ``sys.queue`` by job state from the
+        job state counters in ``sys.count``. See also
+        :meth:`.QueryMixin.get_queue_count`.
 
-        :return: dict
+        :return: dict with job state and number of jobs in this state
         """
-        cur = self.collection("queue").aggregate(self.pipeline_queue_count())
+        cur = self.collection("count").find({"n": {"$gt": 0}})
         ret = {}
         async for doc in cur:
-            ret[doc["state"]] = doc["n"]
+            ret[doc["_id"]] = doc["n"]
         return ret
 
     async def make_stat(self, event, _id):
         """
-        Collects current job state counts from ``sys.queue`` and inserts a
-        record into ``sys.event``. See also :meth:`.CoreQueue.make_stat`.
+        Collects current job state counts from ``sys.count`` and inserts a
+        record into ``sys.event``. See also
+        :meth:`.AsyncCoreQueue.make_stat`.
 
         :param event: to log
         :param _id: job _id
         """
-        self.trigger(name=event, channel=core4.const.QUEUE_CHANNEL,
-                     data={"_id": _id, "queue": await self.get_queue_count()})
+        await self.queue.make_stat(event, _id)
 
 
 class JobPost(JobHandler):
@@ -606,13 +604,34 @@ class JobPost(JobHandler):
     title = "Enqueue Job"
     tag = "api jobs"
 
-    async def post(self, _id=None):
+    async def post(self, mode=None):
         """
         **DEPRECATED!** Use :class:`core4.api.v1.request.job.JobRequest`.
 
         Only jobs with execute access permissions granted to the current user
         can be posted.
 
+        Methods:
+            POST /core4/api/v1/jobs/enqueue/batch - enqueue multiple jobs
+
+        Parameters:
+            - name (str): qualified job name
+            - args (list): list of dict with job arguments and job properties,
+                           one for each job
+
+        Returns:
+            data element with
+
+            - **_id**: list of enqueued job ``_id`` in the order of ``args``,
+              ``null`` for jobs which exist with the same arguments
+            - **name**: of the enqueued jobs
+
+        Raises:
+            400: invalid args
+            401: Unauthorized
+            403: Forbidden
+            404: cannot instantiate job
+
         Methods:
             POST /core4/api/v1/enqueue - enqueue job
 
@@ -675,6 +694,16 @@ class JobPost(JobHandler):
                 }
             }
         """
+        if mode == "batch":
+            name = self.get_argument("name")
+            args = self.get_argument("args", as_type=list, default=[])
+            if not all([isinstance(a, dict) for a in args]):
+                raise HTTPError(400, "args must be a list of dict")
+            self.reply({
+                "name": name,
+                "_id": await self.enqueue_many(name, args)
+            })
+            return
         job = await self.enqueue_by_args()
         self.reply({
             "name": job.qual_name(),
@@ -715,11 +744,35 @@ class JobPost(JobHandler):
                             job.qual_name(), job.args)
         job.__dict__["_id"] = ret.inserted_id
         job.__dict__["identifier"] = ret.inserted_id
+        await self.queue.count_state(new=core4.queue.job.STATE_PENDING)
         self.logger.info(
             'successfully enqueued [%s] with [%s]', job.qual_name(), job._id)
         await self.make_stat("enqueue_job", str(job._id))
         return job
 
+    async def enqueue_many(self, name, args):
+        """
+        Enqueue multiple jobs with name from argument with one unordered
+        ``insert_many``. See also :meth:`.AsyncCoreQueue.enqueue_many`.
+
+        :param name: qualified job name
+        :param args: list of dict with job arguments and job properties
+        :return: list of job ``_id`` in the order of ``args``, ``None`` for
+                 jobs which exist with the same arguments
+        """
+        if not await self.user.has_job_exec_access(name):
+            raise HTTPError(403)
+        try:
+            return await self.queue.enqueue_many(
+                name=name, args=args, by=self.who())
+        except pymongo.errors.PyMongoError:
+            raise
+        except Exception:
+            exc_info = sys.exc_info()
+            raise HTTPError(404, "cannot instantiate job [%s]: %s:\n%s",
+                            name, repr(exc_info[1]),
+                            traceback.format_exception(*exc_info))
+
 
 class JobStream(JobPost):
     """
@@ -0,0 +1,91 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+This module delivers :class:`.CredentialCache`, the per process cache of
+verified :class:`.CoreRole` credentials, and the bounded thread pool to
+verify passwords off the IOLoop.
+"""
+
+import concurrent.futures
+import hashlib
+import hmac
+import os
+import time
+
+#: maximum number of cached credentials before expired entries are purged
+MAX_CREDENTIAL = 10000
+
+
+class CredentialCache:
+    """
+    Caches successful password verifications for ``ttl`` seconds. The cache
+    key is an HMAC of the role ``_id`` and the clear text password with a
+    random per process secret. A cached credential is valid as long as the
+    role's ``etag`` and password hash are unchanged.
+    """
+    cache = {}
+    secret = os.urandom(32)
+    executor = None
+
+    @classmethod
+    def key(cls, role, plain):
+        """
+        :param role: :class:`.CoreRole`
+        :param plain: clear text password
+        :return: HMAC digest of the credentials
+        """
+        msg = "{}\0{}".format(role._id, plain).encode("utf-8")
+        return hmac.new(cls.secret, msg, hashlib.sha256).digest()
+
+    @classmethod
+    def get(cls, role, plain):
+        """
+        :return: ``True`` if the credentials have been verified before and
+                 the role has not been changed, else ``False``
+        """
+        key = cls.key(role, plain)
+        entry = cls.cache.get(key)
+        if entry is None:
+            return False
+        (expire, etag, password) = entry
+        if (expire > time.monotonic() and etag == role.etag
+                and password == role.password):
+            return True
+        cls.cache.pop(key, None)
+        return False
+
+    @classmethod
+    def set(cls, role, plain, ttl):
+        """
+        Caches the verified credentials for ``ttl`` seconds.
+        """
+        now = time.monotonic()
+        if len(cls.cache) >= MAX_CREDENTIAL:
+            cls.cache = dict((k, v) for k, v in cls.cache.items()
+                             if v[0] > now)
+        cls.cache[cls.key(role, plain)] = (
+            now + ttl, role.etag, role.password)
+
+    @classmethod
+    def clear(cls):
+        """
+        Removes all cached credentials.
+        """
+        cls.cache = {}
+
+    @classmethod
+    def get_executor(cls, max_workers):
+        """
+        :param max_workers: number of threads
+        :return: :class:`concurrent.futures.ThreadPoolExecutor` to verify
+                 passwords
+        """
+        if cls.executor is None:
+            cls.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="password")
+        return cls.executor
@@ -9,7 +9,9 @@ import pymongo.errors
 from bson.objectid import ObjectId
 from tornado.web import HTTPError
 
+import core4.api.v1.request.error
 import core4.error
+import core4.queue.helper.functool
 from core4.api.v1.request.main import CoreRequestHandler
 from core4.api.v1.request.role.access.manager import CoreAccessManager
 from core4.api.v1.request.role.model import CoreRole
@@ -148,7 +150,7 @@ class RoleHandler(CoreRequestHandler):
                     'name': role.data["name"].value
                 }
                 token = self.create_jwt(secs, payload)
-                core4.queue.helper.functool.enqueue(
+                await core4.queue.helper.functool.enqueue_async(
                     RoleEmail,
                     template=self.config.email.template.en.user_creation,
                     recipients=role.data["email"].value,
@@ -162,7 +164,7 @@ class RoleHandler(CoreRequestHandler):
                                  role.data["email"].value)
 
         except (AttributeError, TypeError, core4.error.Core4ConflictError,
-                core4.error.ArgumentParsingError) as exc:
+                core4.api.v1.request.error.ArgumentParsingError) as exc:
             raise HTTPError(400, exc.args[0])
         except pymongo.errors.DuplicateKeyError:
             raise HTTPError(400, "name or email exists")
@@ -417,7 +419,7 @@ class RoleHandler(CoreRequestHandler):
         try:
             saved = await ret.save()
         except (AttributeError, TypeError, core4.error.Core4ConflictError,
-                core4.error.ArgumentParsingError) as exc:
+                core4.api.v1.request.error.ArgumentParsingError) as exc:
             raise HTTPError(400, exc.args[0])
         except pymongo.errors.DuplicateKeyError:
             raise HTTPError(400, "name or email exists")
@@ -497,7 +499,7 @@ class RoleHandler(CoreRequestHandler):
         try:
             removed = await ret.delete()
         except (AttributeError, TypeError, core4.error.Core4ConflictError,
-                core4.error.ArgumentParsingError) as exc:
+                core4.api.v1.request.error.ArgumentParsingError) as exc:
             raise HTTPError(400, exc.args[0])
         except core4.error.Core4RoleNotFound as exc:
             raise HTTPError(404, "role [%s] not found", exc.args[0])
@@ -523,17 +525,19 @@ class RoleHandler(CoreRequestHandler):
         async def _query(skip, limit, filter, sort_by):
             return await rolemanager.load(skip, limit, filter, sort_by)
 
+        query_filter = await rolemanager.manage_filter(
+            self.get_argument("filter", as_type=str, default="{}"))
         pager = CorePager(
             per_page=self.get_argument(
                 "per_page", as_type=int, default=10),
             current_page=self.get_argument(
                 "page", as_type=int, default=0),
-            filter=self.get_argument(
-                "filter", as_type=str, default="{}"),
+            filter=query_filter,
             sort_by=(self.get_argument("sort", as_type=str, default="_id"),
                      self.get_argument("order", as_type=int, default=1)),
             query=_query,
-            length=_length
+            length=_length,
+            after=self.get_argument("after", as_type=str, default=None)
         )
 
         return await pager.page()
@@ -10,11 +10,17 @@ This module delivers the :class:`.CoreRole` to manage users and roles.
 """
 
 import json
+import time
 
+import tornado.ioloop
+
+import core4.api.v1.request.error
 import core4.error
 import core4.util.crypt
 import core4.util.node
+from core4.api.v1.request.role.credential import CredentialCache
 from core4.api.v1.request.role.field import *
+from core4.api.v1.request.role.perm import CompiledPerm, PermCache
 from core4.base.main import CoreBase
 from os import urandom
 
@@ -47,6 +53,9 @@ class CoreRole(CoreBase):
 
     Note that roles can be assigned hierarchically.
 
+    The ``name`` is stored in lower case with ``name_lower``, too, to support
+    case insensitive point lookups with :meth:`.find_name`.
+
     Raises:
         KeyError - unknown role attribute
         AttributeError - email requires password and vice versa
@@ -88,12 +97,14 @@ class CoreRole(CoreBase):
         # so long drop of field "total_perm" manually
         kwargs.pop('perm_total', None)
         kwargs.pop('role_total', None)
+        kwargs.pop('name_lower', None)
 
         for field in kwargs:
             if (field not in self.data):
                 raise KeyError("unknown field [{}]".format(field))
         self._role_collection = None
         self._casc_role = None
+        self._perm = None
 
     @property
     def role_collection(self):
@@ -174,6 +185,27 @@ class CoreRole(CoreBase):
         self.logger.warning("user [%s] not active", self.name)
         return False
 
+    async def check_password(self, plain):
+        """
+        Verifies the password with :meth:`.verify_password` in a bounded
+        thread pool off the IOLoop. Successful verifications are cached for
+        ``api.password.cache`` seconds unless the role has been changed, see
+        :class:`.CredentialCache`.
+
+        :param plain: clear text password
+        :return: ``True`` if the role is active , and the password matches
+        """
+        ttl = self.config.api.password.cache
+        if ttl and self.is_active and CredentialCache.get(self, plain):
+            return True
+        executor = CredentialCache.get_executor(
+            self.config.api.password.worker)
+        verified = await tornado.ioloop.IOLoop.current().run_in_executor(
+            executor, self.verify_password, plain)
+        if verified and ttl:
+            CredentialCache.set(self, plain, ttl)
+        return verified
+
     @property
     def is_user(self):
         """
@@ -213,6 +245,8 @@ class CoreRole(CoreBase):
             saved = await self._create()
         else:
             saved = await self._update()
+        if saved:
+            self._invalidate()
         return saved
 
     async def resolve_roles(self, by_id=False):
@@ -317,6 +351,8 @@ class CoreRole(CoreBase):
                 val = f.to_doc()
             if val is not None:
                 doc[k] = val
+        if not response and self.name is not None:
+            doc["name_lower"] = self.name.lower()
         return doc
 
     def to_response(self):
@@ -337,15 +373,17 @@ class CoreRole(CoreBase):
 
         :param skip: number of documents to skip
         :param sort_by: tuple of attribute and sort order (``1`` for ascending,
-                        ``-1`` for descending)
-        :param filter: MongoDB query dict
+                        ``-1`` for descending) or list of these tuples
+        :param filter: MongoDB query dict, see :meth:`.manage_filter`
         :param limit: number of records to be retrieved
         :return: :list: resulting documents
         """
-        filter = await self.manage_filter(filter)
+        if isinstance(sort_by, tuple):
+            sort_by = [sort_by]
 
-        cur = self.role_collection.find(filter, projection={"avatar": 0}) \
-            .sort(*sort_by) \
+        cur = self.role_collection.find(
+            filter, projection={"avatar": 0, "name_lower": 0}) \
+            .sort(sort_by) \
             .skip(skip) \
             .limit(limit)
 
@@ -365,19 +403,22 @@ class CoreRole(CoreBase):
         return None
 
     async def count(self, filter={}):
-        filter = await self.manage_filter(filter)
         return await self.role_collection.count_documents(filter)
 
     @classmethod
     async def _find_one(cls, **kwargs):
         doc = await cls().load_one(**kwargs)
         if doc:
-            password = doc.pop("password", None)
-            role = cls(**doc)
-            role.data["password"].__dict__["value"] = password
-            return role
+            return cls._from_doc(doc)
         return None
 
+    @classmethod
+    def _from_doc(cls, doc):
+        password = doc.pop("password", None)
+        role = cls(**doc)
+        role.data["password"].__dict__["value"] = password
+        return role
+
     @classmethod
     async def find_one(cls, **kwargs):
         """
@@ -395,16 +436,106 @@ class CoreRole(CoreBase):
             await role.resolve_roles_by_id()
         return role
 
+    @classmethod
+    async def find_name(cls, name):
+        """
+        Retrieve one role by case insensitive ``name``. The lookup uses the
+        lower case ``name_lower`` attribute and its unique index. If the
+        index is missing due to case insensitive duplicate names (see
+        :meth:`.CoreSetup.make_role`), only the exact ``name`` resolves
+        until the duplicates are renamed.
+
+        :param name: of the role
+        :return: :class:`.CoreRole` or ``None``
+        """
+        if not name:
+            return None
+        role = cls()
+        docs = await role.load(filter={"name_lower": name.lower()}, limit=2)
+        if len(docs) > 1:
+            role.logger.error(
+                "ambiguous case insensitive role name [%s]", name)
+            docs = await role.load(filter={"name": name})
+        if len(docs) != 1:
+            return None
+        role = cls._from_doc(docs[0])
+        await role.resolve_roles_by_id()
+        return role
+
     async def casc_perm(self):
         """
         Retrieve combined permissions from all roles assigned.
 
         :return: list of permission str
         """
-        perm = self.perm
-        for role in await self.casc_role():
-            perm += role.perm
-        return sorted(list(set(perm)))
+        return list((await self.compiled_perm()).perm)
+
+    async def compiled_perm(self):
+        """
+        Retrieve the combined permissions from all roles assigned compiled
+        into :class:`.CompiledPerm`. The compiled permissions are cached per
+        process and invalidated with changes of ``sys.role`` as reported by
+        :class:`.RoleWatch`. Without the change stream the cached permissions
+        are verified with the ``etag`` of all assigned roles every
+        ``api.perm_cache`` seconds.
+
+        :return: :class:`.CompiledPerm`
+        """
+        if (self._perm is None
+                or self._perm.generation != PermCache.generation):
+            perm = PermCache.get(self)
+            if perm is not None and not PermCache.watching:
+                ttl = self.config.api.perm_cache
+                now = time.monotonic()
+                if not ttl or now - perm.verified >= ttl:
+                    if await self._verify_perm(perm):
+                        perm.verified = now
+                    else:
+                        perm = None
+            if perm is None:
+                perm = await self._compile_perm()
+                PermCache.set(self, perm)
+            self._perm = perm
+        return self._perm
+
+    async def _compile_perm(self):
+        # load the assigned roles level by level with one query per level
+        generation = PermCache.generation
+        perm = list(self.perm)
+        etag = {}
+        seen = set()
+        _ids = list(self.data["role"]._id)
+        while _ids:
+            seen.update(_ids)
+            cur = self.role_collection.find(
+                {"_id": {"$in": _ids}},
+                projection={"etag": 1, "is_active": 1, "perm": 1, "role": 1})
+            _ids = []
+            async for doc in cur:
+                etag[doc["_id"]] = doc.get("etag")
+                if doc.get("is_active"):
+                    perm += doc.get("perm") or []
+                    _ids += [i for i in doc.get("role") or []
+                             if i not in seen and i not in _ids]
+        return CompiledPerm(perm, root=PermCache.key(self), etag=etag,
+                            generation=generation)
+
+    async def _verify_perm(self, perm):
+        # verify the cached permissions with the etag of all assigned roles
+        if not perm.etag:
+            return True
+        cur = self.role_collection.find(
+            {"_id": {"$in": list(perm.etag)}}, projection={"etag": 1})
+        etag = {}
+        async for doc in cur:
+            etag[doc["_id"]] = doc.get("etag")
+        return etag == perm.etag
+
+    def _invalidate(self):
+        # invalidate compiled permissions after role updates and deletes
+        self._perm = None
+        self._casc_role = None
+        PermCache.clear()
 
     async def casc_role(self):
         """
@@ -439,37 +570,31 @@ class CoreRole(CoreBase):
         updated in between.
         """
         if not self._id:
-            raise core4.error.ArgumentParsingError("Role object not loaded")
+            raise core4.api.v1.request.error.ArgumentParsingError(
+                "Role object not loaded")
         # delete the role
-        ret = self.config.sys.role.delete_one(
+        ret = await self.role_collection.delete_one(
             {"_id": self._id, "etag": self.etag})
         if ret.deleted_count == 0:
             raise core4.error.Core4ConflictError(
                 "update [{}] with etag [{}] failed".format(
                     self._id, self.etag))
         # delete references
-        self.config.sys.role.update_many({}, update={
+        await self.role_collection.update_many({}, update={
             "$pull": {
                 "role": self._id
             }
         })
         self.logger.info("deleted role [%s] with _id [%s]", self.name,
                          self._id)
+        self._invalidate()
         self._id = None
         self.data["etag"].set(None)
         return True
 
     async def _job_access(self, qual_name, access):
         # verify access (r|x) to the passed qual_name
-        if await self.is_admin():
-            return True
-        for p in await self.casc_perm():
-            (*proto, qn, acc) = p.split("/")
-            if proto[0] == "job:":
-                if re.match(qn, qual_name):
-                    if acc.lower() in access:
-                        return True
-        return False
+        return (await self.compiled_perm()).has_job_access(qual_name, access)
 
     async def has_job_access(self, qual_name):
         """
@@ -489,13 +614,25 @@ class CoreRole(CoreBase):
         :return: ``True`` if the user has access, else ``False``
         """
         return await self._job_access(
-            qual_name, (JOB_EXECUTION_RIGHT))
+            qual_name, (JOB_EXECUTION_RIGHT,))
+
+    async def job_filter(self, field="name"):
+        """
+        Translates the read/execute ``job://`` permissions into a MongoDB
+        query on the job's ``qual_name`` attribute, see
+        :meth:`.CompiledPerm.job_filter`.
+
+        :param field: job ``qual_name`` attribute to query
+        :return: MongoDB query dict or ``None`` for administrators
+        """
+        return (await self.compiled_perm()).job_filter(
+            (JOB_EXECUTION_RIGHT, JOB_READ_RIGHT), field)
 
     async def is_admin(self):
         """
         :return: ``True`` if the role as a ``perm`` record of ``cop``.
         """
-        return COP in await self.casc_perm()
+        return (await self.compiled_perm()).admin
 
     async def has_api_access(self, qual_name, method="GET", info_request=False):
         """
@@ -505,32 +642,16 @@ class CoreRole(CoreBase):
         :param qual_name: to verify
         :return: bool
         """
-        if await self.is_admin():
-            return True
-        for p in await self.casc_perm():
-            (*proto, qn, acc) = p.split("/")
-            if proto[0] == "api:":
-                if qn:
-                    if re.match(qn, qual_name):
-                        if info_request:
-                            return True
-                        # if acc.lower().split() in METHOD_PERMISSION.get(method, None).split():
-                        if set(acc.lower()).intersection(METHOD_PERMISSION.get(method)):
-                            self.logger.debug(
-                                "approved api permission "
-                                "[%s][%s] for user [%s]",
-                                acc, self.name, qn)
-                            return True
-                else:
-                    if re.match(acc, qual_name):
-                        self.logger.debug(
-                            "approved api permission [%s] for user [%s]",
-                            self.name, qn
-                        )
-                        return True
-        self.logger.debug("no appropriate api permission found for user [%s]",
-                          self.name)
-        return False
+        perm = (await self.compiled_perm()).has_api_access(
+            qual_name, method, info_request)
+        if perm is None:
+            self.logger.debug(
+                "no appropriate api permission found for user [%s]",
+                self.name)
+            return False
+        self.logger.debug("approved api permission [%s] for user [%s]",
+                          perm, self.name)
+        return True
 
     async def has_client_access(self, client):
         """
@@ -539,27 +660,28 @@ class CoreRole(CoreBase):
         :param client: client (str) extracted from the URL
         :return: ``True`` for success, else ``False``
         """
-        if await self.is_admin():
+        if (await self.compiled_perm()).has_client_access(client):
+            self.logger.debug("grant access to client [%s]", client)
             return True
-        for p in await self.casc_perm():
-            parts = p.split("/")
-            if len(parts) > 3:
-                if parts[0] == "app:":
-                    if parts[2] == "client":
-                        if "/".join(parts[3:]) == client:
-                            self.logger.debug("grant access to client [%s]",
-                                              client)
-                            return True
         return False
 
     async def login(self):
         """
-        Updates the ``last_login`` attribute of the role-
+        Updates the ``last_login`` attribute of the role. Updates are
+        coalesced and skipped if ``last_login`` is more recent than
+        ``api.login_interval`` seconds.
 
         This method raises :class:`.Core4ConflictError` if the role has been
         updated in between.
+
+        :return: ``True`` if ``last_login`` has been updated, else ``False``
         """
-        self.last_login = core4.util.node.mongo_now()
+        now = core4.util.node.mongo_now()
+        interval = self.config.api.login_interval
+        if (interval and self.last_login is not None
+                and (now - self.last_login).total_seconds() < interval):
+            return False
+        self.last_login = now
         ret = await self.role_collection.update_one(
             filter={"_id": self._id, "etag": self.etag},
             update={"$set": {"last_login": self.last_login}})
@@ -569,6 +691,7 @@ class CoreRole(CoreBase):
                     self._id, self.etag))
         self.logger.info("set [last_login] for role [%s] with _id [%s]",
                          self.name, self._id)
+        return True
 
     async def detail(self):
         """
@@ -603,7 +726,7 @@ class CoreRole(CoreBase):
                     query_filter = json.loads(filter)
                     query_filter = await self.manage_dict_filter(query_filter)
                 except:
-                    raise core4.error.ArgumentParsingError(
+                    raise core4.api.v1.request.error.ArgumentParsingError(
                         "Can not parse regex" + filter)
                 filter = query_filter
             else:
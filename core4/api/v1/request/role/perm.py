@@ -0,0 +1,233 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+This module delivers the compiled permissions of :class:`.CoreRole` with
+:class:`.CompiledPerm`, the per process cache :class:`.PermCache` and
+:class:`.RoleWatch` which invalidates the cache with changes of
+``sys.role``.
+"""
+
+import re
+import time
+
+import pymongo.errors
+from bson.regex import Regex
+
+from core4.api.v1.request.role.field import METHOD_PERMISSION
+from core4.base.main import CoreBase
+from core4.const import COP
+
+#: change stream pipeline of ``sys.role`` skipping updates of ``last_login``
+ROLE_CHANGES = [
+    {
+        "$match": {
+            "$nor": [
+                {
+                    "operationType": "update",
+                    "updateDescription.updatedFields.etag": {
+                        "$exists": False
+                    },
+                    "updateDescription.updatedFields.last_login": {
+                        "$exists": True
+                    }
+                }
+            ]
+        }
+    }
+]
+
+
+def _compile(pattern):
+    # invalid regular expressions never match
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+class CompiledPerm:
+    """
+    Effective permissions of a role and all roles assigned recursively. The
+    permissions are compiled once into regular expressions indexed by
+    protocol (``job://``, ``api://`` and ``app://client``).
+
+    The compiled permissions carry the ``etag`` of all assigned roles to
+    verify the cached permissions if ``sys.role`` is not watched, see
+    :class:`.RoleWatch`. Attribute :attr:`verified` records the time of the
+    last verification.
+    """
+
+    def __init__(self, perm, root=None, etag=None, generation=None):
+        self.perm = sorted(set(perm))
+        self.root = root
+        self.etag = etag or {}
+        self.generation = generation
+        self.verified = time.monotonic()
+        self.admin = COP in self.perm
+        self.job = []
+        self.api = []
+        self.client = set()
+        for p in self.perm:
+            parts = p.split("/")
+            if len(parts) < 3:
+                continue
+            (*proto, qn, acc) = parts
+            if proto[0] == "job:":
+                regex = _compile(qn)
+                if regex is not None:
+                    self.job.append((regex, acc.lower(), p))
+            elif proto[0] == "api:":
+                if qn:
+                    regex = _compile(qn)
+                    access = set(acc.lower())
+                else:
+                    regex = _compile(acc)
+                    access = None
+                if regex is not None:
+                    self.api.append((regex, access, p))
+            elif proto[0] == "app:":
+                if len(parts) > 3 and parts[2] == "client":
+                    self.client.add("/".join(parts[3:]))
+
+    def has_job_access(self, qual_name, access):
+        """
+        :param qual_name: of the job
+        :param access: collection of job rights (``r``, ``x``)
+        :return: ``True`` if any ``job://`` permission grants the passed
+                 ``access`` to the job ``qual_name``
+        """
+        if self.admin:
+            return True
+        for (regex, acc, _) in self.job:
+            if acc in access and regex.match(qual_name):
+                return True
+        return False
+
+    def job_filter(self, access, field="name"):
+        """
+        Translates the ``job://`` permissions into a MongoDB query. Each
+        permission's regular expression is anchored at the start like
+        :meth:`.has_job_access`.
+
+        :param access: collection of job rights (``r``, ``x``)
+        :param field: job ``qual_name`` attribute to query
+        :return: MongoDB query dict of all jobs with the passed ``access`` or
+                 ``None`` for administrators
+        """
+        if self.admin:
+            return None
+        pattern = []
+        for (regex, acc, _) in self.job:
+            if acc in access and regex.pattern not in pattern:
+                pattern.append(regex.pattern)
+        return {
+            field: {
+                "$in": [Regex("^(?:" + p + ")") for p in pattern]
+            }
+        }
+
+    def has_api_access(self, qual_name, method="GET", info_request=False):
+        """
+        :param qual_name: of the resource
+        :param method: HTTP method
+        :param info_request: ``True`` to skip the verification of ``method``
+        :return: the permission (str) granting access, ``COP`` for
+                 administrators or ``None`` if access is denied
+        """
+        if self.admin:
+            return COP
+        granted = METHOD_PERMISSION.get(method, ())
+        for (regex, access, perm) in self.api:
+            if regex.match(qual_name):
+                if (access is None or info_request
+                        or access.intersection(granted)):
+                    return perm
+        return None
+
+    def has_client_access(self, client):
+        """
+        :param client: name
+        :return: ``True`` if the role has an ``app://client/[client]``
+                 permission
+        """
+        return self.admin or client in self.client
+
+
+class PermCache:
+    """
+    Per process cache of :class:`.CompiledPerm` by role ``_id``. All entries
+    are invalidated with every change of any role. Each invalidation
+    increases :attr:`.generation` so permissions compiled concurrently with
+    an invalidation are not cached.
+    """
+    cache = {}
+    generation = 0
+    watching = False
+
+    @staticmethod
+    def key(role):
+        """
+        :return: tuple of ``etag``, ``perm`` and ``role`` ids of the passed
+                 role
+        """
+        return (role.etag, tuple(role.perm), tuple(role.data["role"]._id))
+
+    @classmethod
+    def get(cls, role):
+        """
+        :param role: :class:`.CoreRole`
+        :return: cached :class:`.CompiledPerm` of the role or ``None``
+        """
+        perm = cls.cache.get(role._id)
+        if perm is not None and perm.root == cls.key(role):
+            return perm
+        return None
+
+    @classmethod
+    def set(cls, role, perm):
+        """
+        Caches the :class:`.CompiledPerm` of the passed role unless the cache
+        has been invalidated since the permissions have been compiled.
+        """
+        if role._id is not None and perm.generation == cls.generation:
+            cls.cache[role._id] = perm
+
+    @classmethod
+    def clear(cls):
+        """
+        Invalidates all cached permissions.
+        """
+        cls.cache = {}
+        cls.generation += 1
+
+
+class RoleWatch(CoreBase):
+    """
+    Watches collection ``sys.role`` for any changes using MongoDB _watch_
+    feature and invalidates the :class:`.PermCache`. If the change stream
+    is not available, the cached permissions are verified with the ``etag``
+    of all assigned roles.
+    """
+    change_stream = None
+
+    async def watch(self):
+        coll = self.config.sys.role.connect_async()
+        try:
+            async with coll.watch(ROLE_CHANGES) as RoleWatch.change_stream:
+                PermCache.clear()
+                PermCache.watching = True
+                async for change in RoleWatch.change_stream:
+                    if change:
+                        PermCache.clear()
+        except pymongo.errors.PyMongoError as exc:
+            self.logger.warning(
+                "failed to watch [sys.role], verify permissions by etag: %s",
+                exc)
+        finally:
+            PermCache.watching = False
+            PermCache.clear()
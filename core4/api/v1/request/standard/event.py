@@ -5,6 +5,8 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import inspect
+
 from tornado import gen
 
 import core4.const
@@ -12,6 +14,7 @@ import core4.util.node
 from core4.api.v1.request.main import CoreRequestHandler
 from core4.api.v1.request.websocket import CoreWebSocketHandler
 from core4.base.main import CoreBase
+from core4.queue.main import AsyncCoreQueue
 from core4.queue.query import QueryMixin
 from core4.util.data import json_encode, json_decode
 from core4.util.pager import CorePager
@@ -89,7 +92,7 @@ class EventHandler(CoreWebSocketHandler):
         self.logger.info("disconnected client %s", self.request.remote_ip)
         del EventHandler.waiters[self]
 
-    def on_message(self, message):
+    async def on_message(self, message):
         """
         Processes client messages of ``type``
 
@@ -108,6 +111,10 @@ class EventHandler(CoreWebSocketHandler):
             cmd = request.get("type", "unknown")
             meth = getattr(self, "proc_" + cmd, self.proc_unknown)
             ret = meth(request)
+            if inspect.isawaitable(ret):
+                ret = await ret
+            if isinstance(ret, dict):
+                ret = json_encode(ret)
         self.write_message(ret)
 
     def proc_unknown(self, request):
@@ -121,7 +128,7 @@ class EventHandler(CoreWebSocketHandler):
             "message": "unknown type"
         }
 
-    def proc_message(self, request):
+    async def proc_message(self, request):
         """
         Extracts the message ``channel`` and ``text``. If both are defined, an
         event with name ``message`` is created in ``sys.event``. Additionally
@@ -134,7 +141,7 @@ class EventHandler(CoreWebSocketHandler):
         channel = request.get("channel", None)
         text = request.get("text", None)
         if channel and text:
-            _id = self.trigger(
+            _id = await AsyncCoreQueue().trigger(
                 name=core4.const.MESSAGE_CHANNEL,
                 channel=channel,
                 data=text,
@@ -224,6 +231,8 @@ class EventHistoryHandler(CoreRequestHandler):
             - per_page (int): number of events per page
             - page (int): requested page (starts counting with ``0``)
             - filter (dict): optional mongodb filter
+            - after (str): continuation token of the next page for keyset
+              pagination, pass an empty ``after`` for the first page
 
         Returns:
             data element with list of events with
@@ -240,6 +249,8 @@ class EventHistoryHandler(CoreRequestHandler):
             - **page** (int): current page (starts counting with ``0``)
             - **page_count** (int): the total number of pages
             - **per_page** (int): the number of elements per page
+            - **after** (str): continuation token of the next page with
+              keyset pagination, ``None`` for the last page
 
         Raises:
             401: Unauthorized
@@ -316,6 +327,7 @@ class EventHistoryHandler(CoreRequestHandler):
         per_page = self.get_argument("per_page", as_type=int, default=10)
         current_page = self.get_argument("page", as_type=int, default=0)
         query_filter = self.get_argument("filter", as_type=dict, default={})
+        after = self.get_argument("after", as_type=str, default=None)
         coll = self.config.sys.event
         query = {
             "channel": core4.const.MESSAGE_CHANNEL
@@ -323,6 +335,9 @@ class EventHistoryHandler(CoreRequestHandler):
         if query_filter:
             query.update(query_filter)
 
+        # keyset pagination requires a unique sort key
+        key = "$natural" if after is None else "_id"
+
         async def _length(filter):
             return await coll.count_documents(filter)
 
@@ -332,7 +347,7 @@ class EventHistoryHandler(CoreRequestHandler):
                 projection={"created": 1, "data": 1, "_id": 1, "author": 1,
                             "channel": 1}
             ).sort(
-                [("$natural", -1)]
+                sort_by
             ).skip(
                 skip
             ).limit(
@@ -346,7 +361,8 @@ class EventHistoryHandler(CoreRequestHandler):
         pager = CorePager(per_page=per_page,
                           current_page=current_page,
                           length=_length, query=_query,
-                          filter=query)
+                          sort_by=[(key, -1)],
+                          filter=query, after=after)
         page = await pager.page()
         return self.reply(page)
 
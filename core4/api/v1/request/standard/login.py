@@ -202,7 +202,7 @@ class LoginHandler(CoreRequestHandler):
             }
             token = self.create_jwt(secs, payload)
             # self._send_mail(email, user.realname, token)
-            core4.queue.helper.functool.enqueue(
+            await core4.queue.helper.functool.enqueue_async(
                 RoleEmail,
                 template=self.config.email.template.en.password_reset,
                 recipients=email,
@@ -219,9 +219,7 @@ class LoginHandler(CoreRequestHandler):
         # internal method to set the updated password
         payload = self.parse_token(token)
         try:
-            username = payload["name"]
-            username = re.compile(username, re.IGNORECASE)
-            user = await CoreRole().find_one(name=username)
+            user = await CoreRole.find_name(payload["name"])
         except:
             self.logger.warning("user [%s] not found", payload["name"])
         user.password = password
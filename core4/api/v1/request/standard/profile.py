@@ -12,8 +12,8 @@ Implements core4 standard :class:`ProfileHandler`.
 import pymongo.errors
 from bson.objectid import ObjectId
 from tornado.web import HTTPError
-import re
 
+import core4.api.v1.request.error
 import core4.error
 from core4.api.v1.request.main import CoreRequestHandler
 from core4.api.v1.request.role.model import CoreRole
@@ -90,9 +90,7 @@ class ProfileHandler(CoreRequestHandler):
                 }
             }
         """
-        username = self.current_user
-        username = re.compile(username, re.IGNORECASE)
-        user = await CoreRole().find_one(name=username)
+        user = await CoreRole.find_name(self.current_user)
         if user is None:
             raise Core4RoleNotFound("unknown user [{}]".format(
                 self.current_user
@@ -136,9 +134,7 @@ class ProfileHandler(CoreRequestHandler):
             >>> signin = post(url + "/login", json={"username": "admin", "password": "hans"})
             >>> put(url + "/profile?etag=5bd9a6b0de8b6925021dc2b9&realname=Humphrey", cookies=signin.cookies).json()
         """
-        username = self.current_user
-        username = re.compile(username, re.IGNORECASE)
-        user = await CoreRole().find_one(name=username)
+        user = await CoreRole.find_name(self.current_user)
         if user is None:
             raise Core4RoleNotFound("unknown user [{}]".format(
                 self.current_user
@@ -159,7 +155,7 @@ class ProfileHandler(CoreRequestHandler):
         try:
             saved = await user.save()
         except (AttributeError, TypeError, core4.error.Core4ConflictError,
-                core4.error.ArgumentParsingError) as exc:
+                core4.api.v1.request.error.ArgumentParsingError) as exc:
             raise HTTPError(400, exc.args[0])
         except pymongo.errors.DuplicateKeyError:
             raise HTTPError(400, "name or email exists")
@@ -190,8 +190,7 @@ class SettingHandler(CoreRequestHandler):
         user_details = await self.user.detail()
 
         if username_param is not None and await self.user.is_admin():
-            username_param = re.compile(username_param, re.IGNORECASE)
-            lookup = await CoreRole().find_one(name=username_param)
+            lookup = await CoreRole.find_name(username_param)
             detail = await lookup.detail()
             return detail['_id']
         else:
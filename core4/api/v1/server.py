@@ -18,7 +18,8 @@ and provides the following endpoints:
 
 Additionally the server creates an endless loop to query collection
 ``sys.event`` continuously with :class:`.EventWatch` to support the
-:class:`.EventHandler`.
+:class:`.EventHandler` and watches ``sys.role`` with :class:`.RoleWatch` to
+invalidate the cached role permissions.
 
 Start the server with::
 
@@ -37,6 +38,7 @@ from core4.api.v1.request.queue.job import JobList
 from core4.api.v1.request.job import JobRequest
 from core4.api.v1.request.standard.system import SystemHandler
 from core4.api.v1.request.role.main import RoleHandler
+from core4.api.v1.request.role.perm import RoleWatch
 from core4.api.v1.request.standard.access import AccessHandler
 from core4.api.v1.request.standard.log import LogHandler
 from core4.api.v1.request.standard.event import EventHandler
@@ -96,6 +98,7 @@ class CoreApiServer(CoreApiContainer):
         (r'/jobs/list', JobList, None, "JobList"),
         (r'/jobs/history', JobHistoryHandler, None, "JobHistory"),
         (r'/jobs/enqueue/?', JobPost),
+        (r'/jobs/enqueue/(batch)', JobPost, None, "JobPostBatch"),
         (r'/jobs', JobHandler),
         (r'/jobs/(.*)', JobHandler, None, "JobHandler"),
 
@@ -138,11 +141,15 @@ class CoreApiServer(CoreApiContainer):
         IOLoop.current().add_callback(event.watch)
         queue = QueueWatch()
         IOLoop.current().add_callback(queue.watch)
+        role = RoleWatch()
+        IOLoop.current().add_callback(role.watch)
 
     def on_exit(self):
         QueueWatch.stop = True
         if EventWatch.change_stream is not None:
             IOLoop.current().run_sync(EventWatch.change_stream.close)
+        if RoleWatch.change_stream is not None:
+            IOLoop.current().run_sync(RoleWatch.change_stream.close)
 
 
 if __name__ == '__main__':
@@ -27,6 +27,7 @@ import core4.util.data
 from core4.api.v1.request.main import CoreBaseHandler
 from core4.api.v1.server import CoreApiServer, CoreAppManager
 from core4.base import CoreBase
+from core4.base.main import IDENTIFIER
 from core4.logger import CoreLoggerMixin
 from core4.service.introspect.command import SERVE
 from core4.service.introspect.main import CoreIntrospector
@@ -63,6 +64,7 @@ class CoreApiServerTool(CoreBase, CoreLoggerMixin):
         # global settings
         name = name or str(os.getpid()) # self.project # "app"
         self.identifier = "@".join([name, core4.util.node.get_hostname()])
+        IDENTIFIER.set(self.identifier)
         self.port = int(port or self.config.api.port)
         self.address = address or self.config.api.route
         self.hostname = core4.util.node.get_hostname()
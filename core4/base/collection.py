@@ -9,9 +9,15 @@
 This module implements :class:`.CoreCollection`, featuring database
 access and :class:`.CoreJobCollection` derived from
 :class:`.CoreCollection` with extended features for MongoDB collection
-access for :class:`.CoreJob`.
+access for :class:`.CoreJob`, and :class:`.BulkWriter` to buffer and
+flush job writes in batches.
 """
 
+import queue
+import threading
+import time
+
+import pymongo
 import pymongo.collection
 
 import core4.error
@@ -25,6 +31,9 @@ SCHEME = {
         'connector': make_mongo_connection
     }
 }
+#: default number of buffered operations per ``bulk_write``, see
+#: :class:`.BulkWriter`
+BULK_BATCH_SIZE = 1000
 
 
 class CoreCollection:
@@ -130,6 +139,10 @@ class CoreJobCollection(CoreCollection):
         self._cache = {}
 
     def __getattr__(self, item):
+        return getattr(self._job_collection(), item)
+
+    def _job_collection(self):
+        # internal method to retrieve the cached JobCollection
         key = (self.database, self.collection)
         if key in self._cache:
             coll = self._cache[key]
@@ -138,7 +151,29 @@ class CoreJobCollection(CoreCollection):
                                  self.collection)
             coll.set_job(self._job._id, self._job.get_source())
             self._cache[key] = coll
-        return getattr(coll, item)
+        return coll
+
+    def bulk_writer(self, batch_size=BULK_BATCH_SIZE, flush_interval=None,
+                    total=None, background=False):
+        """
+        Returns a :class:`.BulkWriter` context manager to buffer inserts,
+        upserts and updates and to flush them with unordered ``bulk_write``
+        chunks, for example::
+
+            with self.config.tests.data.bulk_writer(batch_size=5000) as bulk:
+                for record in reader:
+                    bulk.insert(record)
+
+        :param batch_size: number of operations per ``bulk_write``
+        :param flush_interval: maximum seconds to buffer operations
+        :param total: expected number of operations to report progress
+        :param background: flush in a background thread if ``True``
+        :return: :class:`.BulkWriter`
+        """
+        return BulkWriter(
+            self._job_collection(), job=self._job, batch_size=batch_size,
+            flush_interval=flush_interval, total=total,
+            background=background)
 
     def set_job(self, job):
         """
@@ -175,12 +210,17 @@ class JobCollection(pymongo.collection.Collection):
             "_src": _src
         }
 
-    def _update_job(self, doc, _src):
-        doc.update(self._job)
+    def _job_tag(self, _src=None):
+        # internal method to create and verify the job attributes
+        tag = dict(self._job)
         if _src is not None:
-            doc["_src"] = _src
-        if doc["_job_id"] is None or doc["_src"] is None:
+            tag["_src"] = _src
+        if tag["_job_id"] is None or tag["_src"] is None:
             raise AttributeError("_id and _src must not be None")
+        return tag
+
+    def _update_job(self, doc, _src):
+        doc.update(self._job_tag(_src))
 
     def insert_one(self, document, *args, _src=None, **kwargs):
         """
@@ -224,3 +264,204 @@ class JobCollection(pymongo.collection.Collection):
             document["$set"] = {}
         self._update_job(document["$set"], _src)
         return super()._update(sock_info, criteria, document, *args, **kwargs)
+
+
+class BulkWriter:
+    """
+    Buffers inserts, upserts and updates of a :class:`.JobCollection` and
+    flushes them as unordered ``bulk_write`` chunks. The job attributes
+    ``_job_id`` and ``_src`` are created once per chunk. A chunk is flushed
+    if it contains ``batch_size`` operations, if the oldest operation is
+    older than ``flush_interval`` seconds, if the job source changes and on
+    exit. Use :meth:`.CoreJobCollection.bulk_writer` to create the writer.
+
+    With ``background=True`` the chunks are written by a separate thread,
+    so that parsing and loading overlap. At most two chunks are pending.
+    Write errors of the background thread are raised with the next
+    operation or on exit.
+
+    The number of written operations is reported with
+    :meth:`.CoreJob.progress` if a job is passed. The progress is computed
+    from ``total`` if passed.
+    """
+
+    def __init__(self, collection, job=None, batch_size=BULK_BATCH_SIZE,
+                 flush_interval=None, total=None, background=False):
+        """
+        :param collection: :class:`.JobCollection`
+        :param job: :class:`.CoreJob` to report progress
+        :param batch_size: number of operations per ``bulk_write``
+        :param flush_interval: maximum seconds to buffer operations
+        :param total: expected number of operations
+        :param background: flush in a background thread if ``True``
+        """
+        if batch_size < 1:
+            raise core4.error.Core4UsageError(
+                "batch_size must be greater than 0")
+        self.collection = collection
+        self.job = job
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.total = total
+        self.background = background
+        self.inserted = 0
+        self.matched = 0
+        self.modified = 0
+        self.upserted = 0
+        self.written = 0
+        self._buffer = []
+        self._source = None
+        self._since = None
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._error = None
+
+    def __enter__(self):
+        if self.background:
+            self._queue = queue.Queue(maxsize=2)
+            self._thread = threading.Thread(target=self._work, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self._stop()
+        if exc_type is None:
+            self._raise()
+            if self.background:
+                self._progress()
+
+    def insert(self, document):
+        """
+        Buffers the insert of the passed document.
+
+        :param document: dict
+        """
+        self._add(pymongo.InsertOne, document)
+
+    def update(self, filter, update, upsert=False, many=False):
+        """
+        Buffers the update of the document(s) matching the passed filter.
+
+        :param filter: MongoDB query
+        :param update: MongoDB update document
+        :param upsert: insert the document if no document matches
+        :param many: update all documents matching the filter
+        """
+        op = pymongo.UpdateMany if many else pymongo.UpdateOne
+        self._add(op, filter, update, upsert=upsert)
+
+    def upsert(self, filter, update):
+        """
+        Buffers the upsert of the document matching the passed filter, see
+        :meth:`.update`.
+
+        :param filter: MongoDB query
+        :param update: MongoDB update document
+        """
+        self.update(filter, update, upsert=True)
+
+    def _add(self, op, *args, **kwargs):
+        # internal method to buffer an operation and to flush the chunk
+        self._raise()
+        if self._buffer and self.collection._job is not self._source:
+            self.flush()
+        if not self._buffer:
+            self._source = self.collection._job
+            self._since = time.monotonic()
+        self._buffer.append((op, args, kwargs))
+        if (len(self._buffer) >= self.batch_size
+                or (self.flush_interval is not None
+                    and time.monotonic() - self._since
+                    >= self.flush_interval)):
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered operations. With ``background=True`` the chunk is
+        passed to the background thread.
+        """
+        if not self._buffer:
+            return
+        requests = self._make_requests(self._buffer)
+        self._buffer = []
+        if self._thread is None:
+            self._write(requests)
+        else:
+            self._queue.put(requests)
+        self._progress()
+
+    def _make_requests(self, buffer):
+        # internal method to create the pymongo operations with job tags
+        tag = self.collection._job_tag()
+        requests = []
+        for (op, args, kwargs) in buffer:
+            if op is pymongo.InsertOne:
+                args[0].update(tag)
+            else:
+                update = dict(args[1])
+                if "$set" in update:
+                    update["$set"] = dict(update["$set"], **tag)
+                elif any(k.startswith("$") for k in update):
+                    update["$set"] = dict(tag)
+                else:
+                    raise core4.error.Core4UsageError(
+                        "update requires update operators")
+                args = (args[0], update)
+            requests.append(op(*args, **kwargs))
+        return requests
+
+    def _write(self, requests):
+        # internal method to write a chunk, bypassing the job tags of
+        # JobCollection.bulk_write which have been applied already
+        ret = pymongo.collection.Collection.bulk_write(
+            self.collection, requests, ordered=False)
+        with self._lock:
+            self.inserted += ret.inserted_count
+            self.matched += ret.matched_count
+            self.modified += ret.modified_count
+            self.upserted += ret.upserted_count
+            self.written += len(requests)
+
+    def _work(self):
+        # internal method of the background thread
+        while True:
+            requests = self._queue.get()
+            try:
+                if requests is None:
+                    return
+                if self._error is None:
+                    self._write(requests)
+            except Exception as exc:
+                self._error = exc
+            finally:
+                self._queue.task_done()
+
+    def _stop(self):
+        # internal method to stop the background thread
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _raise(self):
+        # internal method to raise the background thread's write error
+        if self._error is not None:
+            raise self._error
+
+    def _progress(self):
+        # internal method to report the number of written operations
+        if self.job is None:
+            return
+        with self._lock:
+            written = self.written
+        if self.total:
+            p = min(1., written / self.total)
+        else:
+            p = self.job.prog["value"] or 0.
+        self.job.progress(p, "bulk write [%s] of [%s] operations",
+                          written, self.total or "?")
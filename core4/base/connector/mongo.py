@@ -10,7 +10,6 @@ Delivers MongoDB cached database connectivity using :mod:`pymongo` and
 :mod:`motor`.
 """
 
-import motor
 import pymongo
 
 CACHE = {
@@ -44,6 +43,7 @@ def make_connection(connection):
     if url in CACHE[mode]:
         return CACHE[mode][url]
     if connection.async_conn:
+        import motor
         CACHE[mode][url] = motor.MotorClient(
             url, tz_aware=False, connect=False)
     else:
@@ -11,6 +11,8 @@ All classes inheriting from :class:`.CoreBase` provide the standard features of
 core4os classes.
 """
 
+import contextlib
+import contextvars
 import importlib
 import inspect
 import logging
@@ -30,6 +32,30 @@ from core4.const import CORE4, PREFIX
 
 _except_hook = None
 
+#: identifier of the current execution context inherited by all new
+#: :class:`.CoreBase` objects, see :func:`identify`
+IDENTIFIER = contextvars.ContextVar("identifier", default=None)
+
+
+@contextlib.contextmanager
+def identify(identifier):
+    """
+    Context manager to set the ``identifier`` of the current execution context.
+    All :class:`.CoreBase` objects created within the context inherit this
+    identifier. The context propagates into :mod:`asyncio` tasks created
+    within the context::
+
+        with identify("worker@localhost"):
+            queue = CoreQueue()  # queue.identifier == "worker@localhost"
+
+    :param identifier: to set
+    """
+    token = IDENTIFIER.set(identifier)
+    try:
+        yield identifier
+    finally:
+        IDENTIFIER.reset(token)
+
 
 def is_core4_project(body):
     """
@@ -81,11 +107,15 @@ class CoreBase:
       the name of the worker
 
     .. note:: Please note that :class:`.CoreBase` replicates the identifier of
-              the class in which scope the object is created. If an object *A*
-              derived from  :class:`.CoreBase` has an ``.identifer`` not
-              ``None`` and creates another object *B* which inherits from
-              :class:`.CoreBase`, too, then the ``.identifier`` is passed
-              from object *A* to object *B*.
+              the execution context in which the object is created, see
+              :func:`identify`. The worker, the scheduler, the job process
+              and the request handlers set this context. If config setting
+              ``base.frame_identifier`` is ``True`` and the context carries
+              no identifier, then the identifier is searched in all stack
+              frames: if an object *A* derived from :class:`.CoreBase` has an
+              ``.identifer`` not ``None`` and creates another object *B* which
+              inherits from :class:`.CoreBase`, too, then the ``.identifier``
+              is passed from object *A* to object *B*.
     """
     # used to hack
     _short_qual_name = None
@@ -102,28 +132,32 @@ class CoreBase:
     _raw_config = None
 
     def __init__(self):
-        # query identifier from instantiating object
-        if self.identifier is None:
-            identifier = None
-            current_frames = inspect.getouterframes(inspect.currentframe())
-            for frame_info in current_frames:
-                locals = list(frame_info.frame.f_locals.values())
-                for v in locals:
-                    if issubclass(v.__class__, CoreBase):
-                        ident = v.identifier
-                        if ident is not None:
-                            identifier = ident
-                            break
-                if identifier is not None:
-                    break
-            self.identifier = identifier
         self._progress = None
         self.project = self.get_project()
         self._open_config()
+        # query identifier from execution context or instantiating object
+        if self.identifier is None:
+            identifier = IDENTIFIER.get()
+            if identifier is None and self.config.base.frame_identifier:
+                identifier = self._frame_identifier()
+            self.identifier = identifier
         self._open_logging()
         self._event = None
         self.initialise_object()
 
+    @staticmethod
+    def _frame_identifier():
+        # search the identifier of the instantiating object in all outer
+        # stack frames
+        frame = inspect.currentframe()
+        while frame is not None:
+            for v in list(frame.f_locals.values()):
+                if isinstance(v, CoreBase):
+                    if v.identifier is not None:
+                        return v.identifier
+            frame = frame.f_back
+        return None
+
     def initialise_object(self):
         """
         Called after object instantiation. This method can be overwritten by
@@ -397,6 +431,13 @@ class CoreBase:
                     size=self.config.event.size
                 )
             self._event = conn
+        inserted = self._event.insert_one(
+            self._event_doc(name, channel, data, author))
+        return inserted.inserted_id
+
+    @staticmethod
+    def _event_doc(name, channel=None, data=None, author=None):
+        # internal method to create the sys.event document, see .trigger
         doc = {
             "created": core4.util.node.mongo_now(),
             "name": name,
@@ -405,8 +446,7 @@ class CoreBase:
         }
         if data:
             doc["data"] = data
-        inserted = self._event.insert_one(doc)
-        return inserted.inserted_id
+        return doc
 
     @property
     def raw_config(self):
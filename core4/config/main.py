@@ -9,15 +9,21 @@
 Implements core4 configuration management with :class:`.CoreConfig`.
 """
 
+import collections
 import collections.abc
+import copy
+import hashlib
 import os
+import pickle
 import pprint
+import tempfile
+import time
 
 import dateutil.parser
-import pkg_resources
 import yaml
 from datetime import datetime, date
 
+import core4
 import core4.base.collection
 import core4.config.map
 import core4.config.tag
@@ -26,12 +32,19 @@ from core4.error import Core4ConfigurationError
 from core4.util.data import parse_boolean
 
 CONFIG_EXTENSION = ".yaml"
-STANDARD_CONFIG = pkg_resources.resource_filename(
-    "core4", "core4" + CONFIG_EXTENSION)
+STANDARD_CONFIG = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "core4" + CONFIG_EXTENSION)
 USER_CONFIG = os.path.expanduser("~/.core4/local" + CONFIG_EXTENSION)
 SYSTEM_CONFIG = "/etc/core4/local" + CONFIG_EXTENSION
 ENV_PREFIX = "CORE4_OPTION_"
 DEFAULT = "DEFAULT"
+#: maximum number of compiled configuration snapshots kept per process
+SNAPSHOT_SIZE = 256
+#: environment variable with the folder of persisted configuration snapshots
+CACHE_ENV = "CORE4_CONFIG_CACHE"
+#: seconds before snapshots are verified against changes of ``sys.conf``
+SYS_CONF_TTL = 30
 
 
 def type_ident(a, b):
@@ -56,6 +69,22 @@ def type_ident(a, b):
     return True
 
 
+def _mtime(filename):
+    """
+    Internal helper to retrieve the modification time and size of a file.
+
+    :return: tuple of modification time in nanoseconds and size, ``None`` if
+             the file does not exist
+    """
+    if filename:
+        try:
+            stat = os.stat(filename)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            pass
+    return None
+
+
 class CoreConfig(collections.abc.MutableMapping):
     """
     :class:`.CoreConfig` is the gateway into core4 configuration. Please note
@@ -69,15 +98,38 @@ class CoreConfig(collections.abc.MutableMapping):
     access to configuration data stored in the ``._config_cache`` attribute,
     accessible through :meth:`._config`. This attribute implements the
     :class:`.ConfigMap`.
+
+    With ``cache`` and ``snapshot`` enabled (default), the compiled
+    configuration is shared process-wide by all :class:`.CoreConfig` objects
+    with the same configuration sources. The snapshot is keyed by the
+    configuration file names and their modification times, the
+    ``CORE4_OPTION_`` environment variables and the ``extra_dict``. MongoDB
+    collection ``sys.conf`` is read once for each snapshot. Snapshots are
+    compiled again if the documents in ``sys.conf`` changed. The check runs
+    at most every :data:`SYS_CONF_TTL` seconds, so ``sys.conf`` changes take
+    up to that long to reach running processes. The :class:`.ConnectTag`
+    objects of the snapshot are copied for each :class:`.CoreConfig` object,
+    so MongoDB collections are connected per object.
+
+    If the environment variable :data:`CACHE_ENV` names a folder, then
+    snapshots are additionally persisted into this folder and shared across
+    processes. A persisted snapshot is only used if the documents in
+    ``sys.conf`` did not change since the snapshot has been compiled.
     """
     cache = True
+    snapshot = True
     standard_config = STANDARD_CONFIG
     user_config = USER_CONFIG
     system_config = SYSTEM_CONFIG
 
     _config_cache = None
+    _config_base = None
     _file_cache = {}
+    _file_mtime = {}
+    _snapshot = collections.OrderedDict()
+    _db_verified = {}
     _db_cache = None
+    _db_source = None
     db_info = None
 
     def __init__(self, project_config=None, config_file=None, extra_dict={},
@@ -167,9 +219,191 @@ class CoreConfig(collections.abc.MutableMapping):
         :return: :class:`.ConfigMap`
         """
         if self._config_cache is None:
-            self._config_cache = self._load()
+            if self.cache and self.snapshot:
+                self._config_cache = self._load_snapshot()
+            else:
+                self._config_cache = self._load()
+                self._config_base = self._config_cache
         return self._config_cache
 
+    def _load_snapshot(self):
+        """
+        Returns the compiled configuration from the process-wide snapshot
+        cache. The configuration is loaded with :meth:`._load` if no snapshot
+        with the same key exists or if ``sys.conf`` changed since the
+        snapshot has been compiled, see :meth:`._sys_conf_version`.
+
+        The shared snapshot is available in ``._config_base``. The returned
+        configuration carries copies of all :class:`.ConnectTag` objects of
+        the snapshot, see :meth:`._bind_tags`.
+
+        :return: :class:`.ConfigMap`
+        """
+        key = self._snapshot_key()
+        cache = CoreConfig._snapshot
+        snapshot = cache.get(key)
+        if snapshot is not None and snapshot[2] is not None:
+            if self._sys_conf_version(snapshot[2]) != snapshot[2][2]:
+                snapshot = None
+        if snapshot is None:
+            folder = os.getenv(CACHE_ENV)
+            if folder:
+                data = self._load_persisted(folder, key)
+            else:
+                data = self._load()
+            snapshot = (data, self.db_info, self._db_source,
+                        self._find_tags(data))
+            cache[key] = snapshot
+            while len(cache) > SNAPSHOT_SIZE:
+                cache.popitem(last=False)
+        (data, self.db_info, self._db_source, tags) = snapshot
+        self._config_base = data
+        return self._bind_tags(data, tags)
+
+    @staticmethod
+    def _find_tags(config, path=()):
+        """
+        :param config: compiled configuration
+        :return: list of key paths to all :class:`.ConnectTag` objects
+        """
+        tags = []
+        for k, v in config.items():
+            if isinstance(v, dict):
+                tags += CoreConfig._find_tags(v, path + (k,))
+            elif isinstance(v, core4.config.tag.ConnectTag):
+                tags.append(path + (k,))
+        return tags
+
+    @staticmethod
+    def _bind_tags(config, tags):
+        """
+        Copies the :class:`.ConnectTag` objects at the passed key paths
+        without their established connection. Branches without tags are
+        shared with the passed configuration.
+
+        :param config: compiled configuration
+        :param tags: list of key paths, see :meth:`._find_tags`
+        :return: :class:`.ConfigMap`
+        """
+        if not tags:
+            return config
+        branch = {}
+        for (key, *path) in tags:
+            branch.setdefault(key, []).append(tuple(path))
+        data = dict(config)
+        for key, paths in branch.items():
+            if paths == [()]:
+                # the tag does not copy its connection
+                data[key] = copy.copy(config[key])
+            else:
+                data[key] = CoreConfig._bind_tags(config[key], paths)
+        return core4.config.map.ConfigMap(data)
+
+    def _sys_conf_version(self, source):
+        """
+        Returns the version hash of the documents in ``sys.conf``. The hash
+        is cached per process for :data:`SYS_CONF_TTL` seconds.
+
+        :param source: tuple of connection string, default ``mongo_url`` and
+                       ``mongo_database`` and version hash of ``sys.conf``
+        :return: current version hash
+        """
+        (conn_str, opts, _) = source
+        check = (conn_str, repr(opts))
+        verified = CoreConfig._db_verified.get(check)
+        if verified is None or verified[1] <= time.monotonic():
+            version = self._sys_conf(conn_str, opts)[2]
+            CoreConfig._db_verified[check] = (
+                version, time.monotonic() + SYS_CONF_TTL)
+            return version
+        return verified[0]
+
+    def _load_persisted(self, folder, key):
+        """
+        Returns the compiled configuration from the snapshot persisted in the
+        passed folder. The snapshot is compiled and persisted if it does not
+        exist, if it is outdated or if it cannot be read.
+
+        :param folder: of persisted snapshots
+        :param key: snapshot key, see :meth:`._snapshot_key`
+        :return: :class:`.ConfigMap`
+        """
+        digest = hashlib.md5(
+            repr((core4.__version__, key)).encode("utf-8")).hexdigest()
+        filename = os.path.join(folder, "core4config-{}.pickle".format(digest))
+        snapshot = self._read_persisted(filename)
+        if snapshot is None:
+            config = self._compile()
+            self._write_persisted(
+                filename, (config, self._db_source, self.db_info))
+        else:
+            (config, self._db_source, self.db_info) = snapshot
+        return core4.config.map.ConfigMap(config)
+
+    def _read_persisted(self, filename):
+        """
+        Reads the persisted snapshot. Snapshots not owned by the current user
+        or with outdated ``sys.conf`` documents are ignored.
+
+        :param filename: of the persisted snapshot
+        :return: tuple of compiled configuration dict, ``sys.conf`` source and
+                 ``sys.conf`` info, ``None`` if not available
+        """
+        try:
+            with open(filename, "rb") as fh:
+                if os.fstat(fh.fileno()).st_uid != os.getuid():
+                    return None
+                snapshot = pickle.load(fh)
+        except Exception:
+            return None
+        source = snapshot[1]
+        if source is not None:
+            if self._sys_conf_version(source) != source[2]:
+                return None
+        return snapshot
+
+    def _write_persisted(self, filename, snapshot):
+        """
+        Atomically writes the passed snapshot. The snapshot might carry
+        credentials and is therefore only readable by the current user.
+
+        :param filename: of the persisted snapshot
+        :param snapshot: to write
+        """
+        folder = os.path.dirname(filename)
+        try:
+            os.makedirs(folder, mode=0o700, exist_ok=True)
+            (fd, temp) = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    pickle.dump(snapshot, fh, pickle.HIGHEST_PROTOCOL)
+                os.replace(temp, filename)
+            except BaseException:
+                os.unlink(temp)
+                raise
+        except (OSError, pickle.PicklingError):
+            pass
+
+    def _snapshot_key(self):
+        """
+        Builds the snapshot key from all configuration sources, see
+        :meth:`._load_snapshot`.
+
+        :return: tuple
+        """
+        files = [self.standard_config, self._config_file, self.env_config,
+                 self.user_config, self.system_config]
+        if self.project_config:
+            files.append(self.project_config[1])
+        stat = []
+        for filename in files:
+            stat.append((filename, _mtime(filename)))
+        environ = tuple(sorted(
+            (k, v) for k, v in os.environ.items() if k.startswith(ENV_PREFIX)))
+        project = self.project_config[0] if self.project_config else None
+        return (self.__class__, project, tuple(stat), environ,
+                repr(self.extra_dict), self.concurr)
+
     def _verify_dict(self, variable, message):
         """
         Verifies the passed variable is a Python dict. Raises
@@ -380,14 +614,18 @@ class CoreConfig(collections.abc.MutableMapping):
         :param filename: to parse
         :return: YAML structure in Python dict format
         """
-        if self.cache and filename in self.__class__._file_cache:
+        if (self.cache and filename in self.__class__._file_cache
+                and self.__class__._file_mtime.get(filename) == _mtime(
+                    filename)):
             body = self.__class__._file_cache[filename]
             return yaml.safe_load(body) or {}
         if os.path.exists(filename):
+            mtime = _mtime(filename)
             with open(filename, "r", encoding="utf-8") as f:
                 body = f.read()
             if self.cache:
                 self.__class__._file_cache[filename] = body
+                self.__class__._file_mtime[filename] = mtime
             data = yaml.safe_load(body) or {}
             self._verify_dict(data, filename)
             return data
@@ -437,21 +675,39 @@ class CoreConfig(collections.abc.MutableMapping):
             else:
                 conn_str = connect.conn_str
             conf = {}
-
-            def init_collection(**kwargs):
-                # default callback for method connect_database
-                return core4.base.collection.CoreCollection(**kwargs)
-
-            coll = core4.config.tag.connect_database(
-                conn_str, init_collection, **opts)
-            for doc in coll.find(projection={"_id": 0}, sort=[("_id", 1)]):
+            (coll, docs, version) = self._sys_conf(conn_str, opts)
+            for doc in docs:
                 conf = core4.util.tool.dict_merge(conf, doc)
             self._db_cache = self._resolve_tags(conf)
+            self._db_source = (conn_str, opts, version)
+            CoreConfig._db_verified[(conn_str, repr(opts))] = (
+                version, time.monotonic() + SYS_CONF_TTL)
             self.db_info = coll.info_url
         else:
             self._db_cache = {}
         return self._db_cache
 
+    @staticmethod
+    def _sys_conf(conn_str, opts):
+        """
+        Reads all documents of collection ``sys.conf``.
+
+        :param conn_str: connection string of ``sys.conf``
+        :param opts: default ``mongo_url`` and ``mongo_database``
+        :return: tuple of :class:`.CoreCollection`, list of documents and
+                 version hash of the documents
+        """
+
+        def init_collection(**kwargs):
+            # default callback for method connect_database
+            return core4.base.collection.CoreCollection(**kwargs)
+
+        coll = core4.config.tag.connect_database(
+            conn_str, init_collection, **opts)
+        docs = list(coll.find(projection={"_id": 0}, sort=[("_id", 1)]))
+        version = hashlib.md5(repr(docs).encode("utf-8")).hexdigest()
+        return coll, docs, version
+
     def _read_env(self):
         """
         Overwrite configuration options with values from OS environment
@@ -545,6 +801,16 @@ class CoreConfig(collections.abc.MutableMapping):
         :param apply_default_section :boolean: load raw config parameters or parameters with defaults recursively applied
         :return: :class:`.ConfigMap`
         """
+        return core4.config.map.ConfigMap(
+            self._compile(apply_default_section))
+
+    def _compile(self, apply_default_section=True):
+        """
+        Compiles the configuration sources as described in :meth:`._load`.
+
+        :param apply_default_section :boolean: load raw config parameters or parameters with defaults recursively applied
+        :return: dict
+        """
         # extra config
         if self.project_config and os.path.exists(self.project_config[1]):
             lookup = self.project_config[0]
@@ -585,10 +851,8 @@ class CoreConfig(collections.abc.MutableMapping):
         local_data = core4.util.tool.dict_merge(local_data, environ)
 
         # merge OS environ
-        data = core4.config.map.ConfigMap(
-            self._parse(standard_data, extra, local_data, self.extra_dict, apply_default_section)
-        )
-        return data
+        return self._parse(standard_data, extra, local_data, self.extra_dict,
+                           apply_default_section)
 
     def get_folder(self, key):
         """
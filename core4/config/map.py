@@ -17,7 +17,8 @@ import core4.error
 class ConfigMap(dict):
     """
     A read-only dictionary that supports dot notation as well as dictionary
-    access notation.
+    access notation. Nested :class:`.ConfigMap` values are read-only already
+    and are shared instead of copied.
     """
 
     __getattr__ = dict.__getitem__
@@ -25,7 +26,8 @@ class ConfigMap(dict):
     def __init__(self, dct):
         self.__dict__["__ro__"] = False
         for key, value in dct.items():
-            if isinstance(value, collections.abc.MutableMapping):
+            if (isinstance(value, collections.abc.MutableMapping)
+                    and not isinstance(value, ConfigMap)):
                 value = ConfigMap(value)
             self[key] = value
         self.__dict__["__ro__"] = True
@@ -174,6 +174,29 @@ class ConnectTag(yaml.YAMLObject):
     def __getattr__(self, item):
         return getattr(self.connect(), item)
 
+    def __copy__(self):
+        """
+        Supports copying of the tag without the established connection.
+        """
+        tag = self.__class__.__new__(self.__class__)
+        tag.__dict__.update(self.__dict__)
+        tag._mongo = None
+        return tag
+
+    def __getstate__(self):
+        """
+        Supports pickling of the tag without the established connection.
+        """
+        state = self.__dict__.copy()
+        state["_mongo"] = None
+        return state
+
+    def __setstate__(self, state):
+        """
+        Supports unpickling of the tag, see :meth:`.__getstate__`.
+        """
+        self.__dict__.update(state)
+
     @classmethod
     def from_yaml(cls, loader, node):
         """
@@ -9,9 +9,6 @@
 Implements all core4 specific exceptions
 """
 
-from tornado.web import HTTPError
-
-
 class Core4Error(Exception):
     """
     This is the base class of all core4 exceptions.
@@ -70,10 +67,12 @@ class CoreJobExists(Core4Error):
     name/qual_name and job arguments.
     """
 
-class ArgumentParsingError(HTTPError):
-    """
-    This exception is raised if an error occured while parsing query or body
-    parameters in the context of core API.
-    """
-    def __init__(self, log_message=None, *args, status_code=400, **kwargs):
-        super().__init__(status_code, log_message, *args, **kwargs)
+
+def __getattr__(name):
+    # ArgumentParsingError requires tornado and is implemented in
+    # core4.api.v1.request.error, re-export it on first use
+    if name == "ArgumentParsingError":
+        import core4.api.v1.request.error
+        return core4.api.v1.request.error.ArgumentParsingError
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name))
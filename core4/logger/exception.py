@@ -13,7 +13,7 @@ exceptions in case a CRITICAL log level message occurs.
 import collections
 import logging
 
-from core4.logger.handler import make_record
+from core4.logger.handler import make_record, MongoLoggingHandler
 
 FLUSH_LEVEL = logging.CRITICAL
 
@@ -22,7 +22,8 @@ class CoreExceptionHandler(logging.Handler):
     """
     This handler stacks all :attr:`logging.DEBUG` log records. If a log record
     with log level :attr:`logging.CRITICAL` appears, then all memorised log
-    records are fed into ``sys.log`` MongoDB collection.
+    records are fed into ``sys.log`` MongoDB collection through the batched
+    :meth:`.MongoLoggingHandler.put` if MongoDB logging has been set up.
     """
 
     def __init__(self, *args, level, size, target, **kwargs):
@@ -44,9 +45,11 @@ class CoreExceptionHandler(logging.Handler):
         if record.levelno >= FLUSH_LEVEL:
             self.acquire()
             try:
-                if self.target:
-                    for doc in self.queue:
-                        self.target.insert_one(doc)
+                handler = MongoLoggingHandler.instance()
+                if handler is not None:
+                    handler.put(list(self.queue))
+                elif self.target and self.queue:
+                    self.target.insert_many(list(self.queue), ordered=False)
             finally:
                 self.release()
                 self.flush()
@@ -10,8 +10,11 @@ Implements :class:`.MongoLoggingHandler` to log into MongoDB collection
 ``sys.log`` and :func:`make_record` to customise MongoDB documents representing
 the logging record.
 """
+import collections
 import logging.config
 import os
+import sys
+import threading
 import traceback
 
 import datetime
@@ -19,6 +22,11 @@ import time
 
 from core4.util.tool import Singleton
 
+#: drop records with the lowest log level first if the buffer is full
+OVERFLOW_DROP = "drop"
+#: block the logging thread until the buffer has space
+OVERFLOW_BLOCK = "block"
+
 
 def make_record(record):
     """
@@ -62,19 +70,114 @@ def make_record(record):
     return doc
 
 
+class LevelBuffer:
+    """
+    FIFO buffer of log documents as created by :func:`make_record` with one
+    queue per log level. :meth:`.popleft` returns the documents in the order
+    of arrival. :meth:`.drop` removes the oldest document with the lowest
+    log level. Both methods are independent of the number of buffered
+    documents.
+    """
+
+    def __init__(self):
+        self._level = {}
+        self._seq = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def append(self, doc):
+        """
+        Appends the passed document to the queue of its log level.
+
+        :param doc: dict with ``levelno``
+        """
+        queue = self._level.get(doc["levelno"])
+        if queue is None:
+            queue = self._level[doc["levelno"]] = collections.deque()
+        queue.append((self._seq, doc))
+        self._seq += 1
+        self._len += 1
+
+    def popleft(self):
+        """
+        :return: the oldest document
+        """
+        queue = min([q for q in self._level.values() if q],
+                    key=lambda q: q[0][0])
+        self._len -= 1
+        return queue.popleft()[1]
+
+    def lowest(self):
+        """
+        :return: the lowest log level of all buffered documents
+        """
+        return min([k for (k, q) in self._level.items() if q])
+
+    def drop(self):
+        """
+        Removes the oldest document with the lowest log level.
+
+        :return: the removed document
+        """
+        self._len -= 1
+        return self._level[self.lowest()].popleft()[1]
+
+
 class MongoLoggingHandler(logging.Handler, metaclass=Singleton):
     """
     This class implements logging into a MongoDB database/collection.
+
+    If a buffer ``capacity`` is set, then log records are queued and written
+    by a background thread with ``insert_many`` in batches of up to ``size``
+    records or every ``interval`` seconds, whatever comes first. If the buffer
+    is full, then the ``overflow`` policy applies. With
+    :data:`OVERFLOW_DROP` the oldest record with the lowest log level is
+    dropped. With :data:`OVERFLOW_BLOCK` the logging thread waits until the
+    background thread has written the pending records.
+
+    Without a ``capacity`` each log record is written synchronously with
+    ``insert_one``.
     """
 
-    def __init__(self, connection):
+    def __init__(self, connection, capacity=None, size=500, interval=1.,
+                 overflow=OVERFLOW_DROP):
         """
         Connects the logging handler with the passed MongoDB connection.
 
         :param connection: :class:`pymongo.collection.Collection` object
+        :param capacity: maximum number of buffered log records, ``None``
+                         writes each log record synchronously
+        :param size: maximum number of log records written at once
+        :param interval: maximum number of seconds between writes
+        :param overflow: policy if the buffer is full, :data:`OVERFLOW_DROP`
+                         or :data:`OVERFLOW_BLOCK`
         """
         super(MongoLoggingHandler, self).__init__()
+        if overflow not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError("invalid overflow policy [{}]".format(overflow))
         self._collection = connection
+        self.capacity = capacity
+        self.size = max(1, size)
+        self.interval = interval
+        self.overflow = overflow
+        self.dropped = 0
+        self._pid = None
+        self._thread = None
+        self._cond = None
+        self._buffer = None
+        self._busy = 0
+        self._flushing = 0
+        self._closed = False
+
+    @classmethod
+    def instance(cls):
+        """
+        :return: the MongoDB logging handler of the process or ``None`` if
+                 MongoDB logging has not been set up
+        """
+        return Singleton._instances.get(cls)
 
     def handle(self, record):
         """
@@ -99,4 +202,141 @@ class MongoLoggingHandler(logging.Handler, metaclass=Singleton):
         :param record: the log record (:class:`logging.LogRecord`)
         """
         doc = make_record(record)
-        self._collection.insert_one(doc)
+        if self.capacity:
+            self.put([doc])
+        else:
+            self._collection.insert_one(doc)
+
+    def put(self, docs):
+        """
+        Queues the passed log documents for the background writer. The
+        documents are written synchronously if the handler has no buffer
+        ``capacity`` or if the handler has been closed.
+
+        :param docs: list of dict as created by :func:`make_record`
+        """
+        if not (self.capacity and self._start()):
+            if docs:
+                self._collection.insert_many(docs, ordered=False)
+            return
+        with self._cond:
+            for doc in docs:
+                while len(self._buffer) >= self.capacity:
+                    if self.overflow == OVERFLOW_BLOCK:
+                        self._cond.notify_all()
+                        self._cond.wait(self.interval)
+                    elif self._overflow(doc):
+                        doc = None
+                        break
+                if doc is not None:
+                    self._buffer.append(doc)
+            if len(self._buffer) >= self._batch_size():
+                self._cond.notify_all()
+
+    def _batch_size(self):
+        # internal method to return the number of records to write at once
+        return min(self.size, self.capacity)
+
+    def _overflow(self, doc):
+        # internal method to drop the oldest record with the lowest log level,
+        # returns True if the passed doc is the one to drop
+        self.dropped += 1
+        if doc["levelno"] <= self._buffer.lowest():
+            return True
+        self._buffer.drop()
+        return False
+
+    def _start(self):
+        # internal method to launch the background writer once per process;
+        # forked processes start their own writer with an empty buffer
+        if self._pid != os.getpid():
+            self.acquire()
+            try:
+                if self._pid != os.getpid():
+                    self._cond = threading.Condition()
+                    self._buffer = LevelBuffer()
+                    self._busy = 0
+                    self._flushing = 0
+                    self._closed = False
+                    self._thread = threading.Thread(
+                        target=self._run, name="MongoLoggingHandler",
+                        daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+            finally:
+                self.release()
+        return not self._closed
+
+    def _run(self):
+        # internal method of the background writer
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.interval
+                while (len(self._buffer) < self._batch_size()
+                       and not self._closed
+                       and not self._flushing):
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                batch = [self._buffer.popleft() for _ in
+                         range(min(self.size, len(self._buffer)))]
+                self._busy = len(batch)
+                if not batch:
+                    self._cond.notify_all()
+                    if self._closed:
+                        return
+                    if self._flushing:
+                        # let the flushing threads return
+                        self._cond.wait(self.interval)
+                    continue
+            try:
+                self._collection.insert_many(batch, ordered=False)
+            except Exception:
+                if logging.raiseExceptions:
+                    sys.stderr.write("--- Logging error ---\n")
+                    traceback.print_exc(file=sys.stderr)
+            finally:
+                with self._cond:
+                    self._busy = 0
+                    self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Waits until all buffered log records have been written.
+
+        :param timeout: maximum number of seconds to wait, defaults to
+                        ``None`` (wait until complete)
+        :return: ``True`` if all buffered records have been written
+        """
+        if self._pid != os.getpid():
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flushing += 1
+            try:
+                while ((self._buffer or self._busy)
+                       and self._thread.is_alive()):
+                    self._cond.notify_all()
+                    wait = None
+                    if deadline is not None:
+                        wait = deadline - time.monotonic()
+                        if wait <= 0:
+                            break
+                    self._cond.wait(wait)
+                return not (self._buffer or self._busy)
+            finally:
+                self._flushing -= 1
+
+    def close(self):
+        """
+        Flushes all buffered log records, stops the background writer and
+        closes the handler.
+        """
+        if self._pid == os.getpid() and not self._closed:
+            self.flush()
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self._thread.join()
+        super(MongoLoggingHandler, self).close()
@@ -101,10 +101,15 @@ class CoreLoggerMixin:
                         self.logger.warning("failed to create [sys.log]")
                 level = getattr(logging, mongodb)
                 write_concern = self.config.logging.write_concern
+                batch = self.config.logging.batch
                 handler = core4.logger.handler.MongoLoggingHandler(
                     conn.with_options(write_concern=pymongo.WriteConcern(
                         w=write_concern
-                    )))
+                    )),
+                    capacity=batch.capacity,
+                    size=batch.size,
+                    interval=batch.interval,
+                    overflow=batch.overflow)
                 handler.setLevel(level)
                 logger.addHandler(handler)
                 self._setup_tornado(handler, level)
@@ -11,13 +11,18 @@ This module implements :class:`.CoreDaemon` which is the base class for
 """
 
 import datetime
+import threading
 import time
 
 import core4.queue.main
 import core4.util.node
-from core4.base.main import CoreBase
+from core4.base.main import CoreBase, identify
 from core4.service.introspect.main import CoreIntrospector
 
+#: milliseconds a change stream waits for changes before verifying the daemon
+#: still watches, see :meth:`.CoreDaemon.watch`
+WATCH_AWAIT = 1000
+
 
 class CoreDaemon(CoreBase):
     """
@@ -57,23 +62,29 @@ class CoreDaemon(CoreBase):
         self.queue = core4.queue.main.CoreQueue()
         self.jobs = {}
         self.wait_time = None
+        self.wakeup = threading.Event()
+        self.woken = False
+        self.watching = False
+        self.watcher = []
 
     def start(self):
         """
         executes the daemon's workflow from :meth:`.startup` to the main
-        processing :meth:`.loop` to :meth:`.shutdown`.
+        processing :meth:`.loop` to :meth:`.shutdown`. All objects created
+        by the daemon inherit the daemon's ``.identifier``.
         :return:
         """
-        try:
-            self.startup()
-            self.loop()
-        except KeyboardInterrupt:
-            raise SystemExit()
-        except:
-            raise
-        finally:
-            self.shutdown()
-            self.enter_phase("exit")
+        with identify(self.identifier):
+            try:
+                self.startup()
+                self.loop()
+            except KeyboardInterrupt:
+                raise SystemExit()
+            except:
+                raise
+            finally:
+                self.shutdown()
+                self.enter_phase("exit")
 
     def startup(self):
         """
@@ -136,9 +147,10 @@ class CoreDaemon(CoreBase):
 
     def shutdown(self):
         """
-        Shutdown the daemon by spawning the final housekeeping
-        method :meth:`cleanup`.
+        Shutdown the daemon by stopping all change streams and spawning the
+        final housekeeping method :meth:`cleanup`.
         """
+        self.unwatch()
         self.enter_phase("shutdown")
         self.cleanup()
 
@@ -208,8 +220,77 @@ class CoreDaemon(CoreBase):
                     self.heartbeat()
                     heartbeat = self.at + heartbeat_delta
                 self.run_step()
+            self.wait()
+
+    def wait(self):
+        """
+        Waits for the next cycle of the main :meth:`.loop`. If the daemon
+        watches collection changes (see :meth:`.watch`), the method blocks
+        until a change is signaled or the :meth:`.wait_timeout` expires.
+        Otherwise the daemon sleeps ``.wait_time`` seconds.
+        """
+        if self.watching:
+            if self.wakeup.wait(self.wait_timeout()):
+                self.wakeup.clear()
+                self.woken = True
+        else:
             time.sleep(self.wait_time)
 
+    def wait_timeout(self):
+        """
+        Returns the seconds to block in :meth:`.wait` if the daemon watches
+        collection changes. This method can be overwritten by the class
+        derived from :class:`.CoreDaemon`.
+
+        :return: seconds (float)
+        """
+        return self.wait_time
+
+    def watch(self, collection, pipeline=None):
+        """
+        Watches the passed collection with a MongoDB change stream in a
+        background thread. Each change matching the passed ``pipeline``
+        wakes up the main :meth:`.loop`, see :meth:`.wait`.
+
+        If the change stream fails, e.g. because MongoDB does not run as a
+        replica set, then the daemon falls back to polling.
+
+        :param collection: :class:`.CoreCollection` to watch
+        :param pipeline: change stream aggregation pipeline
+        """
+        self.watching = True
+        thread = threading.Thread(
+            target=self._watch, args=(collection, pipeline), daemon=True,
+            name="{}-watch-{}".format(self.identifier, collection.name))
+        thread.start()
+        self.watcher.append(thread)
+
+    def _watch(self, collection, pipeline):
+        # internal method running the change stream in a background thread
+        try:
+            with collection.watch(pipeline=pipeline,
+                                  max_await_time_ms=WATCH_AWAIT) as stream:
+                self.logger.info("watching [%s]", collection.name)
+                while self.watching:
+                    if stream.try_next() is not None:
+                        self.wakeup.set()
+        except Exception:
+            if self.watching:
+                self.logger.warning(
+                    "failed to watch [%s], falling back to polling",
+                    collection.name, exc_info=True)
+                self.watching = False
+                self.wakeup.set()
+
+    def unwatch(self):
+        """
+        Stops all change streams started with :meth:`.watch`.
+        """
+        self.watching = False
+        for thread in self.watcher:
+            thread.join()
+        self.watcher = []
+
     def heartbeat(self):
         """
         Set the daemon heartbeat to current daemon time.
@@ -0,0 +1,337 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+This module implements the job fork server used by :class:`.CoreWorker`.
+
+Instead of spawning a fresh Python interpreter for each job, the worker
+launches one long-lived fork server per project with the Python interpreter
+of the project's virtual environment. The fork server preloads core4, its
+heavy dependencies and the project package, and forks a child process for
+each job. The child then executes :meth:`.CoreWorkerProcess.start` just like
+the :data:`.EXECUTE` command does.
+
+The worker talks to the fork server through a Unix domain socket with one
+JSON line request and one JSON line response per connection. The socket is
+accessible by the owner only and the fork server serves requests from
+processes of the same user only. The fork server terminates if the worker
+which launched it is gone.
+
+The fork server verifies the modification time of all preloaded project
+modules and of the ``site-packages`` folders with each request. If the
+project has been deployed since the fork server started, the fork server
+terminates without fork and the worker launches the job with a fresh Python
+interpreter. The next job starts a new fork server.
+
+Enable the fork server with config setting ``worker.fork_server``.
+"""
+
+import hashlib
+import importlib
+import json
+import logging
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import traceback
+
+import core4.config.main
+import core4.util.node
+from core4.base.main import CoreBase
+from core4.service.introspect.command import FORKSERVER
+
+#: modules preloaded by the fork server
+PRELOAD = (
+    "pymongo",
+    "pandas",
+    "tornado.web",
+    "core4.queue.main",
+    "core4.queue.process",
+    "core4.api.v1.application",
+)
+#: seconds to wait for a new request before verifying the parent process
+POLL_INTERVAL = 1.
+#: seconds to wait for the request of a connected client
+REQUEST_TIMEOUT = 10.
+
+
+class CoreForkServer(CoreBase):
+    """
+    Manages the fork server of a project from the worker side.
+    """
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        self.proc = None
+        self.address = self._address()
+
+    def _address(self):
+        # internal method to build the unique socket path of the fork server
+        folder = self.config.get_folder("temp")
+        if not (folder and os.path.isdir(folder)):
+            folder = tempfile.gettempdir()
+        key = "/".join([core4.util.node.get_hostname(),
+                        str(core4.util.node.get_pid()), self.name])
+        return os.path.join(folder, "core4fork-{}.sock".format(
+            hashlib.md5(key.encode("utf-8")).hexdigest()[:16]))
+
+    def start(self):
+        """
+        Launches the fork server with the Python interpreter of the project's
+        virtual environment. The method does not wait for the fork server to
+        become available.
+        """
+        import core4.service.introspect.main
+        intro = core4.service.introspect.main.CoreIntrospector()
+        python_path = intro.get_python(self.name)
+        cmd = FORKSERVER.format(address=self.address, project=self.name)
+        self.proc = subprocess.Popen(
+            [python_path, "-c", cmd], stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, env=os.environ.copy())
+        self.logger.info("launched fork server [%s] with pid [%d] at [%s]",
+                         self.name, self.proc.pid, self.address)
+
+    def alive(self):
+        """
+        :return: ``True`` if the fork server process is running
+        """
+        return self.proc is not None and self.proc.poll() is None
+
+    def execute(self, job_id, worker=None, trial=None):
+        """
+        Requests the fork server to fork and execute the job with the passed
+        ``job_id``. The worker's current OS environment and working directory
+        are passed to the child process. If the preloaded project is
+        outdated the fork server is stopped.
+
+        :param job_id: str representing a :class:`bson.objectid.ObjectId`
+        :param worker: ``locked.worker`` identifier of the job claim
+        :param trial: job ``trial`` of the job claim
+        :return: pid of the forked job process
+        :raises: :class:`OSError` if the fork server is not available or
+                 outdated, i.e. no job process has been forked,
+                 :class:`RuntimeError` if the request failed after it has
+                 been sent
+        """
+        response = self._request({
+            "cmd": "execute",
+            "job_id": job_id,
+            "worker": worker,
+            "trial": trial,
+            "env": dict(os.environ),
+            "cwd": os.path.abspath(os.curdir)
+        })
+        if "outdated" in response:
+            self.logger.info("fork server [%s] outdated: %s", self.name,
+                             response["outdated"])
+            self.stop()
+            raise OSError("fork server [{}] outdated".format(self.name))
+        return response["pid"]
+
+    def ping(self):
+        """
+        :return: pid of the fork server if available
+        """
+        return self._request({"cmd": "ping"})["pid"]
+
+    def stop(self):
+        """
+        Stops the fork server. Running job processes are not affected.
+        """
+        try:
+            self._request({"cmd": "quit"})
+        except (OSError, RuntimeError):
+            if self.alive():
+                self.proc.terminate()
+        self.logger.info("stopped fork server [%s]", self.name)
+        self.proc = None
+
+    def _request(self, payload):
+        # internal method to send one request to the fork server
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.config.worker.fork_server_timeout)
+        try:
+            sock.connect(self.address)
+            try:
+                sock.sendall(_encode(payload))
+                response = _decode(sock)
+            except Exception as exc:
+                raise RuntimeError(
+                    "fork server [{}] failed with [{}]: {}".format(
+                        self.name, payload["cmd"], exc))
+        finally:
+            sock.close()
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+
+def _encode(payload):
+    # internal helper to encode a JSON line
+    return (json.dumps(payload) + "\n").encode("utf-8")
+
+
+def _decode(sock):
+    # internal helper to read and decode a JSON line
+    body = b""
+    while not body.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("connection closed")
+        body += chunk
+    return json.loads(body.decode("utf-8"))
+
+
+def _mtime(path):
+    # internal helper to get the modification time of a file or folder
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def signature(project):
+    """
+    :param project: name of the project package
+    :return: dict of file and folder names with their modification time of
+             all loaded project modules and the ``site-packages`` folders
+    """
+    stamp = {}
+    for name, module in list(sys.modules.items()):
+        if name == project or name.startswith(project + "."):
+            filename = getattr(module, "__file__", None)
+            if filename:
+                stamp[filename] = _mtime(filename)
+    for path in sys.path:
+        if os.path.basename(path) in ("site-packages", "dist-packages"):
+            stamp[path] = _mtime(path)
+    return stamp
+
+
+def _trusted(conn):
+    # internal helper to verify the client runs as the same user
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                            struct.calcsize("3i"))
+    (_, uid, _) = struct.unpack("3i", creds)
+    return uid == os.getuid()
+
+
+def preload(project):
+    """
+    Imports the modules in :data:`PRELOAD` and the passed project package,
+    and caches the core4 configuration files.
+
+    :param project: name of the project package
+    :return: :func:`signature` of the preloaded project
+    """
+    for name in PRELOAD + (project,):
+        try:
+            importlib.import_module(name)
+        except Exception:
+            traceback.print_exc()
+    config = core4.config.main.CoreConfig()
+    for filename in (config.standard_config, config.env_config,
+                     config.user_config, config.system_config):
+        if filename and os.path.exists(filename):
+            config._read_yaml(filename)
+    return signature(project)
+
+
+def serve(address, project):
+    """
+    Main loop of the fork server. The loop ends with a ``quit`` request or if
+    the parent process (the worker) is gone.
+
+    :param address: Unix domain socket path
+    :param project: name of the project package to preload
+    """
+    stamp = preload(project)
+    # job processes are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    parent = os.getppid()
+    if os.path.exists(address):
+        os.unlink(address)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(address)
+    finally:
+        os.umask(umask)
+    os.chmod(address, 0o600)
+    server.listen(16)
+    server.settimeout(POLL_INTERVAL)
+    try:
+        while os.getppid() == parent:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            if not _trusted(conn):
+                conn.close()
+                continue
+            conn.settimeout(REQUEST_TIMEOUT)
+            try:
+                request = _decode(conn)
+                cmd = request.get("cmd")
+                if cmd == "execute" and signature(project) != stamp:
+                    conn.sendall(_encode(
+                        {"outdated": "project [{}] changed".format(project)}))
+                    break
+                elif cmd == "execute":
+                    pid = os.fork()
+                    if pid == 0:
+                        server.close()
+                        conn.close()
+                        _run_child(request)
+                    conn.sendall(_encode({"pid": pid}))
+                elif cmd in ("ping", "quit"):
+                    conn.sendall(_encode({"pid": os.getpid()}))
+                    if cmd == "quit":
+                        break
+                else:
+                    conn.sendall(_encode(
+                        {"error": "unknown command [{}]".format(cmd)}))
+            except Exception:
+                traceback.print_exc()
+            finally:
+                conn.close()
+    finally:
+        server.close()
+        if os.path.exists(address):
+            os.unlink(address)
+
+
+def _run_child(request):
+    # internal method executed in the forked child, never returns
+    code = 0
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.chdir(request["cwd"])
+        from core4.queue.process import CoreWorkerProcess
+        CoreWorkerProcess().start(
+            request["job_id"], worker=request.get("worker"),
+            trial=request.get("trial"))
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            # os._exit skips atexit, write buffered log records
+            logging.shutdown()
+            sys.stdout.flush()
+        except Exception:
+            pass
+        os._exit(code)
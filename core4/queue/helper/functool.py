@@ -7,9 +7,12 @@
 
 """
 The :mod:`functool <core4.queue.helper.functool` module implements the helper
-functions :func:`enqueue` and :func:`execute`.
+functions :func:`enqueue`, :func:`enqueue_async` and :func:`execute`.
 """
 
+import asyncio
+import functools
+
 import core4.logger
 import core4.queue.main
 import core4.queue.worker
@@ -60,6 +63,29 @@ def enqueue(job, **kwargs):
     return queue.enqueue(name=name, **kwargs)._id
 
 
+async def enqueue_async(job, **kwargs):
+    """
+    Asynchronous version of :func:`enqueue` for use on the Tornado IOLoop.
+    If ``config.folder.home`` is defined, the job is enqueued with
+    :func:`enqueue` in the Python virtual environment of the project from an
+    executor thread. Else the job is enqueued with :class:`.AsyncCoreQueue`.
+
+    :param job: qual_name or job class
+    :param kwargs: arguments to be passed to the job
+
+    :return: _id of the enqueued job
+    """
+    queue = core4.queue.main.AsyncCoreQueue()
+    if queue.config.folder.home:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(enqueue, job, **kwargs))
+    if isinstance(job, str):
+        job = await queue.enqueue(name=job, **kwargs)
+    else:
+        job = await queue.enqueue(job, **kwargs)
+    return job._id
+
+
 class DirectWorker(core4.queue.worker.CoreWorker):
 
     def handle_signal(self):
@@ -10,8 +10,6 @@ This module delivers the :class:`.MailerJob` to send emails using the local
 MTA.
 """
 
-import tornado.template
-
 from core4.queue.helper.job.example import DummyJob
 from core4.queue.job import CoreJob
 
@@ -26,6 +24,7 @@ class MailerJob(CoreJob):
     author = 'mra'
 
     def execute(self, template, recipients, subject, *args, **kwargs):
+        import tornado.template
         msg = []
         if not isinstance(recipients, list):
             recipients = [recipients]
@@ -8,9 +8,11 @@
 """
 This module delivers the :class:`.CoreJob`.
 """
+import copy
 import hashlib
 import json
 import os
+import weakref
 from pprint import pformat
 import datetime as dt
 
@@ -122,6 +124,28 @@ NOT_INHERITED = {
 }
 
 
+def args_hash(args):
+    """
+    Returns the hash of the passed job arguments. Together with the job's
+    qualified name the hash identifies the job in ``sys.queue``.
+
+    :param args: dict of job arguments
+    :return: MD5 hex digest, ``None`` if no job arguments are passed
+    """
+    if args:
+        js = pformat(args)
+        return hashlib.md5(js.encode("utf-8")).hexdigest()
+    return None
+
+
+def _copy_default(default):
+    # copy mutable job defaults, e.g. chain, dependency and tag, to not share
+    # them between job instances
+    return dict(
+        (k, copy.deepcopy(v) if isinstance(v, (list, dict)) else v)
+        for k, v in default.items())
+
+
 class CoreJob(CoreBase, core4.logger.mixin.CoreExceptionLoggerMixin):
     """
     This is the base class of all core jobs. Core jobs implement the actual
@@ -334,7 +358,11 @@ class CoreJob(CoreBase, core4.logger.mixin.CoreExceptionLoggerMixin):
     manual = False
 
     _frozen_ = False
+    _heartbeat = None
     upwind = ["log_level"] + list(CONFIG_ARGS)
+    #: per process registry of class-level job defaults and connection tags
+    #: by job class, see :meth:`._load_class_default`
+    _registry = weakref.WeakKeyDictionary()
 
     def __init__(self, *args, **kwargs):
         # attributes raised from self.class_config.* to self.*
@@ -373,14 +401,10 @@ class CoreJob(CoreBase, core4.logger.mixin.CoreExceptionLoggerMixin):
             "value": None,
             "message": None
         }
-        self.load_default()
-        self.overload_property()
-        self.overload_config()
+        self._load_class_default()
         self.overload_args(**kwargs)
 
-        if self.args:
-            js = pformat(self.args)
-            self._hash = hashlib.md5(js.encode("utf-8")).hexdigest()
+        self._hash = args_hash(self.args)
         self.identifier = self._id
         self._frozen_ = True
 
@@ -389,23 +413,51 @@ class CoreJob(CoreBase, core4.logger.mixin.CoreExceptionLoggerMixin):
         # and to attach the special data access object CoreJobCollection
         # via special tag handler JobConnectTag
         super()._open_config()
-
-        def traverse(config, t):
-            for k, v in config.items():
-                if k != "sys":
-                    if isinstance(v, dict):
-                        t[k] = {}
-                        traverse(v, t[k])
-                    elif isinstance(v, core4.config.tag.ConnectTag):
-                        t[k] = core4.config.tag.JobConnectTag(v.conn_str, self)
-                        t[k].set_config(self.config[self.project])
-                        self._connect_tags.append(t[k])
-
-        target = {}
-        traverse(self.config, target)
-        config = core4.util.tool.dict_merge(self.config._config, target)
+        base = self.config._config
+        shared = self.config._config_base
+        entry = self._registry.get(self.__class__)
+        if entry is None or entry["config"] is not shared:
+            # the compiled configuration changed, e.g. with a new snapshot
+            entry = {
+                "config": shared,
+                "tags": self._find_tags(shared),
+                "default": None,
+                "valid": False
+            }
+            self._registry[self.__class__] = entry
+        self._class_default = entry
+
+        def bind(tags):
+            target = {}
+            for k, v in tags.items():
+                if isinstance(v, dict):
+                    target[k] = bind(v)
+                else:
+                    target[k] = core4.config.tag.JobConnectTag(
+                        v.conn_str, self)
+                    target[k].set_config(self.config[self.project])
+                    self._connect_tags.append(target[k])
+            return target
+
+        config = core4.util.tool.dict_merge(base, bind(entry["tags"]))
         self.config._config_cache = core4.config.map.ConfigMap(config)
 
+    @staticmethod
+    def _find_tags(config):
+        # internal method to extract the connection tags outside of sys.*
+        # from the compiled configuration, branches without connection tags
+        # are skipped
+        tags = {}
+        for k, v in config.items():
+            if k != "sys":
+                if isinstance(v, dict):
+                    sub = CoreJob._find_tags(v)
+                    if sub:
+                        tags[k] = sub
+                elif isinstance(v, core4.config.tag.ConnectTag):
+                    tags[k] = v
+        return tags
+
     def set_source(self, filename):
         """
         Set current job source to the passed filename. Note that only the
@@ -457,20 +509,53 @@ class CoreJob(CoreBase, core4.logger.mixin.CoreExceptionLoggerMixin):
                         key))
         super().__setattr__(key, value)
 
-    def validate(self):
+    def validate(self, keys=None):
         """
         check all standard job-attributes to be of their intended type.
 
+        If ``keys`` is passed, only these job-attributes are checked. The
+        class-level defaults are then checked once per job class and
+        configuration, see :meth:`._load_class_default`.
+
+        :param keys: list of job-attributes which deviate from the class-level
+                     defaults, ``None`` checks all job-attributes
         :raises: ``AssertionError`` if no author is set or asserts if attribute
                  is not of its intended type.
         """
-        for prop, check in JOB_VALIDATION.items():
-            check(prop, getattr(self, prop))
+        if keys is None:
+            for prop, check in JOB_VALIDATION.items():
+                check(prop, getattr(self, prop))
+        else:
+            entry = self._class_default
+            if not entry["valid"]:
+                for prop, check in JOB_VALIDATION.items():
+                    if prop not in keys:
+                        check(prop, entry["default"].get(prop))
+                # defaults overwritten by keys have not been checked
+                entry["valid"] = not any(
+                    [prop in JOB_VALIDATION for prop in keys])
+            for prop in keys:
+                if prop in JOB_VALIDATION:
+                    JOB_VALIDATION[prop](prop, getattr(self, prop))
         # special handling of author property
         if "author" not in self.__class__.__dict__:
             raise AssertionError("missing author in [{}]".format(
                 self.qual_name()))
 
+    def _load_class_default(self):
+        # internal method to set the class-level job-attributes from
+        # .load_default, .overload_property and .overload_config; the result
+        # is computed once per job class and configuration
+        entry = self._class_default
+        if entry["default"] is None:
+            self.load_default()
+            self.overload_property()
+            self.overload_config()
+            entry["default"] = _copy_default(
+                dict([(k, getattr(self, k)) for k in DEFAULT_ARGS]))
+        else:
+            self.__dict__.update(_copy_default(entry["default"]))
+
     def load_default(self):
         """
         sets the default class-attributes given in the job-section of the
@@ -524,11 +609,15 @@ class CoreJob(CoreBase, core4.logger.mixin.CoreExceptionLoggerMixin):
 
     def progress(self, p, *args, force=False):
         """
-        indicates the progress of a job. This method is called on the set
-        intervall.
-
-        This method updates the job's heartbeat and logs the progress with
-        a debug messages. If a job does not report progress within a specified
+        indicates the progress of a job. The progress is logged with a debug
+        message once per ``progress_interval``.
+
+        Jobs executed by :class:`.CoreWorkerProcess` hand over the latest
+        progress to the :class:`.JobHeartbeat` thread without waiting for
+        MongoDB. The heartbeat thread updates the job's heartbeat and
+        progress in ``sys.queue`` once per ``progress_interval``. Without
+        heartbeat thread this method updates the job's heartbeat and progress
+        itself. If a job does not update its heartbeat within a specified
         timeframe, it turns into a zombie.
 
         :param p: percentage in decimal.
@@ -537,12 +626,17 @@ class CoreJob(CoreBase, core4.logger.mixin.CoreExceptionLoggerMixin):
         :param force: force progress update, ignoring ``._progress``
         """
         now = core4.util.node.now()
-
+        if self._heartbeat is not None:
+            self._heartbeat.progress(p, *args)
         if (force or self._progress is None or now > self._progress):
             message = self.format_args(*args)
             self.__dict__['_progress'] = now + dt.timedelta(
                 seconds=self.progress_interval)
             self.logger.debug("progress [%1.0f%%] - " + message, p * 100.)
+            if self._heartbeat is not None:
+                if force:
+                    self._heartbeat.wake()
+                return
             ret = self.config.sys.queue.update_one(
                 {
                     "_id": self._id,
@@ -583,17 +677,22 @@ class CoreJob(CoreBase, core4.logger.mixin.CoreExceptionLoggerMixin):
     def deserialise(cls, **kwargs):
         """
         This class method converts the passed ``kwargs`` keys-/values into
-        a job object and :meth:`.validate` and return the object.
+        a job object and :meth:`.validate` and return the object. Only the
+        keys-/values which deviate from the class-level defaults are
+        validated.
 
         :param kwargs: keys-/values
         :return: :class:`.CoreJob`
         """
         obj = cls()
+        delta = []
         for k in kwargs:
             if hasattr(obj, k):
+                if getattr(obj, k) != kwargs[k]:
+                    delta.append(k)
                 obj.__dict__[k] = kwargs[k]
         obj.identifier = obj._id
-        obj.validate()
+        obj.validate(delta)
         return obj
 
     def execute(self, **kwargs):
@@ -10,7 +10,10 @@ This module implements general methods of the core4 worker queue used for
 example by :mod:`core4.queue.worker` and :mod:`core4.queue.process`.
 """
 
+import asyncio
+import copy
 import importlib
+import os
 import sys
 import traceback
 from datetime import timedelta
@@ -32,14 +35,269 @@ from core4.queue.job import STATE_PENDING
 from core4.queue.query import QueryMixin
 from core4.service.introspect.command import RESTART, KILL
 
+#: MongoDB error code of duplicate key errors
+DUPLICATE_KEY = 11000
+
 STATE_WAITING = (core4.queue.job.STATE_DEFERRED,
                  core4.queue.job.STATE_FAILED)
 STATE_STOPPED = (core4.queue.job.STATE_KILLED,
                  core4.queue.job.STATE_INACTIVE,
                  core4.queue.job.STATE_ERROR)
+#: job states counted in ``sys.count``, see :meth:`.CoreQueue.count_state`
+STATE_COUNTED = (STATE_PENDING,
+                 core4.queue.job.STATE_RUNNING) + STATE_WAITING + STATE_STOPPED
+
+
+def _mtime(filename):
+    # internal method to retrieve the modification time of a job module
+    if filename is None:
+        return None
+    try:
+        return os.stat(filename).st_mtime_ns
+    except OSError:
+        return None
+
+
+class JobFactoryMixin:
+    """
+    Creates, validates and serialises job objects for :class:`.CoreQueue` and
+    :class:`.AsyncCoreQueue`. None of the methods access the database.
+    """
+
+    #: per process registry of imported job modules with their source file
+    #: modification time, see :meth:`.job_class`
+    _job_module = {}
+
+    def _enqueued(self, by):
+        # internal method used to create the .enqueued job attribute
+        enqueued_from = {
+            "at": lambda: core4.util.node.mongo_now(),
+            "hostname": lambda: core4.util.node.get_hostname(),
+            "parent_id": lambda: None,
+            "username": lambda: core4.util.node.get_username()
+        }
+        if by is None:
+            by = {}
+        enqueued = {}
+        for k in ("at", "hostname", "parent_id", "username"):
+            enqueued[k] = by.get(k, enqueued_from[k]())
+        return enqueued
+
+    def _prepare_job(self, job, enqueued):
+        # internal method to set the job attributes of a new job, returns the
+        # sys.queue document
+        job.__dict__["attempts_left"] = getattr(job, "attempts")
+        job.__dict__["state"] = STATE_PENDING
+        job.__dict__["enqueued"] = enqueued
+        return job.serialise()
+
+    def build_jobs(self, job, args, by=None):
+        """
+        Builds the ``sys.queue`` documents of the passed job class or
+        qualified name for each dict of job arguments in ``args``.
+
+        The job class is resolved, instantiated and validated once. Only
+        items which overwrite job properties (see
+        :data:`core4.queue.job.ENQUEUE_ARGS`) are instantiated and validated
+        separately.
+
+        :param job: job class or qualified job name
+        :param args: list of dict with job arguments and job properties
+        :param by: dict with ``enqueued`` information, see :meth:`.enqueue`
+        :return: list of ``sys.queue`` documents with ``_id``
+        """
+        template = self.job_factory(job)
+        enqueued = self._enqueued(by)
+        base = None
+        docs = []
+        for kwargs in args:
+            if any([k in core4.queue.job.ENQUEUE_ARGS for k in kwargs]):
+                obj = self.job_factory(template.__class__, **kwargs)
+                doc = self._prepare_job(obj, enqueued)
+            else:
+                if base is None:
+                    base = self._prepare_job(template, enqueued)
+                doc = copy.deepcopy(base)
+                doc["args"] = kwargs
+                doc["_hash"] = core4.queue.job.args_hash(kwargs)
+            doc["_id"] = ObjectId()
+            docs.append(doc)
+        return docs
+
+    def _import_job_module(self, package):
+        # internal method to import the job module from the process registry,
+        # the module is reloaded if its source file has been modified
+        cached = self._job_module.get(package)
+        if cached is not None:
+            (module, mtime) = cached
+            if _mtime(getattr(module, "__file__", None)) == mtime:
+                return module
+            module = importlib.reload(module)
+        else:
+            module = importlib.import_module(package)
+        self._job_module[package] = (
+            module, _mtime(getattr(module, "__file__", None)))
+        return module
+
+    def job_class(self, job):
+        """
+        Takes the fully qualified job name, identifies and imports the job
+        class and returns the job class.
+
+        Imported job modules are kept in a per process registry and are
+        reloaded if the source file has been modified since.
+
+        :param job: fully qualified name of the job or job class
+        :return: job class
+        """
+        if isinstance(job, str):
+            parts = job.split(".")
+            package = ".".join(parts[:-1])
+            if not package:
+                raise core4.error.CoreJobNotFound(
+                    "[{}] not found".format(job))
+            class_name = parts[-1]
+            module = self._import_job_module(package)
+            cls = getattr(module, class_name, None)
+            if cls is None:
+                raise core4.error.CoreJobNotFound(
+                    "[{}] not found".format(job))
+        else:
+            cls = job
+        if not isinstance(cls, type):
+            raise TypeError(
+                "{} not a class".format(repr(job)))
+        if CoreAbstractJobMixin in cls.__bases__:
+            raise TypeError(
+                "{} is an abstract job class".format(repr(job))
+            )
+        if not issubclass(cls, core4.queue.job.CoreJob):
+            raise TypeError(
+                "{} not a subclass of CoreJob".format(repr(job)))
+        return cls
+
+    def job_factory(self, job, **kwargs):
+        """
+        Takes the fully qualified job name, identifies and imports the job
+        class and returns the validated job object, see :meth:`.job_class`.
+        The class-level job defaults are validated once per job class, the
+        passed job properties with each call.
+
+        :param job: fully qualified name of the job or job class
+        :param kwargs: job arguments and job properties
+        :return: :class:`.CoreJob` object
+        """
+        obj = self.job_class(job)(**kwargs)
+        obj.validate(
+            [k for k in kwargs if k in core4.queue.job.ENQUEUE_ARGS])
+        return obj
+
+
+class QueueRequestMixin:
+    """
+    Builds the MongoDB filters, updates and bulk requests shared by
+    :class:`.CoreQueue` and :class:`.AsyncCoreQueue`. None of the methods
+    access the database.
+    """
+
+    @staticmethod
+    def _job_exists(job):
+        # internal method to create the error of an existing job
+        return core4.error.CoreJobExists(
+            "job [{}] exists with args {}".format(job.qual_name(), job.args))
+
+    def _enqueued_job(self, job, _id):
+        # internal method to set the _id of the enqueued job
+        job.__dict__["_id"] = _id
+        job.__dict__["identifier"] = _id
+        self.logger.info(
+            'successfully enqueued [%s] with [%s]', job.qual_name(), job._id)
+
+    def _enqueued_many(self, docs, exc=None):
+        # internal method to collect the _id of the inserted job documents in
+        # the order of docs, duplicate jobs are reported as None
+        duplicate = set()
+        if exc is not None:
+            for e in exc.details["writeErrors"]:
+                if e["code"] != DUPLICATE_KEY:
+                    raise exc
+                duplicate.add(e["index"])
+        ret = [None if i in duplicate else doc["_id"]
+               for (i, doc) in enumerate(docs)]
+        self.logger.info(
+            'successfully enqueued [%d] of [%d] [%s], [%d] exist',
+            len(docs) - len(duplicate), len(docs), docs[0]["name"],
+            len(duplicate))
+        return ret
+
+    @staticmethod
+    def _remove_request(_id):
+        # internal method to create the timestamp, filter and update to flag
+        # the job to be removed
+        at = core4.util.node.now()
+        return (at, {"_id": _id, "removed_at": None},
+                {"$set": {"removed_at": at}})
 
+    @staticmethod
+    def _kill_request(_id):
+        # internal method to create the timestamp, filter and update to flag
+        # the job to be killed
+        at = core4.util.node.now()
+        return (at,
+                {
+                    "_id": _id,
+                    "killed_at": None,
+                    "state": core4.queue.job.STATE_RUNNING
+                },
+                {"$set": {"killed_at": at}})
+
+    @staticmethod
+    def _restart_waiting_request(_id):
+        # internal method to create the filter and update to reset .query_at
+        return ({"_id": _id, "state": {"$in": STATE_WAITING}},
+                {"$set": {"query_at": None}})
+
+    @staticmethod
+    def _restart_args(job):
+        # internal method to create the enqueued information and job
+        # properties of the job which restarts the passed stopped job
+        enqueue = job.enqueued.copy()
+        enqueue["parent_id"] = job._id
+        enqueue["at"] = core4.util.node.mongo_now()
+        doc = dict([(k, v) for k, v in job.serialise().items() if
+                    k in core4.queue.job.ENQUEUE_ARGS])
+        return enqueue, doc
+
+    def _job_from_doc(self, _id, doc):
+        # internal method used by ._find_job
+        if doc is None:
+            raise core4.error.CoreJobNotFound(
+                "job [{}] not found".format(_id))
+        return self.job_class(doc["name"]).deserialise(**doc)
 
-class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
+    def _released(self, _id, ret):
+        # internal method to log the result of the job release
+        if ret.raw_result["n"] == 1:
+            self.logger.debug('successfully released [%s]', _id)
+            return True
+        self.logger.error('failed to release [%s]', _id)
+        return False
+
+    @staticmethod
+    def _count_requests(old=None, new=None, n=1):
+        # internal method to create the sys.count bulk requests of a job
+        # state transition
+        inc = {}
+        for state, sign in ((old, -1), (new, 1)):
+            if state in STATE_COUNTED:
+                inc[state] = inc.get(state, 0) + sign * n
+        return [
+            pymongo.UpdateOne({"_id": state}, {"$inc": {"n": n}}, upsert=True)
+            for state, n in inc.items() if n != 0]
+
+
+class CoreQueue(CoreBase, QueryMixin, JobFactoryMixin, QueueRequestMixin,
+                metaclass=core4.util.tool.Singleton):
     """
     Use this class for general queue management, for example::
 
@@ -78,72 +336,47 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
         """
         core4.service.setup.CoreSetup().make_queue()
         job = self.job_factory(name or cls, **kwargs)
-        # update job properties
-        job.__dict__["attempts_left"] = getattr(job, "attempts")
-        job.__dict__["state"] = STATE_PENDING
-        enqueued_from = {
-            "at": lambda: core4.util.node.mongo_now(),
-            "hostname": lambda: core4.util.node.get_hostname(),
-            "parent_id": lambda: None,
-            "username": lambda: core4.util.node.get_username()
-        }
-        if by is None:
-            by = {}
-        job.__dict__["enqueued"] = {}
-        for k in ("at", "hostname", "parent_id", "username"):
-            job.__dict__["enqueued"][k] = by.get(k, enqueued_from[k]())
-        # save
-        doc = job.serialise()
+        doc = self._prepare_job(job, self._enqueued(by))
         try:
             ret = self.config.sys.queue.insert_one(doc)
         except pymongo.errors.DuplicateKeyError:
-            raise core4.error.CoreJobExists(
-                "job [{}] exists with args {}".format(
-                    job.qual_name(), job.args))
+            raise self._job_exists(job)
         except:
             raise
-        job.__dict__["_id"] = ret.inserted_id
-        job.__dict__["identifier"] = ret.inserted_id
-        self.logger.info(
-            'successfully enqueued [%s] with [%s]', job.qual_name(), job._id)
+        self._enqueued_job(job, ret.inserted_id)
+        self.count_state(new=STATE_PENDING)
         self.make_stat('enqueue_job', str(job._id))
         return job
 
-    def job_factory(self, job, **kwargs):
+    def enqueue_many(self, cls=None, name=None, args=None, by=None):
         """
-        Takes the fully qualified job name, identifies and imports the job
-        class and returns the job class.
-
-        :param job_name: fully qualified name of the job
-        :return: job class
+        Enqueues one job of the passed class or qualified name for each dict
+        of job arguments in ``args``. The jobs are inserted with one unordered
+        ``insert_many`` into collection ``sys.queue``, see
+        :meth:`.build_jobs`. One ``enqueue_job`` event is triggered for all
+        enqueued jobs.
+
+        :param cls: job class
+        :param name: qualified job name
+        :param args: list of dict with job arguments and job properties
+        :param by: dict with ``enqueued`` information, see :meth:`.enqueue`
+        :return: list of job ``_id`` in the order of ``args``. Jobs which
+                 exist with the same arguments are reported as ``None``.
         """
-        if isinstance(job, str):
-            parts = job.split(".")
-            package = ".".join(parts[:-1])
-            if not package:
-                raise core4.error.CoreJobNotFound(
-                    "[{}] not found".format(job))
-            class_name = parts[-1]
-            module = importlib.import_module(package)
-            cls = getattr(module, class_name, None)
-            if cls is None:
-                raise core4.error.CoreJobNotFound(
-                    "[{}] not found".format(job))
-        else:
-            cls = job
-        if not isinstance(cls, type):
-            raise TypeError(
-                "{} not a class".format(repr(job)))
-        if CoreAbstractJobMixin in cls.__bases__:
-            raise TypeError(
-                "{} is an abstract job class".format(repr(job))
-            )
-        obj = cls(**kwargs)
-        if not isinstance(obj, core4.queue.job.CoreJob):
-            raise TypeError(
-                "{} not a subclass of CoreJob".format(repr(job)))
-        obj.validate()
-        return obj
+        core4.service.setup.CoreSetup().make_queue()
+        docs = self.build_jobs(name or cls, args or [], by)
+        if not docs:
+            return []
+        try:
+            self.config.sys.queue.insert_many(docs, ordered=False)
+            ret = self._enqueued_many(docs)
+        except pymongo.errors.BulkWriteError as exc:
+            ret = self._enqueued_many(docs, exc)
+        inserted = [str(_id) for _id in ret if _id is not None]
+        if inserted:
+            self.count_state(new=STATE_PENDING, n=len(inserted))
+            self.make_stat('enqueue_job', inserted)
+        return ret
 
     def enter_maintenance(self, project=None):
         """
@@ -265,18 +498,8 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
         :param _id: :class:`bson.object.ObjectId`
         :return: ``True`` if the request succeeded, else ``False``
         """
-        at = core4.util.node.now()
-        ret = self.config.sys.queue.update_one(
-            {
-                "_id": _id,
-                "removed_at": None
-            },
-            update={
-                "$set": {
-                    "removed_at": at
-                }
-            }
-        )
+        (at, filter, update) = self._remove_request(_id)
+        ret = self.config.sys.queue.update_one(filter, update=update)
         if ret.raw_result["n"] == 1:
             self.logger.warning(
                 "flagged job [%s] to be remove at [%s]", _id, at)
@@ -300,6 +523,7 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
         doc = self.config.sys.queue.find_one({"_id": _id})
         ret = self.config.sys.queue.delete_one({"_id": _id})
         if ret.raw_result["n"] == 1:
+            self.count_state(old=doc["state"])
             self.journal(doc)
             self.logger.warning(
                 "hard removed and journaled job [%s]", _id)
@@ -352,19 +576,8 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
 
     def _restart_waiting(self, _id):
         # internal method used by .restart_job to reset .query_at
-        ret = self.config.sys.queue.update_one(
-            {
-                "_id": _id,
-                "state": {
-                    "$in": STATE_WAITING
-                }
-            },
-            update={
-                "$set": {
-                    "query_at": None
-                }
-            }
-        )
+        (filter, update) = self._restart_waiting_request(_id)
+        ret = self.config.sys.queue.update_one(filter, update=update)
         return ret.modified_count == 1
 
     def _exec_restart(self, _id):
@@ -379,11 +592,8 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
             if self.lock_job('__user__', _id):
                 ret = self.config.sys.queue.delete_one({"_id": _id})
                 if ret.raw_result["n"] == 1:
-                    enqueue = job.enqueued.copy()
-                    enqueue["parent_id"] = job._id
-                    enqueue["at"] = core4.util.node.mongo_now()
-                    doc = dict([(k, v) for k, v in job.serialise().items() if
-                                k in core4.queue.job.ENQUEUE_ARGS])
+                    self.count_state(old=job.state)
+                    (enqueue, doc) = self._restart_args(job)
                     new_job = self.enqueue(name=job.qual_name(), by=enqueue,
                                            **doc)
                     job.enqueued["child_id"] = new_job._id
@@ -402,19 +612,8 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
         :param _id: :class:`bson.object.ObjectId`
         :return: ``True`` if the request succeeded, else ``False``
         """
-        at = core4.util.node.now()
-        ret = self.config.sys.queue.update_one(
-            {
-                "_id": _id,
-                "killed_at": None,
-                "state": core4.queue.job.STATE_RUNNING
-            },
-            update={
-                "$set": {
-                    "killed_at": at
-                }
-            }
-        )
+        (at, filter, update) = self._kill_request(_id)
+        ret = self.config.sys.queue.update_one(filter, update=update)
         self.make_stat('request_kill_job', str(_id))
         if ret.raw_result["n"] == 1:
             self.logger.warning(
@@ -440,6 +639,35 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
         except:
             raise
 
+    def lock_many(self, identifier, _id):
+        """
+        Reserve multiple jobs for exclusive processing with one
+        ``insert_many`` into collection ``sys.lock``. See :meth:`.lock_job`.
+
+        Jobs already reserved by the same ``identifier`` are considered
+        reserved, too. This allows to retry an interrupted batch.
+
+        :param identifier: to assign to the reservation
+        :param _id: list of job ``_id``
+        :return: set of reserved job ``_id``
+        """
+        if not _id:
+            return set()
+        try:
+            self.config.sys.lock.insert_many(
+                [{"_id": i, "owner": identifier} for i in _id], ordered=False)
+            return set(_id)
+        except pymongo.errors.BulkWriteError as exc:
+            failed = set([_id[e["index"]] for e in exc.details["writeErrors"]
+                          if e["code"] != DUPLICATE_KEY])
+            if failed:
+                raise
+            duplicate = [_id[e["index"]] for e in exc.details["writeErrors"]]
+        owned = set([doc["_id"] for doc in self.config.sys.lock.find(
+            {"_id": {"$in": duplicate}, "owner": identifier},
+            projection=["_id"])])
+        return set(_id) - set(duplicate) | owned
+
     def unlock_job(self, _id):
         """
         Release/unlock the job from ``sys.lock``.
@@ -449,11 +677,7 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
                  ``False``
         """
         ret = self.config.sys.lock.delete_one({"_id": _id})
-        if ret.raw_result["n"] == 1:
-            self.logger.debug('successfully released [%s]', _id)
-            return True
-        self.logger.error('failed to release [%s]', _id)
-        return False
+        return self._released(_id, ret)
 
     def journal(self, doc):
         """
@@ -471,14 +695,33 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
             raise
         return False
 
+    def journal_many(self, docs):
+        """
+        Insert the passed MongoDB documents into collection ``sys.journal``
+        with one ``insert_many``. Documents which already exist in
+        ``sys.journal`` are considered journaled. This allows to retry an
+        interrupted batch.
+
+        :param docs: list of dict (MongoDB documents)
+        :return: set of journaled ``_id``
+        """
+        if not docs:
+            return set()
+        _id = [doc["_id"] for doc in docs]
+        try:
+            self.config.sys.journal.insert_many(docs, ordered=False)
+        except pymongo.errors.BulkWriteError as exc:
+            failed = [e for e in exc.details["writeErrors"]
+                      if e["code"] != DUPLICATE_KEY]
+            for e in failed:
+                self.logger.error("failed to journal job [%s]: %s",
+                                  _id[e["index"]], e["errmsg"])
+            return set(_id) - set([_id[e["index"]] for e in failed])
+        return set(_id)
+
     def _find_job(self, _id, collection):
         # internal method used by .load_job and .find_job
-        doc = collection.find_one({"_id": _id})
-        if doc is None:
-            raise core4.error.CoreJobNotFound(
-                "job [{}] not found".format(_id))
-        job = self.job_factory(doc["name"]).deserialise(**doc)
-        return job
+        return self._job_from_doc(_id, collection.find_one({"_id": _id}))
 
     def load_job(self, _id):
         """
@@ -525,13 +768,15 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
         upd = dict([(k, getattr(job, k)) for k in args])
         if kwargs is not None:
             upd = {**upd, **kwargs}
-        ret = self.config.sys.queue.update_one(
+        doc = self.config.sys.queue.find_one_and_update(
             filter={"_id": job._id},
-            update={"$set": upd})
-        if ret.raw_result["n"] != 1:
+            update={"$set": upd},
+            projection=["state"])
+        if doc is None:
             raise RuntimeError(
                 "failed to update job [{}] state [%s]".format(
                     job._id, job.state))
+        self.count_state(doc["state"], upd.get("state", doc["state"]))
 
     def _add_exception(self, job):
         # internal method used to add exception information to .last_error
@@ -695,10 +940,71 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
         job.logger.error("done execution with [%s] after [%d] sec.",
                          job.state, runtime)
 
+    def count_state(self, old=None, new=None, n=1):
+        """
+        Maintains the job state counters in collection ``sys.count`` with
+        each job state transition. The counters are read by
+        :meth:`.get_queue_count`. Jobs in state ``complete`` are not counted.
+
+        :param old: previous job state, ``None`` for new jobs
+        :param new: next job state, ``None`` for removed jobs
+        :param n: number of jobs with this state transition, defaults to 1
+        """
+        requests = self._count_requests(old, new, n)
+        if requests:
+            self.config.sys.count.bulk_write(requests, ordered=False)
+
+    def reconcile_count(self):
+        """
+        Reconciles the job state counters in ``sys.count`` with the
+        aggregated job states of ``sys.queue``, see
+        :meth:`.aggregate_queue_count`. This method is called periodically by
+        :class:`.CoreWorker` to settle counter drift, e.g. from job processes
+        which terminated between a job state update and its counter update.
+
+        The counters are read before and after the aggregation. A counter
+        is only corrected if it did not change meanwhile, and the correction
+        is a compare-and-set against the value read. Counters of concurrent
+        job state changes are settled with the next run. This also applies
+        to a state change whose queue update precedes the aggregation and
+        whose counter update follows the correction.
+
+        :return: dict with job state and number of jobs in this state
+        """
+        before = self._read_count()
+        count = self.aggregate_queue_count()
+        current = self._read_count()
+        requests = []
+        for state in STATE_COUNTED:
+            n = count.get(state, 0)
+            if before.get(state) != current.get(state):
+                self.logger.debug("skip reconcile of changing [%s] count",
+                                  state)
+            elif current.get(state, 0) != n:
+                self.logger.debug("reconcile [%s] count from [%s] to [%d]",
+                                  state, current.get(state), n)
+                if state in current:
+                    requests.append(pymongo.UpdateOne(
+                        {"_id": state, "n": current[state]},
+                        {"$set": {"n": n}}))
+                else:
+                    requests.append(pymongo.UpdateOne(
+                        {"_id": state}, {"$inc": {"n": n}}, upsert=True))
+        if requests:
+            self.config.sys.count.bulk_write(requests, ordered=False)
+        return count
+
+    def _read_count(self):
+        # internal method to read all job state counters of sys.count
+        return dict([(doc["_id"], doc["n"])
+                     for doc in self.config.sys.count.find()])
+
     def make_stat(self, event, _id):
         """
-        Collects current job state counts from ``sys.queue`` and inserts a
-        record into ``sys.event``.
+        Collects current job state counts from ``sys.count`` (see
+        :meth:`.get_queue_count`) and inserts a record into ``sys.event``.
+        Batch operations like :meth:`.CoreWorker.remove_jobs` pass a list
+        of job ``_id`` to record one event per batch.
 
         The following events are tracked in ``sys.event``:
 
@@ -721,3 +1027,294 @@ class CoreQueue(CoreBase, QueryMixin, metaclass=core4.util.tool.Singleton):
         """
         self.trigger(name=event, channel=core4.const.QUEUE_CHANNEL,
                      data={"_id": _id, "queue": self.get_queue_count()})
+
+
+class AsyncCoreQueue(CoreBase, QueryMixin, JobFactoryMixin, QueueRequestMixin,
+                     metaclass=core4.util.tool.Singleton):
+    """
+    Asynchronous, :mod:`motor` based version of :class:`.CoreQueue` for use
+    on the Tornado IOLoop, for example with API request handlers::
+
+        from core4.queue.main import AsyncCoreQueue
+
+        queue = AsyncCoreQueue()
+
+        job = await queue.enqueue("core4.queue.helper.job.example.DummyJob")
+
+        await queue.restart_job(job._id)
+        await queue.remove_job(job._id)
+        await queue.kill_job(job._id)
+
+    All methods share the semantics and the MongoDB requests of their
+    :class:`.CoreQueue` counterparts, see :class:`.QueueRequestMixin`, but
+    never block the IOLoop with synchronous MongoDB requests. Other than
+    :class:`.CoreQueue` this class does not create the indexes of
+    ``sys.queue``. The core4 API server creates them with
+    :meth:`.CoreSetup.make_all` at startup.
+    """
+    concurr = True
+
+    async def enqueue(self, cls=None, name=None, by=None, **kwargs):
+        """
+        Enqueues the passed job identified by it's :meth:`.qual_name`, see
+        :meth:`.CoreQueue.enqueue`.
+
+        :param kwargs: dict
+        :return: enqueued job object
+        """
+        job = self.job_factory(name or cls, **kwargs)
+        doc = self._prepare_job(job, self._enqueued(by))
+        try:
+            ret = await self.config.sys.queue.insert_one(doc)
+        except pymongo.errors.DuplicateKeyError:
+            raise self._job_exists(job)
+        self._enqueued_job(job, ret.inserted_id)
+        await self.count_state(new=STATE_PENDING)
+        await self.make_stat('enqueue_job', str(job._id))
+        return job
+
+    async def enqueue_many(self, cls=None, name=None, args=None, by=None):
+        """
+        Enqueues one job for each dict of job arguments in ``args`` with one
+        unordered ``insert_many``, see :meth:`.CoreQueue.enqueue_many`.
+
+        :param cls: job class
+        :param name: qualified job name
+        :param args: list of dict with job arguments and job properties
+        :param by: dict with ``enqueued`` information
+        :return: list of job ``_id`` in the order of ``args``. Jobs which
+                 exist with the same arguments are reported as ``None``.
+        """
+        docs = self.build_jobs(name or cls, args or [], by)
+        if not docs:
+            return []
+        try:
+            await self.config.sys.queue.insert_many(docs, ordered=False)
+            ret = self._enqueued_many(docs)
+        except pymongo.errors.BulkWriteError as exc:
+            ret = self._enqueued_many(docs, exc)
+        inserted = [str(_id) for _id in ret if _id is not None]
+        if inserted:
+            await self.count_state(new=STATE_PENDING, n=len(inserted))
+            await self.make_stat('enqueue_job', inserted)
+        return ret
+
+    async def remove_job(self, _id):
+        """
+        Requests to remove the job with the passed ``_id`` from
+        ``sys.queue``, see :meth:`.CoreQueue.remove_job`.
+
+        :param _id: :class:`bson.object.ObjectId`
+        :return: ``True`` if the request succeeded, else ``False``
+        """
+        (at, filter, update) = self._remove_request(_id)
+        ret = await self.config.sys.queue.update_one(filter, update=update)
+        if ret.raw_result["n"] == 1:
+            self.logger.warning(
+                "flagged job [%s] to be remove at [%s]", _id, at)
+            await self.make_stat('request_remove_job', str(_id))
+            return True
+        self.logger.error("failed to flag job [%s] to be remove", _id)
+        return False
+
+    async def restart_job(self, _id):
+        """
+        Requests to restart the job with the passed ``_id``, see
+        :meth:`.CoreQueue.restart_job`. Jobs which cannot be imported in the
+        current Python environment are restarted in the project's Python
+        virtual environment in a thread.
+
+        :param _id: :class:`bson.object.ObjectId`
+        :return: ``_id`` of the restarted or new job or None in case of error
+        """
+        if await self._restart_waiting(_id):
+            self.logger.warning('successfully restarted [%s]', _id)
+            await self.make_stat('restart_waiting', str(_id))
+            return _id
+        try:
+            new_id = await self._restart_stopped(_id)
+        except ImportError:
+            doc = await self.config.sys.queue.find_one(
+                {"_id": _id}, projection=["name"])
+            if doc is None:
+                raise core4.error.CoreJobNotFound(
+                    "job [{}] not found".format(_id))
+            new_id, stderr = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: core4.service.introspect.main.exec_project(
+                    doc["name"], RESTART, job_id=str(doc["_id"]), comm=True))
+        if new_id:
+            self.logger.warning('successfully restarted [%s] '
+                                'with [%s]', _id, new_id)
+            return new_id
+        self.logger.error("failed to restart [%s]", _id)
+        return None
+
+    async def _restart_waiting(self, _id):
+        # internal method used by .restart_job to reset .query_at
+        (filter, update) = self._restart_waiting_request(_id)
+        ret = await self.config.sys.queue.update_one(filter, update=update)
+        return ret.modified_count == 1
+
+    async def _restart_stopped(self, _id):
+        # internal method used by .restart_job
+        job = await self.find_job(_id)
+        if job.state in STATE_STOPPED:
+            if await self.lock_job('__user__', _id):
+                ret = await self.config.sys.queue.delete_one({"_id": _id})
+                if ret.raw_result["n"] == 1:
+                    await self.count_state(old=job.state)
+                    (enqueue, doc) = self._restart_args(job)
+                    new_job = await self.enqueue(
+                        name=job.qual_name(), by=enqueue, **doc)
+                    job.enqueued["child_id"] = new_job._id
+                    await self.journal(job.serialise())
+                    await self.make_stat('restart_stopped', str(_id))
+                    await self.unlock_job(_id)
+                    return new_job._id
+        return None
+
+    async def kill_job(self, _id):
+        """
+        Requests to kill the job with the passed ``_id``, see
+        :meth:`.CoreQueue.kill_job`.
+
+        :param _id: :class:`bson.object.ObjectId`
+        :return: ``True`` if the request succeeded, else ``False``
+        """
+        (at, filter, update) = self._kill_request(_id)
+        ret = await self.config.sys.queue.update_one(filter, update=update)
+        await self.make_stat('request_kill_job', str(_id))
+        if ret.raw_result["n"] == 1:
+            self.logger.warning(
+                "flagged job [%s] to be killed at [%s]", _id, at)
+            return True
+        self.logger.error("failed to flag job [%s] to be killed", _id)
+        return False
+
+    async def lock_job(self, identifier, _id):
+        """
+        Reserve the job for exclusive processing in ``sys.lock``, see
+        :meth:`.CoreQueue.lock_job`.
+
+        :param identifier: to assign to the reservation
+        :param _id: job ``_id``
+        :return: ``True`` if reservation succeeded, else ``False``
+        """
+        try:
+            await self.config.sys.lock.insert_one(
+                {"_id": _id, "owner": identifier})
+            return True
+        except pymongo.errors.DuplicateKeyError:
+            return False
+
+    async def unlock_job(self, _id):
+        """
+        Release/unlock the job from ``sys.lock``, see
+        :meth:`.CoreQueue.unlock_job`.
+
+        :param _id: :class:`bson.object.ObjectId`
+        :return: ``True`` if the job has been successfully released, else
+                 ``False``
+        """
+        ret = await self.config.sys.lock.delete_one({"_id": _id})
+        return self._released(_id, ret)
+
+    async def journal(self, doc):
+        """
+        Insert the passed MongoDB document into collection ``sys.journal``,
+        see :meth:`.CoreQueue.journal`.
+
+        :param doc: dict (MongoDB document)
+        :return: ``True`` if the document has been inserted, else ``False``
+        """
+        try:
+            ret = await self.config.sys.journal.insert_one(doc)
+            return ret.inserted_id == doc["_id"]
+        except pymongo.errors.DuplicateKeyError:
+            self.logger.error("failed to journal job [%s]", doc["_id"])
+        return False
+
+    async def _find_job(self, _id, collection):
+        # internal method used by .load_job and .find_job
+        return self._job_from_doc(
+            _id, await collection.find_one({"_id": _id}))
+
+    async def load_job(self, _id):
+        """
+        Queries the job with the passed ``_id`` from collection
+        ``sys.queue``, see :meth:`.CoreQueue.load_job`.
+
+        :param _id: job ``_id``
+        :return: :class:`.CoreJob` object
+        """
+        return await self._find_job(_id, self.config.sys.queue)
+
+    async def find_job(self, _id):
+        """
+        Queries the job with the passed ``_id`` from collection ``sys.queue``
+        or ``sys.journal``, see :meth:`.CoreQueue.find_job`.
+
+        :param _id: job ``_id``
+        :return: :class:`.CoreJob` object
+        """
+        try:
+            return await self.load_job(_id)
+        except core4.error.CoreJobNotFound:
+            return await self._find_job(_id, self.config.sys.journal)
+
+    async def count_state(self, old=None, new=None, n=1):
+        """
+        Maintains the job state counters in collection ``sys.count``, see
+        :meth:`.CoreQueue.count_state`.
+
+        :param old: previous job state, ``None`` for new jobs
+        :param new: next job state, ``None`` for removed jobs
+        :param n: number of jobs with this state transition, defaults to 1
+        """
+        requests = self._count_requests(old, new, n)
+        if requests:
+            await self.config.sys.count.bulk_write(requests, ordered=False)
+
+    async def make_stat(self, event, _id):
+        """
+        Collects current job state counts from ``sys.count`` and inserts a
+        record into ``sys.event``, see :meth:`.CoreQueue.make_stat`.
+
+        :param event: to log
+        :param _id: job _id or list of job _id
+        """
+        await self.trigger(
+            name=event, channel=core4.const.QUEUE_CHANNEL,
+            data={"_id": _id, "queue": await self.get_queue_count_async()})
+
+    async def trigger(self, name, channel=None, data=None, author=None):
+        """
+        Triggers an event in collection ``sys.event``, see
+        :meth:`.CoreBase.trigger`.
+
+        :param name: of the event
+        :param channel: of the event, defaults to channel name ``system``
+        :param data: to be attached to the event
+        :param author: of the event, defaults to the current username
+        :return: event id (MongoDB ``_id``)
+        """
+        if self._event is None:
+            conn = self.config.sys.event.connect_async()
+            if not conn:
+                raise core4.error.Core4SetupError("config.event not set")
+            db = conn.connection[conn.database]
+            if conn.collection not in await db.list_collection_names():
+                try:
+                    await db.create_collection(
+                        conn.collection, capped=True,
+                        size=self.config.event.size)
+                except pymongo.errors.CollectionInvalid:
+                    pass  # created in between
+            wc = self.config.event.write_concern
+            self._event = db[conn.collection].with_options(
+                write_concern=pymongo.write_concern.WriteConcern(w=wc))
+            self.logger.debug(
+                "mongodb event setup complete, write concern [%d]", wc)
+        ret = await self._event.insert_one(
+            self._event_doc(name, channel, data, author))
+        return ret.inserted_id
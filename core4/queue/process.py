@@ -6,7 +6,8 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 """
-This module implements the core4 job process spawned by :class:`.CoreWorker`.
+This module implements the core4 job process spawned by :class:`.CoreWorker`
+with the job's :class:`.JobHeartbeat` and :class:`.StdoutCapture` threads.
 """
 
 import ctypes
@@ -14,9 +15,13 @@ import io
 import os
 import sys
 import tempfile
+import threading
 import traceback
+import zlib
 
 import datetime
+import pymongo.errors
+from bson.binary import Binary
 from bson.objectid import ObjectId
 
 import core4.base.main
@@ -30,24 +35,242 @@ libc = ctypes.CDLL(None)
 c_stdout = ctypes.c_void_p.in_dll(libc, 'stdout')
 c_stderr = ctypes.c_void_p.in_dll(libc, 'stderr')
 
+#: maximum number of uncompressed bytes per job STDOUT chunk
+STDOUT_CHUNK = 256 * 1024
+
+
+class JobHeartbeat:
+    """
+    Background thread of :class:`.CoreWorkerProcess` which updates the
+    job's ``locked.heartbeat`` in ``sys.queue`` once per
+    ``progress_interval``, independent of the job calling
+    :meth:`.progress <core4.queue.job.CoreJob.progress>`. The latest
+    progress value and message passed with :meth:`.progress` are coalesced
+    and saved with the next heartbeat.
+    """
+
+    def __init__(self, job):
+        """
+        :param job: :class:`.CoreJob` object
+        """
+        self.job = job
+        self.interval = job.progress_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = None
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        """
+        Attaches the heartbeat to the job and starts the background thread.
+        """
+        self.job.__dict__["_heartbeat"] = self
+        self._thread = threading.Thread(
+            target=self._run, daemon=True,
+            name="{}-heartbeat".format(self.job._id))
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and saves the latest progress. The
+        heartbeat is detached from the job.
+        """
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.job.__dict__["_heartbeat"] = None
+
+    def progress(self, p, *args):
+        """
+        Keeps the latest progress value and message arguments, see
+        :meth:`.CoreJob.progress`. This method does not access MongoDB.
+
+        :param p: percentage in decimal
+        :param args: message and or format
+        """
+        with self._lock:
+            self._pending = (p, args)
+
+    def wake(self):
+        """
+        Wakes the background thread to save the heartbeat and progress
+        immediately.
+        """
+        self._wakeup.set()
+
+    def _run(self):
+        # internal method of the background thread
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            stopped = self._stopped
+            try:
+                self.beat()
+            except Exception:
+                self.job.logger.error("failed to update heartbeat",
+                                      exc_info=True)
+            if stopped:
+                return
+
+    def beat(self):
+        """
+        Updates the job's heartbeat and the pending progress in
+        ``sys.queue``.
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = None
+        update = {"locked.heartbeat": core4.util.node.mongo_now()}
+        if pending is not None:
+            (p, args) = pending
+            update["prog.value"] = p
+            update["prog.message"] = self.job.format_args(*args)
+        self.job.config.sys.queue.update_one(
+            {"_id": self.job._id, "locked": {"$ne": None}},
+            update={"$set": update})
+
+
+class StdoutCapture:
+    """
+    Background thread of :class:`.CoreWorkerProcess` which saves the job
+    STDOUT while the job is running. The thread reads new output from the
+    file which receives the redirected STDOUT every ``worker.stdout_interval``
+    seconds and saves it in compressed chunks of at most
+    :data:`STDOUT_CHUNK` bytes into ``sys.stdout``. Each chunk document
+    carries
+
+    * ``job_id`` - the job ``_id``
+    * ``offset`` - the position of the first byte in the job STDOUT
+    * ``end`` - the position after the last byte in the job STDOUT
+    * ``data`` - the zlib compressed bytes
+    * ``timestamp`` - the upload time for the ``worker.stdout_ttl``
+
+    Jobs without output save one empty chunk. If a chunk has been saved
+    without acknowledgement, the upload continues after the saved chunk.
+    """
+
+    def __init__(self, job_id, fd, collection, interval, logger):
+        """
+        :param job_id: job ``_id``
+        :param fd: file descriptor receiving the redirected STDOUT
+        :param collection: ``sys.stdout`` collection
+        :param interval: seconds between uploads
+        :param logger: to log failed uploads
+        """
+        self.job_id = job_id
+        self.fd = fd
+        self.collection = collection
+        self.interval = interval
+        self.logger = logger
+        self.offset = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Starts the background thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, daemon=True,
+            name="{}-stdout".format(self.job_id))
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and saves the remaining output.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.upload()
+        if self.offset == 0:
+            self._insert(b"")
+
+    def _run(self):
+        # internal method of the background thread
+        while not self._stop.wait(self.interval):
+            try:
+                self.upload()
+            except Exception:
+                # retried with the next interval or on stop
+                self.logger.error("failed to save stdout", exc_info=True)
+
+    def upload(self):
+        """
+        Saves the output written since the last upload. The file position
+        of the job's STDOUT is not touched.
+        """
+        while True:
+            data = os.pread(self.fd, STDOUT_CHUNK, self.offset)
+            if not data:
+                break
+            self.offset = self._insert(data)
+
+    def _insert(self, data):
+        # internal method to save a compressed chunk, returns the position
+        # after the saved chunk
+        try:
+            self.collection.insert_one({
+                "job_id": self.job_id,
+                "offset": self.offset,
+                "end": self.offset + len(data),
+                "data": Binary(zlib.compress(data)),
+                "timestamp": core4.util.node.mongo_now()
+            })
+        except pymongo.errors.DuplicateKeyError:
+            # the chunk has been saved before and the acknowledgement was lost
+            doc = self.collection.find_one(
+                {"job_id": self.job_id, "offset": self.offset},
+                projection=["end"])
+            if doc is None:
+                raise
+            self.logger.warning(
+                "stdout chunk at offset [%d] exists", self.offset)
+            return doc["end"]
+        return self.offset + len(data)
+
 
 class CoreWorkerProcess(core4.base.main.CoreBase,
                         core4.logger.mixin.CoreLoggerMixin):
     """
     This class controls jobs execution. It loads the requested job from
     ``sys.queue``, drops user privileges,
-    :meth:`.execute <core4.queue.job.CoreJob.execute>` the job, manages the
+    :meth:`.execute <core4.queue.job.CoreJob.execute>` the job with a
+    :class:`.JobHeartbeat` thread, manages the
     final job state (``complete`` or ``failed``) and set the jobs' cookie
-    ``last_runtime``. Finally job output to ``STDOUT`` is saved into
-    ``sys.stdout``.
+    ``last_runtime``. Job output to ``STDOUT`` is saved into ``sys.stdout``
+    while the job is running, see :class:`.StdoutCapture`.
     """
 
-    def start(self, job_id, redirect=True, manual=False):
+    def start(self, job_id, redirect=True, manual=False, worker=None,
+              trial=None):
         """
+        All objects created during job execution inherit the job ``_id`` as
+        their ``.identifier``.
+
+        The job is executed only if it is still claimed by the worker which
+        requested the execution, i.e. the job is ``running`` without
+        ``locked.pid`` and matches the passed ``worker`` and ``trial``. A
+        job process which starts late, e.g. after the job has been
+        re-queued with :meth:`.CoreWorker.release_fork` and claimed again,
+        terminates without execution.
+
         :param job_id: str representing a :class:`bson.objectid.ObjectId`
+        :param worker: ``locked.worker`` identifier of the claim
+        :param trial: job ``trial`` of the claim
+        :return: ``True`` if the job completed, else ``False``
         """
         _id = ObjectId(job_id)
         self.identifier = _id
+        with core4.base.main.identify(_id):
+            return self._start(_id, redirect, manual, worker, trial)
+
+    def _start(self, _id, redirect, manual, worker=None, trial=None):
+        # internal method to load, execute and finish the job
         self.setup_logging()
         self.queue = core4.queue.main.CoreQueue()
         now = core4.util.node.mongo_now()
@@ -62,11 +285,24 @@ class CoreWorkerProcess(core4.base.main.CoreBase,
             update["inactive_at"] = now + datetime.timedelta(
                 seconds=job.defer_max)
             self.logger.debug("set inactive_at [%s]", update["inactive_at"])
+        # the job might have been re-queued and claimed again if the
+        # worker's fork request failed
+        claim = {
+            "_id": job._id,
+            "state": core4.queue.job.STATE_RUNNING,
+            "locked": {"$ne": None},
+            "locked.pid": None
+        }
+        if worker is not None:
+            claim["locked.worker"] = worker
+        if trial is not None:
+            claim["trial"] = trial
         ret = self.config.sys.queue.update_one(
-            filter={"_id": job._id}, update={"$set": update})
+            filter=claim, update={"$set": update})
         if ret.raw_result["n"] != 1:
-            raise RuntimeError(
-                "failed to update job [{}] state [starting]".format(job._id))
+            self.logger.warning("job [%s] not claimed, skip execution",
+                                job._id)
+            return False
         for k, v in update.items():
             job.__dict__[k] = v
 
@@ -78,11 +314,20 @@ class CoreWorkerProcess(core4.base.main.CoreBase,
             saved_stdout_fd = os.dup(self.original_stdout_fd)
             tfile = tempfile.TemporaryFile(mode='w+b')
             self._redirect_stdout(tfile.fileno())
+            capture = StdoutCapture(
+                job._id, tfile.fileno(), self.config.sys.stdout,
+                self.config.worker.stdout_interval, self.logger)
+            capture.start()
 
-        self.queue.make_stat("start_job", str(job_id))
+        self.queue.make_stat("start_job", str(_id))
         job.add_exception_logger()
+        heartbeat = JobHeartbeat(job)
+        heartbeat.start()
         try:
-            job.execute(**job.args)
+            try:
+                job.execute(**job.args)
+            finally:
+                heartbeat.stop()
         except core4.error.CoreJobDeferred:
             self.queue.set_defer(job)
             return False
@@ -101,25 +346,7 @@ class CoreWorkerProcess(core4.base.main.CoreBase,
             if redirect:
                 # todo: this one is a race condition in testing
                 self._redirect_stdout(saved_stdout_fd)
-                tfile.flush()
-                tfile.seek(0, io.SEEK_SET)
-                body = tfile.read()
-                try:
-                    u8body = body.decode('utf-8')
-                except:
-                    u8body = body
-                self.config.sys.stdout.update_one(
-                    filter={
-                        "_id": job._id,
-                    },
-                    update={
-                        "$set": {
-                            "timestamp": core4.util.node.mongo_now(),
-                            "stdout": u8body
-                        }
-                    },
-                    upsert=True
-                )
+                capture.stop()
                 os.close(saved_stdout_fd)
                 tfile.close()
 
@@ -150,11 +377,13 @@ class CoreWorkerProcess(core4.base.main.CoreBase,
                     "traceback": traceback.format_exception(*exc_info)
                 }
             }
-            ret = self.config.sys.queue.update_one(
-                filter={"_id": _id}, update={"$set": update})
-            if ret.raw_result["n"] != 1:
+            doc = self.config.sys.queue.find_one_and_update(
+                filter={"_id": _id}, update={"$set": update},
+                projection=["state"])
+            if doc is None:
                 raise RuntimeError(
                     "failed to update job [{}] state [starting]".format(_id))
+            self.queue.count_state(doc["state"], core4.queue.job.STATE_ERROR)
             self.logger.info("failed to start [%s]", _id)
             self.queue.make_stat("failed_start", str(_id))
             return None
@@ -13,11 +13,46 @@ based on :class:`.CoreBase`.
 """
 
 import datetime
+import zlib
 from collections import OrderedDict
 
 import core4.util.node
 
 
+def stdout_filter(_id, offset=0, length=None):
+    """
+    Returns the MongoDB filter to retrieve the compressed job STDOUT chunks
+    from ``sys.stdout`` which overlap the passed byte range. The chunks are
+    to be sorted by ``offset``.
+
+    :param _id: job ``_id``
+    :param offset: first byte
+    :param length: number of bytes, ``None`` for all bytes from ``offset``
+    :return: dict
+    """
+    query = {"job_id": _id, "end": {"$gt": offset}}
+    if length is not None:
+        query["offset"] = {"$lt": offset + length}
+    return query
+
+
+def stdout_slice(doc, offset=0, length=None):
+    """
+    Decompresses the passed job STDOUT chunk from ``sys.stdout`` and returns
+    the bytes within the passed byte range.
+
+    :param doc: chunk document, see :func:`stdout_filter`
+    :param offset: first byte
+    :param length: number of bytes, ``None`` for all bytes from ``offset``
+    :return: bytes
+    """
+    data = zlib.decompress(doc["data"])
+    start = max(0, offset - doc["offset"])
+    if length is None:
+        return data[start:]
+    return data[start:max(0, offset + length - doc["offset"])]
+
+
 class QueryMixin:
     """
     Retrieves core4 runtime information by querying collections ``sys.queue``,
@@ -288,21 +323,53 @@ class QueryMixin:
             'prog': 1
         }
 
-    def get_job_stdout(self, _id):
+    def get_job_stdout(self, _id, offset=0, length=None):
         """
-        Returns the job STDOUT filtered.
+        Returns the job STDOUT, see :meth:`.iter_job_stdout`. The output is
+        decoded with UTF-8 if possible.
 
         .. note:: The STDOUT of jobs have a time-to-live and is purged after
                   7 days. You can configure this TTL with config setting
-                  ``worker.stdout.ttl``.
+                  ``worker.stdout_ttl``.
+
+        :param _id: :class:`bson.object.ObjectId`
+        :param offset: first byte
+        :param length: number of bytes, ``None`` for all bytes from ``offset``
+        :return: str, bytes if the output is not UTF-8, ``None`` if no output
+                 exists
+        """
+        chunks = list(self.iter_job_stdout(_id, offset, length))
+        if not chunks:
+            if self.config.sys.stdout.count_documents(
+                    {"job_id": _id}, limit=1):
+                return ""
+            doc = self.config.sys.stdout.find_one(
+                {"_id": _id, "stdout": {"$exists": True}})
+            if doc:
+                # job STDOUT saved before chunking
+                return doc["stdout"]
+            return None
+        body = b"".join(chunks)
+        try:
+            return body.decode("utf-8")
+        except UnicodeDecodeError:
+            return body
+
+    def iter_job_stdout(self, _id, offset=0, length=None):
+        """
+        Streams the job STDOUT. The output is saved in compressed chunks by
+        the running job, see :class:`.StdoutCapture`. Only the chunks
+        overlapping the passed byte range are loaded.
 
         :param _id: :class:`bson.object.ObjectId`
-        :return: str
+        :param offset: first byte
+        :param length: number of bytes, ``None`` for all bytes from ``offset``
+        :return: generator of bytes
         """
-        doc = self.config.sys.stdout.find_one({"_id": _id})
-        if doc:
-            return doc["stdout"]
-        return None
+        cur = self.config.sys.stdout.find(
+            stdout_filter(_id, offset, length), sort=[("offset", 1)])
+        for doc in cur:
+            yield stdout_slice(doc, offset, length)
 
     def pipeline_queue_count(self):
         """
@@ -340,14 +407,30 @@ class QueryMixin:
 
     def get_queue_count(self):
         """
-        Retrieves aggregated information about ``sys.queue`` state. This is
+        Retrieves the number of jobs in ``sys.queue`` by job state. The
+        numbers are read from the job state counters in collection
+        ``sys.count`` which are maintained with each job state transition,
+        see :meth:`.CoreQueue.count_state` and
+        :meth:`.CoreQueue.reconcile_count`.
 
-        * ``n`` - the number of jobs in the given state
-        * ``state`` - job state
-        * ``flags`` - job flags ``zombie``, ``wall``, ``removed`` and
-          ``killed``
+        :return: dict with job state and number of jobs in this state
+        """
+        cur = self.config.sys.count.find({"n": {"$gt": 0}})
+        return dict([(s["_id"], s["n"]) for s in cur])
 
-        :return: dict
+    async def get_queue_count_async(self):
+        """
+        Asynchronous version of :meth:`get_queue_count`.
+        """
+        cur = self.config.sys.count.find({"n": {"$gt": 0}})
+        return dict([(s["_id"], s["n"]) async for s in cur])
+
+    def aggregate_queue_count(self):
+        """
+        Aggregates the number of jobs in ``sys.queue`` by job state. Other
+        than :meth:`.get_queue_count` this method scans ``sys.queue``.
+
+        :return: dict with job state and number of jobs in this state
         """
         cur = self.config.sys.queue.aggregate(self.pipeline_queue_count())
         data = list(cur)
@@ -29,6 +29,7 @@ To stop the worker start a new Python interpreter and go with::
 """
 
 import datetime
+import heapq
 
 from croniter import croniter
 
@@ -51,6 +52,11 @@ class CoreScheduler(CoreDaemon):
 
     Note that the scheduler keeps track of the last scheduling time and catches
     up with all missed enqueuing, e.g. if the scheduler was down.
+
+    The scheduler keeps the next execution time of all jobs in a min-heap,
+    see :meth:`.get_next`. Only the jobs due are rescheduled. The heap is
+    rebuilt if the jobs are registered again in ``sys.job``, see
+    :meth:`.reload`.
     """
     kind = "scheduler"
 
@@ -60,6 +66,11 @@ class CoreScheduler(CoreDaemon):
         self.next = None
         self.previous = None
         self.job = None
+        self.loaded_at = None
+        self.reload_at = None
+        self._heap = None
+        self._heap_job = None
+        self._horizon = None
 
     def startup(self):
         """
@@ -68,14 +79,37 @@ class CoreScheduler(CoreDaemon):
         :meth:`.collect_job`.
         """
         super().startup()
+        self.collect_job()
+
+    def collect_job(self):
+        """
+        Collects and registers all known jobs with
+        :meth:`.CoreIntrospector.collect_job`.
+        """
         intro = core4.service.introspect.main.CoreIntrospector()
         self.job = intro.collect_job()
+        self.loaded_at = core4.util.node.mongo_now()
+
+    def reload(self):
+        """
+        Collects all known jobs again if jobs have been registered in
+        ``sys.job`` since the last collection, e.g. after a new release. The
+        check runs every ``scheduler.reload`` seconds.
+        """
+        if self.reload_at is not None and self.at < self.reload_at:
+            return
+        self.reload_at = self.at + datetime.timedelta(
+            seconds=self.config.scheduler.reload)
+        if self.loaded_at is None or self.config.sys.job.count_documents(
+                {"updated_at": {"$gt": self.loaded_at}}, limit=1):
+            self.logger.info("reloading jobs")
+            self.collect_job()
 
     def loop(self):
         """
         This is the main processing phase of the scheduler.
         """
-        self.wait_time = 1
+        self.wait_time = self.config.scheduler.interval
         self.previous = None
         doc = self.config.sys.job.find_one({"_id": "__schedule__"})
         if doc:
@@ -86,9 +120,12 @@ class CoreScheduler(CoreDaemon):
         """
         The scheduler consists of one step. This time interval of this step
         can be configured by core4 config setting ``scheduler.interval`` and
-        defaults to 1 second.
-        :return:
+        defaults to 1 second. The scheduler sleeps shorter if the next job is
+        due earlier.
+
+        :return: number of enqueued jobs
         """
+        self.reload()
         jobs = self.get_next(self.previous, self.at)
         n = 0
         for job, schedule in jobs:
@@ -107,17 +144,25 @@ class CoreScheduler(CoreDaemon):
             else:
                 n += 1
         self.previous = self.at
-        self.config.sys.job.update_one(
-            {
-                "_id": "__schedule__"
-            },
-            update={
-                "$set": {
-                    "schedule_at": self.previous
-                }
-            },
-            upsert=True
-        )
+        if jobs:
+            # without jobs due the catch up from the last schedule_at is
+            # equivalent
+            self.config.sys.job.update_one(
+                {
+                    "_id": "__schedule__"
+                },
+                update={
+                    "$set": {
+                        "schedule_at": self.previous
+                    }
+                },
+                upsert=True
+            )
+        if self._heap:
+            delta = (self._heap[0][0]
+                     - core4.util.node.mongo_now()).total_seconds()
+            self.wait_time = min(self.config.scheduler.interval,
+                                 max(0., delta))
         return n
 
     def get_next(self, start, end):
@@ -125,17 +170,45 @@ class CoreScheduler(CoreDaemon):
         Returns the jobs to be enqueued between ``start`` and ``end``
         date/time.
 
+        The next execution time of each job is kept in a min-heap. Only the
+        jobs due are popped and rescheduled after ``end``. The heap is
+        rebuilt from ``start`` if the jobs have been reloaded or if ``start``
+        does not continue the ``end`` of the previous call.
+
         :param start: :class:`datetime.datetime` when last scheduling has been
                       executed. Pass ``None`` for the very first schedule.
         :param end: :class:`datetime.datetime` of now
         :return: list of tuples with ``(name, schedule)`` of the job
         """
-        ret = []
         if start is None:
             start = end
-        for job_name, doc in self.job.items():
-            cron = croniter(doc["schedule"], start)
-            next_time = cron.get_next(datetime.datetime)
-            if next_time <= end:
-                ret.append((job_name, doc["schedule"]))
+        if (self._heap is None or self._heap_job is not self.job
+                or start != self._horizon):
+            self._make_heap(start)
+        ret = []
+        while self._heap and self._heap[0][0] <= end:
+            (_, job_name, schedule) = heapq.heappop(self._heap)
+            ret.append((job_name, schedule))
+        for job_name, schedule in ret:
+            heapq.heappush(self._heap, (
+                croniter(schedule, end).get_next(datetime.datetime),
+                job_name, schedule))
+        self._horizon = end
         return ret
+
+    def _make_heap(self, start):
+        # internal method to calculate the next execution time of all jobs
+        heap = []
+        for job_name, doc in self.job.items():
+            try:
+                next_time = croniter(doc["schedule"], start).get_next(
+                    datetime.datetime)
+            except Exception:
+                self.logger.error("invalid schedule [%s] of [%s]",
+                                  doc["schedule"], job_name)
+                continue
+            heap.append((next_time, job_name, doc["schedule"]))
+        heapq.heapify(heap)
+        self._heap = heap
+        self._heap_job = self.job
+        self._horizon = start
@@ -31,12 +31,17 @@ To stop the worker start a new Python interpreter and go with::
 """
 
 import collections
+import os
+import re
 import signal
+import time
 from datetime import timedelta
 
 import psutil
 import pymongo
 
+import core4.config.main
+import core4.queue.forkserver
 import core4.queue.job
 import core4.queue.process
 import core4.queue.query
@@ -50,7 +55,25 @@ STEPS = (
     "work_jobs",
     "remove_jobs",
     "flag_jobs",
-    "collect_stats")
+    "collect_stats",
+    "reconcile_count")
+
+#: job claim sort order of :meth:`.CoreWorker.get_next_job`
+CLAIM_ORDER = [
+    ('force', pymongo.DESCENDING),
+    ('priority', pymongo.DESCENDING),
+    ('_id', pymongo.ASCENDING)
+]
+#: ``sys.queue`` changes which possibly make a job available for processing
+QUEUE_CHANGES = [{"$match": {"$or": [
+    {"operationType": {"$in": ["insert", "replace", "delete"]}},
+] + [
+    {"updateDescription.updatedFields.{}".format(field): {"$exists": True}}
+    for field in ("state", "query_at", "locked", "removed_at", "killed_at")
+]}}]
+#: ``sys.worker`` changes of the general and project maintenance and halt
+WORKER_CHANGES = [{"$match": {"documentKey._id": {
+    "$in": ["__maintenance__", "__project__", "__halt__"]}}}]
 
 
 class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
@@ -76,6 +99,12 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
             (min(psutil.cpu_percent(percpu=True)),
              psutil.virtual_memory()[4] / 2. ** 20))
         self.job = None
+        self.fork_server = {}
+        self.slot = {}
+        self.reserved = {}
+        self.occupancy = None
+        self.maintenance_cache = None
+        self.timing = {}
         self.handle_signal()
 
     def handle_signal(self):
@@ -86,16 +115,34 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
         """
         Implements the **startup** phase of the scheduler. The method is based
         on :class:`.CoreDaemon` implementation and additionally spawns
-        :meth:`.collect_job`.
+        :meth:`.collect_job`, :meth:`.reconcile_count` and
+        :meth:`.restore_slots`. With ``worker.config_cache`` job processes
+        load the compiled configuration persisted in ``folder.temp``.
         """
         super().startup()
+        if self.config.worker.config_cache:
+            os.environ.setdefault(core4.config.main.CACHE_ENV,
+                                  self.config.get_folder("temp"))
         intro = core4.service.introspect.main.CoreIntrospector()
         self.job = intro.collect_job()
+        self.reconcile_count()
+        self.restore_slots()
+        if self.config.worker.change_stream:
+            self.watch(self.config.sys.queue, QUEUE_CHANGES)
+            self.watch(self.config.sys.worker, WORKER_CHANGES)
 
     def cleanup(self):
         """
-        General housekeeping method of the worker.
+        General housekeeping method of the worker. Releases all claimed but
+        not started jobs, stops the job fork servers and removes the worker's
+        locks from ``sys.lock``.
         """
+        n = self.release_claim()
+        if n:
+            self.logger.info("cleanup released [%d] claimed jobs", n)
+        for server in self.fork_server.values():
+            server.stop()
+        self.fork_server = {}
         ret = self.config.sys.lock.delete_many({"owner": self.identifier})
         self.logger.info(
             "cleanup removed [%d] sys.lock records", ret.raw_result["n"])
@@ -108,6 +155,7 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
         #. :meth:`.remove_jobs` - remove jobs
         #. :meth:`.flag_jobs` - flag jobs as non-stoppers, zombies, killed
         #. :meth:`.collect_stats` - collect and save general sever metrics
+        #. :meth:`.reconcile_count` - reconcile job state counters
 
         :return: dict with step ``name``, ``interval``, ``next`` timestamp
              to execute and method reference ``call``
@@ -136,31 +184,200 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
         """
         This method implements the steps of the worker.
         See :meth:`.create_plan` for further details.
+
+        If the worker watches ``sys.queue`` with a change stream (see config
+        setting ``worker.change_stream``), then :meth:`.work_jobs` runs
+        immediately after a change woke up the worker. If no job has been
+        processed, the next :meth:`.work_jobs` is postponed until the next
+        deferred job is due or ``worker.change_stream_timeout`` expires.
+
+        The runtime of the last execution of each step is kept in
+        ``.timing``.
         """
         for step in self.plan:
             interval = timedelta(seconds=step["interval"])
-            if step["next"] <= self.at:
+            woken = self.woken and step["name"] == "work_jobs"
+            if step["next"] <= self.at or woken:
                 self.logger.debug("enter [%s] at cycle [%s]",
                                   step["name"], self.cycle["total"])
-                step["call"]()
-                self.logger.debug("exit [%s] at cycle [%s]",
-                                  step["name"], self.cycle["total"])
+                t0 = time.perf_counter()
+                ret = step["call"]()
+                self.timing[step["name"]] = time.perf_counter() - t0
+                self.logger.debug("exit [%s] at cycle [%s] after [%1.3f] sec.",
+                                  step["name"], self.cycle["total"],
+                                  self.timing[step["name"]])
                 step["next"] = self.at + interval
+                if (self.watching and step["name"] == "work_jobs"
+                        and not ret):
+                    step["next"] = self.idle_until()
+        self.woken = False
+
+    def idle_until(self):
+        """
+        Returns the timestamp when the idle worker watching ``sys.queue``
+        must look for the next job without notification. This is the
+        ``query_at`` timestamp of the next deferred or failed job, but not
+        later than config setting ``worker.change_stream_timeout``.
+
+        :return: timestamp (:class:`datetime.datetime`)
+        """
+        until = self.at + timedelta(
+            seconds=self.config.worker.change_stream_timeout)
+        doc = self.config.sys.queue.find_one(
+            filter={
+                "state": {"$in": [
+                    core4.queue.job.STATE_PENDING,
+                    core4.queue.job.STATE_FAILED,
+                    core4.queue.job.STATE_DEFERRED]},
+                "locked": None,
+                "query_at": {"$gt": self.at}
+            },
+            projection=["query_at"],
+            sort=[("query_at", pymongo.ASCENDING)]
+        )
+        if doc is not None:
+            until = min(until, doc["query_at"])
+        return until
+
+    def wait_timeout(self):
+        """
+        Returns the seconds until the next step of the execution plan is due,
+        see :meth:`.CoreDaemon.wait`. Since steps are executed at second
+        granularity, the timeout is rounded up to the next full second and
+        does not exceed the daemon heartbeat.
+
+        :return: seconds (float)
+        """
+        due = min([step["next"] for step in self.plan])
+        if due.microsecond:
+            due = due.replace(microsecond=0) + timedelta(seconds=1)
+        timeout = (due - core4.util.node.mongo_now()).total_seconds()
+        return min(max(timeout, self.wait_time),
+                   self.config.daemon.heartbeat)
 
     def work_jobs(self):
         """
         This method is part of the main
         :meth:`loop <core4.queue.daemon.CoreDaemon.loop>` phase of the worker.
 
-        The step queries and handles the best next job from ``sys.queue`` (see
-        :meth:`.get_next_job` and :meth:`.start_job`). Furthermore this method
-        *inactivates* jobs.
+        The step queries and handles the best next jobs from ``sys.queue``
+        (see :meth:`.get_next_job` and :meth:`.start_job`) until all free job
+        slots of the worker are occupied (see :meth:`.free_slots`). Without
+        a job slot limit the step handles one job like before job slots have
+        been introduced. Furthermore this method *inactivates* jobs.
+
+        Project maintenance is queried once per step and cached for all jobs
+        of the batch, see :meth:`.project_maintenance`.
+
+        :return: ``True`` if a job has been processed, else ``None``
         """
-        doc = self.get_next_job()
-        if doc is None:
-            return
-        if not self.inactivate(doc):
-            self.start_job(doc)
+        free = self.free_slots()
+        if free is None:
+            free = 1
+        ret = None
+        self.maintenance_cache = self.queue.maintenance(True)
+        try:
+            while free > 0:
+                doc = self.get_next_job()
+                if doc is None:
+                    break
+                ret = True
+                if not self.inactivate(doc):
+                    self.start_job(doc)
+                    free -= 1
+        finally:
+            self.maintenance_cache = None
+        self.report_slots()
+        return ret
+
+    def project_maintenance(self):
+        """
+        Returns the projects in maintenance. Inside :meth:`.work_jobs` the
+        list cached at the beginning of the step is returned. Otherwise
+        ``sys.worker`` is queried, see :meth:`.CoreQueue.maintenance`.
+
+        :return: list of project names
+        """
+        if self.maintenance_cache is None:
+            return self.queue.maintenance(True)
+        return self.maintenance_cache
+
+    def free_slots(self):
+        """
+        Releases the job slots of all finished job processes and returns the
+        number of free job slots. The maximum number of concurrent job
+        processes of the worker is defined by config setting
+        ``worker.slots``. The default ``None`` does not limit the number of
+        job processes, which then depends on the worker's CPU and memory
+        checks only (see :meth:`.get_next_job`).
+
+        :return: number of free job slots, ``None`` without limit
+        """
+        for _id, proc in list(self.slot.items()):
+            try:
+                running = (proc.is_running()
+                           and proc.status() != psutil.STATUS_ZOMBIE)
+            except psutil.Error:
+                running = False
+            if not running:
+                del self.slot[_id]
+                self.reserved.pop(_id, None)
+        if self.config.worker.slots is None:
+            return None
+        return max(0, self.config.worker.slots - len(self.slot))
+
+    def occupy_slot(self, _id, pid):
+        """
+        Occupies a job slot with the job process launched by
+        :meth:`.start_job`. If the process is gone already, the job's
+        reservation is released, see :meth:`.running_count`.
+
+        :param _id: job ``_id``
+        :param pid: process id of the job
+        """
+        try:
+            self.slot[_id] = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            self.logger.debug("job [%s] with pid [%d] gone", _id, pid)
+            self.reserved.pop(_id, None)
+
+    def restore_slots(self):
+        """
+        Restores the job slots and reservations of jobs still running from a
+        previous start of the worker with the same ``.identifier``.
+        """
+        cur = self.config.sys.queue.find(
+            {
+                "state": core4.queue.job.STATE_RUNNING,
+                "locked.worker": self.identifier
+            },
+            projection=["name", "locked.pid"])
+        for doc in cur:
+            pid = doc["locked"].get("pid")
+            if pid:
+                self.reserved[doc["_id"]] = doc["name"]
+                self.occupy_slot(doc["_id"], pid)
+
+    def report_slots(self):
+        """
+        Saves the current job slot occupancy of the worker in ``sys.worker``
+        if changed::
+
+            {
+                "slot": {
+                    "max": <int>,
+                    "used": <int>
+                }
+            }
+        """
+        occupancy = {
+            "max": self.config.worker.slots,
+            "used": len(self.slot)
+        }
+        if occupancy != self.occupancy:
+            self.config.sys.worker.update_one(
+                {"_id": self.identifier}, update={"$set": {"slot": occupancy}})
+            self.occupancy = occupancy
 
     def inactivate(self, doc):
         """
@@ -173,14 +390,18 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
             if doc.get("inactive_at", None):
                 if doc["inactive_at"] <= self.at:
                     update = {
-                        "state": core4.queue.job.STATE_INACTIVE
+                        "state": core4.queue.job.STATE_INACTIVE,
+                        "locked": None
                     }
                     ret = self.config.sys.queue.update_one(
                         filter={"_id": doc["_id"]}, update={"$set": update})
                     if ret.raw_result["n"] != 1:
                         raise RuntimeError(
                             "failed to inactivate job [{}]".format(doc["_id"]))
+                    self.queue.count_state(doc["state"],
+                                           core4.queue.job.STATE_INACTIVE)
                     self.queue.unlock_job(doc["_id"])
+                    self.reserved.pop(doc["_id"], None)
                     self.queue.make_stat('inactivate_job', str(doc["_id"]))
                     self.logger.error("done execution with [inactive] - [%s] "
                                       "with [%s]", doc["name"], doc["_id"])
@@ -216,20 +437,279 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
             raise RuntimeError(
                 "failed to update job [{}] state [starting]".format(
                     doc["_id"]))
+        self.queue.count_state(doc["state"], core4.queue.job.STATE_RUNNING)
         self.queue.make_stat('request_start_job', str(doc["_id"]))
         self.logger.info("launching [%s] with _id [%s]", doc["name"],
                          doc["_id"])
         if run_async:
-            core4.service.introspect.main.exec_project(
-                doc["name"], EXECUTE, wait=False, job_id=str(doc["_id"]))
+            pid = self.fork_job(doc)
+            if pid is None:
+                proc = core4.service.introspect.main.exec_project(
+                    doc["name"], EXECUTE, wait=False, job_id=str(doc["_id"]),
+                    worker=self.identifier, trial=update["trial"])
+                pid = proc.pid
+            if pid:
+                self.occupy_slot(doc["_id"], pid)
+            else:
+                self.reserved.pop(doc["_id"], None)
         else:
             from core4.queue.process import CoreWorkerProcess
-            CoreWorkerProcess().start(doc["_id"], redirect=False, manual=True)
+            CoreWorkerProcess().start(
+                doc["_id"], redirect=False, manual=True,
+                worker=self.identifier, trial=update["trial"])
+            self.reserved.pop(doc["_id"], None)
+
+    def fork_job(self, doc):
+        """
+        Launches the job with the project's fork server if config setting
+        ``worker.fork_server`` is ``True`` (see :mod:`core4.queue.forkserver`).
+        The fork server is started with the first job of the project and
+        restarted after the project has been deployed. Until the fork server
+        is available, jobs are launched with a fresh Python interpreter (see
+        :meth:`.start_job`).
+
+        If the fork request fails after it has been sent, the job is
+        re-queued unless the job process has started already, see
+        :meth:`.release_fork`.
+
+        :param doc: job document to launch
+        :return: pid of the forked job process, ``0`` if the fork request
+                 failed after it has been sent and the job has been
+                 re-queued, ``None`` if the job has not been forked
+        """
+        if not self.config.worker.fork_server:
+            return None
+        project = doc["name"].split(".")[0]
+        server = self.fork_server.get(project)
+        if server is None or not server.alive():
+            if server is not None and server.proc is not None:
+                self.logger.warning("fork server [%s] died", project)
+            server = core4.queue.forkserver.CoreForkServer(project)
+            server.start()
+            self.fork_server[project] = server
+            return None
+        try:
+            pid = server.execute(str(doc["_id"]), worker=self.identifier,
+                                 trial=doc["trial"] + 1)
+        except OSError:
+            self.logger.debug("fork server [%s] not available", project)
+            return None
+        except RuntimeError:
+            # the request has been sent, launching again risks duplicates
+            self.logger.critical(
+                "failed to fork [%s] with _id [%s]", doc["name"], doc["_id"],
+                exc_info=True)
+            return self.release_fork(doc)
+        self.logger.debug("forked [%s] with _id [%s] and pid [%d]",
+                          doc["name"], doc["_id"], pid)
+        return pid
+
+    def release_fork(self, doc):
+        """
+        Re-queues the job of a failed fork request with its state before
+        :meth:`.start_job`. The job is re-queued only if the job process has
+        not started, i.e. it has not set ``locked.pid``. A job process
+        starting after the job has been re-queued does not match the
+        ``locked.worker``, ``trial`` and ``locked.pid`` of the job's claim
+        anymore and terminates without execution, see
+        :meth:`.CoreWorkerProcess.start`.
+
+        :param doc: job document of the failed fork request
+        :return: pid of the job process if it has started, else ``0``
+        """
+        ret = self.config.sys.queue.update_one(
+            filter={
+                "_id": doc["_id"],
+                "state": core4.queue.job.STATE_RUNNING,
+                "locked.worker": self.identifier,
+                "locked.pid": None
+            },
+            update={
+                "$set": {
+                    "state": doc["state"],
+                    "started_at": doc.get("started_at"),
+                    "query_at": None,
+                    "trial": doc["trial"],
+                    "locked": None
+                }
+            })
+        if ret.raw_result["n"] == 1:
+            self.queue.count_state(core4.queue.job.STATE_RUNNING,
+                                   doc["state"])
+            self.queue.unlock_job(doc["_id"])
+            self.logger.warning("re-queued [%s] with _id [%s]", doc["name"],
+                                doc["_id"])
+            return 0
+        data = self.config.sys.queue.find_one(
+            {"_id": doc["_id"]}, projection=["locked"])
+        return ((data or {}).get("locked") or {}).get("pid") or 0
 
     def get_next_job(self):
         """
-        Queries the best next job from collection ``sys.queue``. This method
-        filters and orders jobs with the following properties:
+        Queries and reserves the best next job from collection ``sys.queue``.
+        This method filters and orders jobs with the following properties:
+
+        **filter:**
+
+        * not ``locked``
+        * with ``attempts_left``
+        * in waiting state (``pending``, ``failed`` or ``deferred``)
+        * eligable for this or all worker (``.identifier``)
+        * not removed, yet (``.removed_at``)
+        * not killed, yet (``.killed_at``)
+        * with no or past query time (``.query_at``)
+        * not in project maintenance
+        * below the job's ``max_parallel`` limit on this worker
+
+        **sort order:**
+
+        * ``.force``
+        * ``.priority``
+        * enqueue date/time (job ``.id`` sort order)
+
+        With config setting ``worker.atomic_claim`` (default) the job is
+        reserved with a single atomic ``find_one_and_update`` on
+        ``sys.queue``, see :meth:`.claim_next_job`. Otherwise the worker falls
+        back to scan candidates with the ``sys.lock`` reservation, see
+        :meth:`.scan_next_job`.
+
+        :return: job document from collection ``sys.queue``
+        """
+        if self.config.worker.atomic_claim:
+            return self.claim_next_job()
+        return self.scan_next_job()
+
+    def _claim_filter(self):
+        # internal method used by .claim_next_job to build the eligibility
+        # filter of the atomic claim
+        query = [
+            {'locked': None},
+            {'attempts_left': {'$gt': 0}},
+            {'state': {'$in': [
+                core4.queue.job.STATE_PENDING,
+                core4.queue.job.STATE_FAILED,
+                core4.queue.job.STATE_DEFERRED]}},
+            {'worker': {'$in': [self.identifier, None]}},
+            {'removed_at': None},
+            {'killed_at': None},
+            {'$or': [{'query_at': {'$lte': self.at}},
+                     {'query_at': None}]},
+        ]
+        maintenance = self.project_maintenance()
+        if maintenance:
+            query.append({'name': {'$not': re.compile(
+                r"^(?:{})\.".format("|".join(
+                    re.escape(p) for p in maintenance)))}})
+        for name, count in self.running_count().items():
+            query.append({'$or': [
+                {'name': {'$ne': name}},
+                {'max_parallel': None},
+                {'max_parallel': {'$gt': count}}
+            ]})
+        return query
+
+    def running_count(self):
+        """
+        Counts the jobs reserved by this worker by job name. This count is
+        used to verify the job's ``max_parallel`` limit.
+
+        The count is maintained in memory: jobs are added with their claim
+        and removed if their claim is released, they are inactivated or
+        their job process finished (see :meth:`.free_slots`).
+
+        :return: dict of job ``name`` and count
+        """
+        return dict(collections.Counter(self.reserved.values()))
+
+    def claim_next_job(self):
+        """
+        Reserves the best next job with one atomic ``find_one_and_update`` on
+        ``sys.queue``. Eligibility, priority and force ordering, and the
+        ``locked`` reservation are folded into the update. Concurrent workers
+        therefore never compete for the same candidate.
+
+        If the worker runs short of resources, only jobs with ``force`` are
+        claimed.
+
+        The successful claim is finally mirrored into ``sys.lock`` to keep
+        the exclusive reservation with the removal, kill and restart
+        management of :class:`.CoreQueue`. If this fails, the claim is
+        released and the next candidate is claimed.
+
+        :return: job document from collection ``sys.queue`` as before the
+                 claim, ``None`` if no job is eligible
+        """
+        query = self._claim_filter()
+        cur_stats = self.avg_stats()
+        if ((cur_stats[0] > self.config.worker.max_cpu)
+                or (cur_stats[1] < self.config.worker.min_free_ram)):
+            doc = self.config.sys.queue.find_one(
+                filter={'$and': query + [{'force': {'$ne': True}}]},
+                projection=["name"], sort=CLAIM_ORDER)
+            if doc is not None:
+                self.logger.info(
+                    'skipped job [%s] with _id [%s]: '
+                    'not enough resources available: '
+                    'cpu [%1.1f], memory [%1.1f]',
+                    doc["name"], doc["_id"], *cur_stats[:2])
+            query.append({'force': True})
+        skip = []
+        while True:
+            if skip:
+                query.append({'_id': {'$nin': skip}})
+            data = self.config.sys.queue.find_one_and_update(
+                filter={'$and': query},
+                update={'$set': {'locked': {
+                    "at": self.at,
+                    "heartbeat": self.at,
+                    "hostname": self.hostname,
+                    "pid": None,
+                    "worker": self.identifier
+                }}},
+                sort=CLAIM_ORDER,
+                return_document=pymongo.ReturnDocument.BEFORE)
+            if skip:
+                query.pop(-1)
+            if data is None:
+                return None
+            if self.queue.lock_job(self.identifier, data["_id"]):
+                self.reserved[data["_id"]] = data["name"]
+                self.logger.debug('successfully claimed [%s]', data["_id"])
+                return data
+            self.release_claim(data["_id"])
+            self.logger.debug('skipped job [%s] due to lock failure',
+                              data["_id"])
+            skip.append(data["_id"])
+
+    def release_claim(self, _id=None):
+        """
+        Releases claimed jobs which have not been started, yet, by resetting
+        their ``locked`` attribute.
+
+        :param _id: job ``_id`` to release, ``None`` releases all jobs claimed
+                    by this worker
+        :return: number of released jobs
+        """
+        query = {
+            "locked.worker": self.identifier,
+            "state": {"$ne": core4.queue.job.STATE_RUNNING}
+        }
+        if _id is not None:
+            query["_id"] = _id
+            self.reserved.pop(_id, None)
+        else:
+            self.reserved = dict([(i, n) for (i, n) in self.reserved.items()
+                                  if i in self.slot])
+        ret = self.config.sys.queue.update_many(
+            query, update={"$set": {"locked": None}})
+        return ret.modified_count
+
+    def scan_next_job(self):
+        """
+        Scans for the best next job in collection ``sys.queue``. This is the
+        fallback of :meth:`.get_next_job` with config setting
+        ``worker.atomic_claim`` set to ``False``. The method filters and
+        orders jobs with the following properties:
 
         **filter:**
 
@@ -273,11 +753,7 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
             {'$or': [{'query_at': {'$lte': self.at}},
                      {'query_at': None}]},
         ]
-        order = [
-            ('force', pymongo.DESCENDING),
-            ('priority', pymongo.DESCENDING),
-            ('_id', pymongo.ASCENDING)
-        ]
+        order = CLAIM_ORDER
         if self.offset:
             cur2 = self.config.sys.queue.find(
                 filter={'$and': query + [{"_id": {"$lte": self.offset}}]},
@@ -315,7 +791,7 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
                         "next job from prioritised top chunk [%s]",
                         data["_id"])
             project = data["name"].split(".")[0]
-            if self.queue.maintenance(project):
+            if project in self.project_maintenance():
                 self.logger.debug(
                     "skipped job [%s] in maintenance", data["_id"])
                 continue
@@ -333,10 +809,9 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
                     return None
 
             # check max_parallel
-            count = self.config.sys.queue.count_documents(
-                filter={'name': data["name"],
-                        "locked.worker": self.identifier})
-            if count >= data["max_parallel"]:
+            count = self.running_count().get(data["name"], 0)
+            if (data["max_parallel"] is not None
+                    and count >= data["max_parallel"]):
                 continue
             # acquire lock
             if not self.queue.lock_job(self.identifier, data["_id"]):
@@ -345,6 +820,7 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
                 continue
 
             self.offset = data["_id"]
+            self.reserved[data["_id"]] = data["name"]
             self.logger.debug('successfully reserved [%s]', data["_id"])
             return data
 
@@ -355,34 +831,71 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
 
         The processing step queries all jobs with a specified ``removed_at``
         attribute. After successful job lock, the job is moved from
-        ``sys.queue`` into ``sys.journal``.
+        ``sys.queue`` into ``sys.journal``. Jobs are processed in batches of
+        config setting ``worker.remove_batch`` jobs, see
+        :meth:`.remove_batch`.
 
         .. note:: This method does not unlock the job from ``sys.lock``. This
                   special behavior is required to prevent race conditions
                   between multiple workers simultaneously removing *and*
                   locking the job between ``sys.queue`` and ``sys.lock``.
         """
-
         cur = self.config.sys.queue.find(
             {"removed_at": {"$ne": None}}
         )
+        batch = []
         for doc in cur:
-            if self.queue.lock_job(self.identifier, doc["_id"]):
-                if self.queue.journal(doc):
-                    ret = self.config.sys.queue.delete_one({"_id": doc["_id"]})
-                    if ret.raw_result["n"] != 1:
-                        raise RuntimeError(
-                            "failed to remove job [{}]".format(doc["_id"]))
-                    self.queue.make_stat('remove_job', str(doc["_id"]))
-                    self.logger.info(
-                        "successfully journaled and removed job [%s]",
-                        doc["_id"])
-                    # note: we will not unlock the job to prevent race
-                    # conditions with other workds; this will be settled
-                    # with .cleanup
-                    continue
+            batch.append(doc)
+            if len(batch) >= self.config.worker.remove_batch:
+                self.remove_batch(batch)
+                batch = []
+        if batch:
+            self.remove_batch(batch)
+
+    def remove_batch(self, docs):
+        """
+        Locks, journals and removes the passed job documents with one
+        ``insert_many`` into ``sys.lock`` and ``sys.journal`` and one
+        ``delete_many`` from ``sys.queue``. One ``remove_job`` event is
+        triggered per batch.
+
+        An interrupted batch is safely retried with the next
+        :meth:`.remove_jobs` cycle. Jobs already locked by the worker in
+        ``sys.lock`` are considered locked and jobs already journaled are
+        considered journaled. Jobs reserved by the worker itself are skipped.
+        Like with :meth:`.CoreQueue.lock_job` the reservation in ``sys.lock``
+        decides, so jobs with a stale ``locked`` attribute, e.g. from a dead
+        worker, are removed, too.
+
+        :param docs: list of ``sys.queue`` documents
+        :return: number of removed jobs
+        """
+        locked = self.queue.lock_many(
+            self.identifier,
+            [doc["_id"] for doc in docs if doc["_id"] not in self.reserved])
+        docs = [doc for doc in docs if doc["_id"] in locked]
+        journaled = self.queue.journal_many(docs)
+        for doc in docs:
+            if doc["_id"] not in journaled:
                 self.logger.error(
                     "failed to journal and remove job [%s]", doc["_id"])
+        docs = [doc for doc in docs if doc["_id"] in journaled]
+        if not docs:
+            return 0
+        ret = self.config.sys.queue.delete_many(
+            {"_id": {"$in": [doc["_id"] for doc in docs]}})
+        if ret.deleted_count != len(docs):
+            self.logger.error("removed [%d] of [%d] jobs",
+                              ret.deleted_count, len(docs))
+        count = collections.Counter([doc["state"] for doc in docs])
+        for state, n in count.items():
+            self.queue.count_state(old=state, n=n)
+        self.queue.make_stat('remove_job', [str(doc["_id"]) for doc in docs])
+        self.logger.info("successfully journaled and removed [%d] jobs",
+                         ret.deleted_count)
+        # note: we will not unlock the jobs to prevent race conditions with
+        # other workers; this will be settled with .cleanup
+        return ret.deleted_count
 
     def flag_jobs(self):
         """
@@ -390,59 +903,112 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
         :meth:`loop <core4.queue.daemon.CoreDaemon.loop>` phase of the worker.
 
         The method queries all jobs in state ``running`` locked by the current
-        worker and forward processing to
+        worker and all waiting jobs requested to be killed with one query,
+        takes one snapshot of the OS process table (see
+        :meth:`.process_table`) and forwards processing to
 
         #. identify and flag non-stopping jobs (see :meth:`.flag_nonstop`),
         #. identify and flag zombies (see :meth:`.flag_zombie`),
         #. identify and handle died jobs (see :meth:`.check_pid`), and to
         #. manage jobs requested to be kill (see :meth:`.kill_pid` and
            :meth:`.check_kill`)
+
+        All non-stop and zombie flags are saved with one ``bulk_write``. The
+        runtime of each of these phases is logged.
         """
+        timing = []
+        t0 = time.perf_counter()
         cur = self.config.sys.queue.find(
             {
-                "state": core4.queue.job.STATE_RUNNING,
-                "locked.worker": self.identifier
+                "$or": [
+                    {
+                        "state": core4.queue.job.STATE_RUNNING,
+                        "locked.worker": self.identifier
+                    },
+                    {
+                        "state": {"$in": [
+                            core4.queue.job.STATE_PENDING,
+                            core4.queue.job.STATE_DEFERRED,
+                            core4.queue.job.STATE_FAILED
+                        ]},
+                        "killed_at": {
+                            "$ne": None
+                        }
+                    }
+                ]
             },
             projection=[
                 "_id", "wall_time", "wall_at", "zombie_time", "zombie_at",
                 "started_at", "locked.heartbeat", "locked.pid", "killed_at",
-                "name"
+                "name", "state"
             ]
         )
+        running = []
+        waiting = []
         for doc in cur:
-            self.flag_nonstop(doc)
-            self.flag_zombie(doc)
-            self.check_pid(doc)
-            self.kill_pid(doc)
-        self.check_kill()
+            if doc["state"] == core4.queue.job.STATE_RUNNING:
+                running.append(doc)
+            else:
+                waiting.append(doc)
+        timing.append(("query", time.perf_counter() - t0))
+        t0 = time.perf_counter()
+        table = self.process_table() if running or waiting else {}
+        timing.append(("snapshot", time.perf_counter() - t0))
+        t0 = time.perf_counter()
+        nonstop = [doc["_id"] for doc in running if self.flag_nonstop(doc)]
+        zombie = [doc["_id"] for doc in running if self.flag_zombie(doc)]
+        timing.append(("compute", time.perf_counter() - t0))
+        t0 = time.perf_counter()
+        self.save_flags(nonstop, zombie)
+        timing.append(("flag", time.perf_counter() - t0))
+        t0 = time.perf_counter()
+        for doc in running:
+            self.check_pid(doc, table)
+            self.kill_pid(doc, table)
+        self.check_kill(waiting, table)
+        timing.append(("kill", time.perf_counter() - t0))
+        self.logger.debug(
+            "flagged [%d] running and [%d] waiting jobs with %s",
+            len(running), len(waiting), ", ".join(
+                ["{} [{:1.3f}] sec.".format(*t) for t in timing]))
 
-    def check_kill(self):
+    def save_flags(self, nonstop, zombie):
         """
-        Identifies jobs requested to be killed in waiting state (``pending``,
+        Saves the non-stop (``wall_at``) and zombie (``zombie_at``) flags of
+        the passed jobs with one ``bulk_write`` into ``sys.queue``. One
+        ``flag_nonstop`` and ``flag_zombie`` event is triggered per flag.
+
+        :param nonstop: list of job ``_id`` flagged as non-stopping
+        :param zombie: list of job ``_id`` flagged as zombies
+        """
+        now = core4.util.node.mongo_now()
+        requests = []
+        for attr, _id in (("wall_at", nonstop), ("zombie_at", zombie)):
+            if _id:
+                requests.append(pymongo.UpdateMany(
+                    {"_id": {"$in": _id}, attr: None},
+                    {"$set": {attr: now}}))
+        if not requests:
+            return
+        self.config.sys.queue.bulk_write(requests, ordered=False)
+        for event, kind, _id in (("flag_nonstop", "non-stop", nonstop),
+                                 ("flag_zombie", "zombie", zombie)):
+            for i in _id:
+                self.logger.warning("successfully set %s job [%s]", kind, i)
+            if _id:
+                self.queue.make_stat(event, [str(i) for i in _id])
+
+    def check_kill(self, docs, table):
+        """
+        Handles jobs requested to be killed in waiting state (``pending``,
         ``deferred`` or ``failed``).
 
-        :param doc: job MongoDB document
+        :param docs: list of job MongoDB documents
+        :param table: process table, see :meth:`.process_table`
         """
-        cur = self.config.sys.queue.find(
-            {
-                "state": {"$in": [
-                    core4.queue.job.STATE_PENDING,
-                    core4.queue.job.STATE_DEFERRED,
-                    core4.queue.job.STATE_FAILED
-                ]},
-                "killed_at": {
-                    "$ne": None
-                }
-            },
-            projection=[
-                "_id", "wall_time", "wall_at", "zombie_time", "zombie_at",
-                "started_at", "locked.heartbeat", "locked.pid", "killed_at",
-                "name"
-            ]
-        )
-        for doc in cur:
+        for doc in docs:
             if self.queue.lock_job(self.identifier, doc["_id"]):
-                self.kill_pid(doc)
+                self.kill_pid(doc, table)
 
     def flag_nonstop(self, doc):
         """
@@ -454,19 +1020,13 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
                   action.
 
         :param doc: job MongoDB document
+        :return: ``True`` if the job is to be flagged, else ``False``
         """
         if doc["wall_time"] and not doc["wall_at"]:
             if doc["started_at"] < (self.at
                                     - timedelta(seconds=doc["wall_time"])):
-                ret = self.config.sys.queue.update_one(
-                    filter={
-                        "_id": doc["_id"]
-                    },
-                    update={"$set": {"wall_at": core4.util.node.mongo_now()}})
-                if ret.raw_result["n"] == 1:
-                    self.logger.warning(
-                        "successfully set non-stop job [%s]", doc["_id"])
-                self.queue.make_stat('flag_nonstop', str(doc["_id"]))
+                return True
+        return False
 
     def flag_zombie(self, doc):
         """
@@ -474,76 +1034,83 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
         ``.locked`` attribute) for date/time range specified in the
         ``.zombie_time`` attribute.
 
-        The jobs' :meth:`.progress <core4.queue.job.CoreJob.progress>` method
-        updates the ``heartbeat``. Therefore job developers are expected to
-        call this method for long-running algorithms regularly.
+        The :class:`.JobHeartbeat` thread of the job process updates the
+        ``heartbeat`` once per ``progress_interval``, independent of the
+        jobs' :meth:`.progress <core4.queue.job.CoreJob.progress>` calls.
+        Therefore ``zombie_time`` must exceed ``progress_interval``.
 
         .. note:: The ``zombie_at`` attribute represents the timestamp when
                   the job was flagged. Job execution continues without further
                   action.
 
         :param doc: job MongoDB document
+        :return: ``True`` if the job is to be flagged, else ``False``
         """
         if not doc["zombie_at"]:
             if doc["locked"]["heartbeat"] < (self.at - timedelta(
                     seconds=doc["zombie_time"])):
-                ret = self.config.sys.queue.update_one(
-                    filter={
-                        "_id": doc["_id"]
-                    },
-                    update={
-                        "$set": {"zombie_at": core4.util.node.mongo_now()}
-                    }
-                )
-                if ret.raw_result["n"] == 1:
-                    self.logger.warning(
-                        "successfully set zombie job [%s]", doc["_id"])
-                self.queue.make_stat('flag_zombie', str(doc["_id"]))
+                return True
+        return False
 
-    def check_pid(self, doc):
+    def check_pid(self, doc, table):
         """
         Identifies and handles died jobs. If the job PID does not exists, the
         job is flagged ``killed_at`` in ``sys.queue``.
 
         :param doc: job MongoDB document
+        :param table: process table, see :meth:`.process_table`
         """
-        if "locked" in doc and doc["locked"]["pid"] is not None:
-            (found, _) = self.pid_exists(doc)
+        if (doc.get("locked") or {}).get("pid") is not None:
+            (found, _) = self.pid_exists(doc, table)
             if not found:
                 self.logger.error("pid [%s] not exists, killing",
                                   doc["locked"]["pid"])
                 self.queue.exec_kill(doc)
 
-    def kill_pid(self, doc):
+    def kill_pid(self, doc, table):
         """
         Handles jobs which have been requested to be killed. If the process
         exists, then it is killed and the job state is set to ``killed``.
 
         :param doc: job MongoDB document
+        :param table: process table, see :meth:`.process_table`
         """
         if doc["killed_at"]:
-            (found, proc) = self.pid_exists(doc)
+            (found, proc) = self.pid_exists(doc, table)
             if found and proc:
                 proc.kill()
             self.queue.exec_kill(doc)
 
-    def pid_exists(self, doc):
+    def process_table(self):
         """
-        Returns ``True`` if the job exists and its OS state is *DEAD* or
-        *ZOMBIE*. The :class:`psutil.Process` object is also returned for
-        further action.
+        Takes one snapshot of the OS process table with
+        :func:`psutil.process_iter`.
+
+        :return: dict of pid and :class:`psutil.Process` of all processes not
+                 in OS state *DEAD* or *ZOMBIE*
+        """
+        table = {}
+        for proc in psutil.process_iter(attrs=["status"]):
+            if proc.info["status"] not in (psutil.STATUS_DEAD,
+                                           psutil.STATUS_ZOMBIE):
+                table[proc.pid] = proc
+        return table
+
+    def pid_exists(self, doc, table):
+        """
+        Returns ``True`` if the job process exists in the passed process
+        table and its OS state is not *DEAD* or *ZOMBIE*. The
+        :class:`psutil.Process` object is also returned for further action.
 
         :param doc: job MongoDB document
+        :param table: process table, see :meth:`.process_table`
         :return: tuple of ``True`` or ``False`` and the job process or None
         """
-        proc = None
-        if "locked" in doc and doc["locked"]["pid"] is not None:
-            if psutil.pid_exists(doc["locked"]["pid"]):
-                proc = psutil.Process(doc["locked"]["pid"])
-                if proc.status() not in (psutil.STATUS_DEAD,
-                                         psutil.STATUS_ZOMBIE):
-                    return True, proc
-        return False, proc
+        if (doc.get("locked") or {}).get("pid") is not None:
+            proc = table.get(doc["locked"]["pid"])
+            if proc is not None:
+                return True, proc
+        return False, None
 
     def collect_stats(self):
         """
@@ -557,6 +1124,16 @@ class CoreWorker(CoreDaemon, core4.queue.query.QueryMixin):
             (min(psutil.cpu_percent(percpu=True)),
              psutil.virtual_memory()[4] / 2. ** 20))
 
+    def reconcile_count(self):
+        """
+        This method is part of the main
+        :meth:`loop <core4.queue.daemon.CoreDaemon.loop>` phase of the worker.
+
+        Reconciles the job state counters in ``sys.count`` with the actual job
+        states in ``sys.queue``, see :meth:`.CoreQueue.reconcile_count`.
+        """
+        self.queue.reconcile_count()
+
     def avg_stats(self):
         """
         :return: tuple of average cpu and memory over the time configured in
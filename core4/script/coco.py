@@ -74,8 +74,6 @@ from bson.objectid import ObjectId
 from docopt import docopt
 
 import core4
-import core4.api.v1.tool
-import core4.api.v1.tool.functool
 import core4.error
 import core4.logger.mixin
 import core4.queue.helper.functool
@@ -84,10 +82,8 @@ import core4.queue.main
 import core4.queue.scheduler
 import core4.queue.worker
 import core4.service.introspect.main
-import core4.service.project
 import core4.util.data
 import core4.util.node
-from core4.service.operation import build, release, dist, cran
 
 QUEUE = core4.queue.main.CoreQueue()
 
@@ -107,7 +103,8 @@ def worker(name):
 def app(**kwargs):
     core4.logger.mixin.logon()
     kwargs["debug"] = False
-    core4.api.v1.tool.functool.serve_all(**kwargs)
+    from core4.api.v1.tool.functool import serve_all
+    serve_all(**kwargs)
 
 
 def scheduler(name):
@@ -365,7 +362,8 @@ def enqueue(qual_name, *args):
 
 
 def init(name, description, yes, core4_source):
-    core4.service.project.make_project(name, description, yes, core4_source)
+    from core4.service.project import make_project
+    make_project(name, description, yes, core4_source)
 
 
 def jobs(introspect=False):
@@ -487,12 +485,16 @@ def main():
     elif args["--mode"]:
         mode()
     elif args["--build"]:
+        from core4.service.operation import build
         build()
     elif args["--dist"]:
+        from core4.service.operation import dist
         dist(args["--force"] or False)
     elif args["--cran"]:
+        from core4.service.operation import cran
         cran()
     elif args["--release"]:
+        from core4.service.operation import release
         release()
     elif args["--who"]:
         who()
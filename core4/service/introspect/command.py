@@ -28,12 +28,27 @@ if job:
     print(job._id)
 """
 
+#: command used to enqueue multiple jobs with :meth:`.CoreQueue.enqueue_many`
+ENQUEUE_MANY = """
+import json
+from core4.queue.main import CoreQueue
+queue = CoreQueue()
+ret = queue.enqueue_many(name="{qual_name:s}", args={args:s}, by={by:s})
+print(json.dumps([None if i is None else str(i) for i in ret]))
+"""
+
 #: command used to start job processing with :meth:`.CoreWorkerProecess.start`
 EXECUTE = """
 import signal
 signal.signal(signal.SIGCHLD, signal.SIG_DFL)
 from core4.queue.process import CoreWorkerProcess
-CoreWorkerProcess().start("{job_id:s}")
+CoreWorkerProcess().start("{job_id:s}", worker={worker!r}, trial={trial:d})
+"""
+
+#: command used to launch the job fork server of :mod:`core4.queue.forkserver`
+FORKSERVER = """
+from core4.queue.forkserver import serve
+serve("{address:s}", "{project:s}")
 """
 
 #: command used to kill a job with :meth:`.CoreQueue._exec_kill`
@@ -15,10 +15,7 @@ import subprocess
 import sys
 import traceback
 
-from pip import __version__ as pip_version
-
 import core4
-import core4.api.v1.application
 import core4.base
 from core4.base.main import CoreAbstractMixin
 import core4.error
@@ -31,15 +28,11 @@ import core4.util.node
 from core4.const import VENV_PYTHON
 from core4.service.introspect.command import ITERATE
 
-try:
-    from pip import main as pipmain
-except ImportError:
-    from pip._internal import main as pipmain
 
-try:
-    from pip._internal.operations import freeze
-except ImportError:
-    from pip.operations import freeze
+def _api_container():
+    # internal helper to import the API container class on first use
+    from core4.api.v1.application import CoreApiContainer
+    return CoreApiContainer
 
 
 class CoreProject(core4.base.CoreBase):
@@ -155,7 +148,7 @@ class CoreProject(core4.base.CoreBase):
         Retrieves information about implemented :class:`.CoreApiContainer`.
         """
         for cls in self._seen:
-            if issubclass(cls, core4.api.v1.application.CoreApiContainer):
+            if issubclass(cls, _api_container()):
                 filename = cls.module().__file__
                 qual_name = cls.qual_name()
                 try:
@@ -219,20 +212,20 @@ class CoreProject(core4.base.CoreBase):
         #   - core4.queue.job.CoreJob
         #   - core4.api.v1.application.CoreApiContainer
         members = inspect.getmembers(module, inspect.isclass)
+        api_container = _api_container()
         for (clsname, cls) in members:
             if (issubclass(cls, core4.base.main.CoreBase)
                     and CoreAbstractMixin not in cls.__bases__):
                 if cls is core4.queue.job.CoreJob:
                     continue
-                if cls is core4.api.v1.application.CoreApiContainer:
+                if cls is api_container:
                     continue
                 if cls in self._seen:
                     continue
                 if issubclass(
                         cls, core4.queue.job.CoreJob):
                     self.logger.debug("found job [%s]", cls.qual_name())
-                elif issubclass(
-                        cls, core4.api.v1.application.CoreApiContainer):
+                elif issubclass(cls, api_container):
                     self.logger.debug("found api container [%s]",
                                       cls.qual_name())
                 self._seen.add(cls)
@@ -335,7 +328,7 @@ class CoreIntrospector(core4.base.CoreBase, core4.queue.query.QueryMixin):
                 "core4_build": project.core4_build,
                 "python_version": self.get_python_version(),
                 "packages": dict(self.get_packages()),
-                "pip": pip_version,
+                "pip": self.get_pip_version(),
                 "jobs": list(project.jobs),
                 "api_containers": list(project.api_containers),
             } for project in self.project
@@ -429,12 +422,23 @@ class CoreIntrospector(core4.base.CoreBase, core4.queue.query.QueryMixin):
 
         :return: generator of (name, version) tuple
         """
+        try:
+            from pip._internal.operations import freeze
+        except ImportError:
+            from pip.operations import freeze
         for package in freeze.freeze():
             (name, *version) = package.split("==")
             if version:
                 version = version[0]
             yield (name, version or None)
 
+    def get_pip_version(self):
+        """
+        :return: version of :mod:`pip`
+        """
+        from pip import __version__
+        return __version__
+
     def get_python_version(self):
         """
         Returns major, minor and patch version of Python executable.
@@ -544,6 +548,28 @@ class CoreIntrospector(core4.base.CoreBase, core4.queue.query.QueryMixin):
             "daemon": list(self.iter_daemon())
         }
 
+    def get_python(self, name):
+        """
+        Returns the Python interpreter of the project's virtual environment.
+        Falls back to the current Python interpreter if ``config.folder.home``
+        is not specified or the project has no virtual environment.
+
+        :param name: qual_name to extract project name
+        :return: path to Python executable
+        """
+        project = name.split(".")[0]
+        home = self.get_home()
+        python_path = None
+        if home is not None:
+            python_path = os.path.join(home, project, VENV_PYTHON)
+            if not os.path.exists(python_path):
+                self.logger.warning("python not found at [%s]", python_path)
+                python_path = None
+        if python_path is None:
+            python_path = sys.executable
+        self.logger.debug("python found at [%s]", python_path)
+        return python_path
+
     def exec_project(self, name, command, wait=True, comm=False, replace=False,
                      *args, **kwargs):
         """
@@ -559,20 +585,11 @@ class CoreIntrospector(core4.base.CoreBase, core4.queue.query.QueryMixin):
         :param args: to be injected using Python method ``.format``
         :param kwargs: to be injected using Python method ``.format``
 
-        :return: STDOUT if ``wait is True``, else nothing is returned
+        :return: STDOUT if ``wait is True``, else the
+                 :class:`subprocess.Popen` process
         """
-        project = name.split(".")[0]
-        home = self.get_home()
-        python_path = None
+        python_path = self.get_python(name)
         currdir = os.path.abspath(os.curdir)
-        if home is not None:
-            python_path = os.path.join(home, project, VENV_PYTHON)
-            if not os.path.exists(python_path):
-                self.logger.warning("python not found at [%s]", python_path)
-                python_path = None
-        if python_path is None:
-            python_path = sys.executable
-        self.logger.debug("python found at [%s]", python_path)
         # os.chdir(os.path.join(home, project))
         cmd = command.format(*args, **kwargs)
         if wait:
@@ -607,6 +624,8 @@ class CoreIntrospector(core4.base.CoreBase, core4.queue.query.QueryMixin):
                     stdout = "null"
                 return stdout, stderr
             proc.wait()
+            return None
+        return proc
 
     def collect_job(self):
         """
@@ -693,7 +712,8 @@ def exec_project(name, command, wait=True, comm=False, replace=False, *args,
     :param replace: replace current process (defaults to ``False``).
     :param args: to be injected using Python method ``.format``
     :param kwargs: to be injected using Python method ``.format``
-    :return: STDOUT if ``wait is True``, else nothing is returned
+    :return: STDOUT if ``wait is True``, else the :class:`subprocess.Popen`
+             process
     """
     intro = CoreIntrospector()
     return intro.exec_project(name, command, wait, comm, replace, *args,
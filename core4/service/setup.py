@@ -16,7 +16,6 @@ import pymongo.errors
 from bson.objectid import ObjectId
 import core4.util.node
 import core4.const
-import core4.util.crypt
 from core4.base import CoreBase
 from core4.util.tool import Singleton
 
@@ -91,6 +90,7 @@ class CoreSetup(CoreBase, metaclass=Singleton):
         * ``api.user_realname``
         * ``api.user_permission``
         """
+        from core4.util.crypt import pwd_context
         if ((self.config.api.admin_username is None)
                 or (self.config.api.admin_password is None)
                 or (self.config.store.default.contact is None)):
@@ -99,11 +99,12 @@ class CoreSetup(CoreBase, metaclass=Singleton):
         data = (
             dict(
                 name=self.config.api.admin_username,
+                name_lower=self.config.api.admin_username.lower(),
                 realname=self.config.api.admin_realname,
                 is_active=True,
                 created=core4.util.node.mongo_now(),
                 updated=None,
-                password=core4.util.crypt.pwd_context.hash(
+                password=pwd_context.hash(
                     self.config.api.admin_password),
                 email=self.config.store.default.contact,
                 etag=ObjectId(),
@@ -111,6 +112,7 @@ class CoreSetup(CoreBase, metaclass=Singleton):
             ),
             dict(
                 name=self.config.api.user_rolename,
+                name_lower=self.config.api.user_rolename.lower(),
                 realname=self.config.api.user_realname,
                 etag=ObjectId(),
                 perm=self.config.api.user_permission,
@@ -131,6 +133,9 @@ class CoreSetup(CoreBase, metaclass=Singleton):
         Creates collection ``sys.queue`` and its index on ``name`` and
         ``_hash``. The ``_hash`` attribute ensures that jobs are unique with
         regard to their :meth:`.qual_name` and job arguments.
+
+        The ``claim`` index supports the sort order of the atomic job claim
+        with :meth:`.CoreWorker.get_next_job`.
         """
         if "job_args" not in self.config.sys.queue.index_information():
             self.config.sys.queue.create_index(
@@ -142,14 +147,35 @@ class CoreSetup(CoreBase, metaclass=Singleton):
                 name="job_args"
             )
             self.logger.info("created index [job_args] on [sys.queue]")
+        if "claim" not in self.config.sys.queue.index_information():
+            self.config.sys.queue.create_index(
+                [
+                    ("force", pymongo.DESCENDING),
+                    ("priority", pymongo.DESCENDING),
+                    ("_id", pymongo.ASCENDING)
+                ],
+                name="claim"
+            )
+            self.logger.info("created index [claim] on [sys.queue]")
 
     @once
     def make_stdout(self):
         """
         Creates collection ``sys.stdout`` and its TTL index on ``timestamp``.
         If config ``worker.stdout_ttl`` is ``None``, then any existing index
-        is removed.
+        is removed. The ``chunk`` index supports range reads of the job
+        STDOUT chunks, see :meth:`.QueryMixin.iter_job_stdout`.
         """
+        if "chunk" not in self.config.sys.stdout.index_information():
+            self.config.sys.stdout.create_index(
+                [
+                    ("job_id", pymongo.ASCENDING),
+                    ("offset", pymongo.ASCENDING)
+                ],
+                name="chunk",
+                unique=True,
+                partialFilterExpression={"job_id": {"$exists": True}})
+            self.logger.info("created index [chunk] on [sys.stdout]")
         ttl = self.config.worker.stdout_ttl
         if ttl:
             if "ttl" not in self.config.sys.stdout.index_information():
@@ -166,9 +192,28 @@ class CoreSetup(CoreBase, metaclass=Singleton):
     @once
     def make_role(self):
         """
-        Creates collection ``sys.role`` and its index on ``user`` and
-        ``email``.
+        Creates collection ``sys.role`` and its index on ``user``, lower case
+        ``name_lower`` and ``email``. Roles without ``name_lower`` are
+        migrated.
         """
+        self.migrate_role()
+        if "unique_name_lower" not in self.config.sys.role.index_information():
+            try:
+                self.config.sys.role.create_index(
+                    [
+                        ("name_lower", pymongo.ASCENDING)
+                    ],
+                    unique=True,
+                    name="unique_name_lower"
+                )
+            except pymongo.errors.DuplicateKeyError:
+                self.logger.error(
+                    "failed to create index [unique_name_lower] on "
+                    "[sys.role] with case insensitive duplicate names, "
+                    "these roles resolve by exact name only")
+            else:
+                self.logger.info(
+                    "created index [unique_name_lower] on [sys.role]")
         if "unique_name" not in self.config.sys.role.index_information():
             self.config.sys.role.create_index(
                 [
@@ -188,3 +233,23 @@ class CoreSetup(CoreBase, metaclass=Singleton):
                 partialFilterExpression={"email": {"$exists": True}}
             )
             self.logger.info("created index [unique_email] on [sys.role]")
+
+    def migrate_role(self):
+        """
+        Sets the lower case ``name_lower`` of all roles in ``sys.role``
+        created before the attribute has been introduced.
+
+        :return: number of migrated roles
+        """
+        update = [
+            pymongo.UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {"name_lower": doc["name"].lower()}})
+            for doc in self.config.sys.role.find(
+                {"name_lower": {"$exists": False}}, projection=["name"])
+        ]
+        if update:
+            self.config.sys.role.bulk_write(update, ordered=False)
+            self.logger.info("migrated [%d] roles with [name_lower]",
+                             len(update))
+        return len(update)
@@ -9,44 +9,46 @@
 General purpose data management helpers.
 """
 import datetime
+import functools
 import gzip
 import json
 import os
+import sys
 import textwrap
 from io import StringIO
 
 import bson.objectid
-import docutils.parsers.rst.directives.body
-import docutils.parsers.rst.roles
-import numpy as np
-import pandas as pd
 import pytz
-import sphinx.ext.napoleon
 import tzlocal
-from docutils import core
-from docutils.parsers.rst.directives import register_directive
 
 LOCAL_TZ = lambda: pytz.timezone(tzlocal.get_localzone().zone)
 
-NAPOLEON = sphinx.ext.napoleon.Config(
-    napoleon_use_param=False,
-    napoleon_use_rtype=True,
-    napoleon_google_docstring=True,
-    napoleon_numpy_docstring=False,
-    napoleon_include_init_with_doc=True,
-    napoleon_include_private_with_doc=True,
-    napoleon_include_special_with_doc=True,
-    napoleon_use_admonition_for_examples=False,
-    napoleon_use_admonition_for_notes=True,
-    napoleon_use_admonition_for_references=True,
-    napoleon_use_ivar=True,
-    napoleon_use_keyword=True
-)
-
-register_directive("method", docutils.parsers.rst.directives.body.Rubric)
-for role in ("exc", "meth", "mod", "class", "ref", "doc", "attr"):
-    docutils.parsers.rst.roles.register_local_role(
-        role, docutils.parsers.rst.roles.generic_custom_role)
+
+@functools.lru_cache(maxsize=None)
+def _napoleon():
+    # internal helper to import and setup sphinx and docutils on first use
+    import docutils.parsers.rst.directives.body
+    import docutils.parsers.rst.roles
+    import sphinx.ext.napoleon
+    from docutils.parsers.rst.directives import register_directive
+    register_directive("method", docutils.parsers.rst.directives.body.Rubric)
+    for role in ("exc", "meth", "mod", "class", "ref", "doc", "attr"):
+        docutils.parsers.rst.roles.register_local_role(
+            role, docutils.parsers.rst.roles.generic_custom_role)
+    return sphinx.ext.napoleon.Config(
+        napoleon_use_param=False,
+        napoleon_use_rtype=True,
+        napoleon_google_docstring=True,
+        napoleon_numpy_docstring=False,
+        napoleon_include_init_with_doc=True,
+        napoleon_include_private_with_doc=True,
+        napoleon_include_special_with_doc=True,
+        napoleon_use_admonition_for_examples=False,
+        napoleon_use_admonition_for_notes=True,
+        napoleon_use_admonition_for_references=True,
+        napoleon_use_ivar=True,
+        napoleon_use_keyword=True
+    )
 
 
 def dfutc2local(col):
@@ -112,6 +114,11 @@ def parse_boolean(value, error=False):
     return value
 
 
+class _NoNumpy:
+    # internal placeholder of numpy types if numpy has not been imported
+    datetime64 = bool_ = integer = floating = ndarray = ()
+
+
 class JsonEncoder(json.JSONEncoder):
     """
     Encodes Python dictionaries into JSON. Beyond the :mod:`json` encoder this
@@ -120,13 +127,20 @@ class JsonEncoder(json.JSONEncoder):
     * :class:`datetime.datetime` and :class:`numpy.datetime64` into ISO format
     * :class:`bson.objectid.ObjectId` into str
     * :mod:`numpy` conversion of bool, integer, floating and ndarray
+
+    :mod:`numpy` types are only considered if :mod:`numpy` has been imported.
     """
 
     def default(self, obj):
+        # numpy objects require numpy to be imported
+        np = sys.modules.get("numpy")
+        if np is None:
+            np = _NoNumpy
         if isinstance(obj, np.datetime64):
             # this is a hack around pandas bug, see
             # http://stackoverflow.com/questions/13703720/converting-between-datetime-timestamp-and-datetime64/13753918
             # we only observe this conversion requirements for dataframes with one and only one datetime column
+            import pandas as pd
             obj = pd.to_datetime(str(obj)).replace(tzinfo=None)
         if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
             return obj.isoformat()
@@ -182,9 +196,12 @@ def rst2html(doc):
     :return: dict with keys ``body`` (html) and ``error`` (list of parsing
              errors)
     """
+    config = _napoleon()
+    import sphinx.ext.napoleon
+    from docutils import core
     dedent = textwrap.dedent(doc)
     google = sphinx.ext.napoleon.GoogleDocstring(
-        docstring=dedent, config=NAPOLEON)
+        docstring=dedent, config=config)
     err = StringIO()
     parts = core.publish_parts(source=str(google), writer_name="html",
                                settings_overrides=dict(warning_stream=err))
@@ -9,7 +9,6 @@ import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from core4.queue.job import CoreJob
-import jinja2
 import os
 
 
@@ -114,6 +113,8 @@ class RoleEmail(MailMixin, CoreJob):
 
     def execute(self, recipients=None, subject=None, token=None, template=None,
                 realname=None, username=None, language="EN"):
+        import jinja2
+
         def rel(path):
             return os.path.abspath(os.path.join(os.path.dirname(__file__),
                                                 path))
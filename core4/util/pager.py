@@ -8,13 +8,31 @@
 """
 Pagination support
 """
+import base64
 import collections
+import hashlib
+import inspect
+import time
 
+import bson
+import bson.errors
 import math
 
+
+def _parsing_error(message):
+    # internal helper to create the API's ArgumentParsingError, tornado is
+    # imported on first use
+    import core4.api.v1.request.error
+    return core4.api.v1.request.error.ArgumentParsingError(message)
+
+
 PageResult = collections.namedtuple("PageResult",
                                     "code message page_count total_count "
-                                    "page body count per_page")
+                                    "page body count per_page after",
+                                    defaults=(None,))
+
+#: maximum number of cached counts before expired entries are purged
+MAX_COUNT = 1000
 
 
 class CorePager:
@@ -75,6 +93,26 @@ class CorePager:
                         )
                 return await pager.page()
 
+    **Keyset pagination:**
+
+    Deep pages with ``skip`` get slower linearly. With the ``after`` attribute
+    the pager seeks the requested page with the sort key of the last document
+    of the previous page instead. The ``after`` attribute is an opaque
+    continuation token returned by :meth:`.page` with :class:`.PageResult`
+    attribute ``.after``. Pass ``after=""`` to request the first page. The
+    ``.after`` attribute of the last page is ``""``.
+
+    In keyset mode the pager passes ``skip=0``, the ``filter`` extended by the
+    seek condition and the ``sort_by`` list extended by ``_id`` to the query
+    callback. The documents returned by the query callback must carry all
+    sort keys and ``_id``. Use the ``transform`` callback to reshape the
+    documents after the continuation token has been created.
+
+    The filtered count of the keyset mode is cached per filter for
+    :attr:`.COUNT_TTL` seconds or ``count_ttl`` seconds. With ``count=False``
+    the pager skips the count, and ``.total_count`` and ``.page_count`` of
+    the :class:`.PageResult` are ``None``.
+
     This request handler example has two helper methods. ``.initialize``
     creates a dict ``._collection`` to store asynchronous MongoDB connections
     using :mod:`motor`. The ``.collection`` method instantiated each connection
@@ -98,7 +136,12 @@ class CorePager:
     """
 
     PAGE_ATTR = (
-        "per_page", "current_page", "filter", "sort_by")
+        "per_page", "current_page", "filter", "sort_by", "after")
+
+    #: seconds to cache the filtered count in keyset mode
+    COUNT_TTL = 60
+
+    _count_cache = {}
 
     def __init__(self, length=None, query=None, *args, **kwargs):
         """
@@ -115,13 +158,24 @@ class CorePager:
                        documents
         :param sort_by: tuple of attribute and sort order (``1`` for ascending,
                         ``-1`` for descending)
+        :param after: continuation token to switch to keyset mode, ``""`` for
+                      the first page, defaults to ``None`` (skip mode)
+        :param transform: callback or coroutine function applied to each
+                          document of the page
+        :param count: ``False`` to skip the filtered count, defaults to
+                      ``True``
+        :param count_ttl: seconds to cache the filtered count, defaults to
+                          ``None`` in skip mode and :attr:`.COUNT_TTL` in
+                          keyset mode
         """
         self.__dict__["paging"] = dict(
             per_page=10,
             current_page=0,
             sort_by=None,
             filter={},
+            after=None
         )
+        self.__dict__.update(transform=None, count=True, count_ttl=None)
         self.initialise(*args, **kwargs)
         self._total_count = None
         self._filtered_count = None
@@ -147,6 +201,7 @@ class CorePager:
         :param current_page: of the pager
         :param filter: dict with :mod:`motor` query filter
         :param sort_by: tuple of sort attribute and sort order
+        :param after: continuation token of the keyset mode
         """
         for k in kwargs:
             if k in self.PAGE_ATTR:
@@ -171,10 +226,31 @@ class CorePager:
         :return: total number of filtered documents
         """
         if self._filtered_count is None:
-            self._filtered_count = float(await self._length(
-                filter=self.filter))
+            self._filtered_count = float(await self._count(self.filter))
         return self._filtered_count
 
+    async def _count(self, filter):
+        # count with optional cache by length callback and filter
+        ttl = self.count_ttl
+        if ttl is None and self.after is not None:
+            ttl = self.COUNT_TTL
+        if not ttl:
+            return await self._length(filter=filter)
+        key = (getattr(self._length, "__module__", None),
+               getattr(self._length, "__qualname__", None),
+               self._digest(filter))
+        now = time.monotonic()
+        entry = CorePager._count_cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        count = await self._length(filter=filter)
+        if len(CorePager._count_cache) >= MAX_COUNT:
+            CorePager._count_cache = dict(
+                (k, v) for k, v in CorePager._count_cache.items()
+                if v[0] > now)
+        CorePager._count_cache[key] = (now + ttl, count)
+        return count
+
     @property
     async def page_count(self):
         """
@@ -186,6 +262,8 @@ class CorePager:
         """
         :return: :class:`.PageResult`
         """
+        if self.after is not None:
+            return await self.page_after()
         page = page or self.current_page
         self.current_page = page
         if self.current_page < 0:
@@ -205,8 +283,8 @@ class CorePager:
             )
         skip = int(self.current_page * self.per_page)
         limit = int(self.per_page)
-        body = await self._query(
-            skip, limit, self.filter, self.sort_by)
+        body = await self._transform(await self._query(
+            skip, limit, self.filter, self.sort_by))
         return PageResult(
             code=200,
             message="OK",
@@ -218,6 +296,147 @@ class CorePager:
             body=body
         )
 
+    async def page_after(self):
+        """
+        Retrieves the page following the continuation token ``.after`` with
+        keyset pagination.
+
+        :return: :class:`.PageResult` with the continuation token of the next
+                 page in ``.after``
+        """
+        if not isinstance(self.filter, dict):
+            raise _parsing_error(
+                "keyset pagination requires a filter dict")
+        sort = self.keyset_sort()
+        digest = self._digest(self.filter, sort)
+        query_filter = self.filter
+        if self.after:
+            (current_page, value) = self._decode(
+                self.after, digest, len(sort))
+            seek = self._seek(sort, value)
+            if query_filter:
+                query_filter = {"$and": [query_filter, seek]}
+            else:
+                query_filter = seek
+        else:
+            current_page = 0
+        limit = int(self.per_page)
+        if limit < 1:
+            raise _parsing_error(
+                "keyset pagination requires per_page > 0")
+        docs = list(await self._query(0, limit + 1, query_filter, sort))
+        body = docs[:limit]
+        after = ""
+        if len(docs) > limit:
+            after = self._encode(
+                current_page + 1,
+                [self._value(body[-1], key) for (key, _) in sort], digest)
+        self.current_page = current_page
+        total_count = page_count = None
+        if self.count:
+            total_count = await self.filtered_count
+            page_count = await self.page_count
+        return PageResult(
+            code=200,
+            message="OK",
+            page_count=page_count,
+            total_count=total_count,
+            page=current_page,
+            count=len(body),
+            per_page=self.per_page,
+            body=await self._transform(body),
+            after=after
+        )
+
+    def keyset_sort(self):
+        """
+        Translates ``sort_by`` into a list of attribute and sort order tuples
+        with ``_id`` as the last attribute to create unique sort keys.
+
+        :return: list of tuples
+        """
+        sort_by = self.sort_by
+        if not sort_by:
+            sort = []
+        elif isinstance(sort_by[0], str):
+            sort = [(sort_by[0], int(sort_by[1]))]
+        else:
+            sort = [(key, int(order)) for (key, order) in sort_by]
+        keys = [key for (key, _) in sort]
+        if "$natural" in keys:
+            raise _parsing_error(
+                "keyset pagination does not support [$natural] sort")
+        if "_id" not in keys:
+            sort.append(("_id", sort[-1][1] if sort else 1))
+        return sort
+
+    async def _transform(self, body):
+        # reshape page documents with the (async) transform callback
+        if self.transform is None:
+            return body
+        ret = []
+        for doc in body:
+            doc = self.transform(doc)
+            if inspect.isawaitable(doc):
+                doc = await doc
+            ret.append(doc)
+        return ret
+
+    @staticmethod
+    def _value(doc, key):
+        # sort key value of the document with dot notation
+        for k in key.split("."):
+            if not isinstance(doc, dict):
+                return None
+            doc = doc.get(k)
+        return doc
+
+    @staticmethod
+    def _seek(sort, value):
+        # MongoDB query of all documents sorted after the passed sort key,
+        # null and missing values sort before all other values
+        cond = []
+        for i, (key, order) in enumerate(sort):
+            query = dict((k, v) for ((k, _), v) in zip(sort[:i], value[:i]))
+            if value[i] is None:
+                if order < 0:
+                    continue
+                query[key] = {"$ne": None}
+            elif order > 0:
+                query[key] = {"$gt": value[i]}
+            else:
+                query["$or"] = [{key: {"$lt": value[i]}}, {key: None}]
+            cond.append(query)
+        return {"$or": cond}
+
+    @staticmethod
+    def _digest(*args):
+        # hash of the filter and sort order
+        return hashlib.sha1(
+            bson.BSON.encode({"a": list(args)})).hexdigest()
+
+    @staticmethod
+    def _encode(page, value, digest):
+        # opaque continuation token
+        data = bson.BSON.encode({"p": page, "v": value, "d": digest})
+        return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _decode(token, digest, size):
+        # parse and verify the continuation token
+        try:
+            data = bson.BSON(base64.urlsafe_b64decode(
+                token + "=" * (-len(token) % 4))).decode()
+        except (ValueError, bson.errors.BSONError):
+            data = None
+        if (data is None or data.get("d") != digest
+                or not isinstance(data.get("p"), int)
+                or not isinstance(data.get("v"), list)
+                or len(data["v"]) != size):
+            raise _parsing_error(
+                "invalid continuation token [{}]".format(token))
+        return data["p"], data["v"]
+
     async def length(self, filter):
         """
         Needs to be implemented with every pager. The passed filter is
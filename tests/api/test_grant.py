@@ -387,6 +387,11 @@ async def test_job_listing(core4api):
     ])
     rv = await core4api.get("/core4/api/v1/jobs")
     assert rv.json()["total_count"] == 6
+    rv = await core4api.get("/core4/api/v1/jobs?per_page=4&page=1")
+    assert rv.json()["total_count"] == 6
+    assert rv.json()["page_count"] == 2
+    assert [d["name"] for d in rv.json()["data"]] == [
+        "tests.api.test_grant.MyJob"] * 2
 
     rv = await core4api.post("/core4/api/v1/jobs/enqueue", json={
         "name": "tests.api.test_grant.MyJob"
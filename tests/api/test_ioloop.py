@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import traceback
+
+import pymongo.mongo_client
+import pytest
+from bson.objectid import ObjectId
+from tornado.websocket import websocket_connect
+
+import core4
+from tests.api.test_test import setup, mongodb, core4api
+
+_ = setup
+CORE4_PATH = os.path.dirname(core4.__file__)
+
+
+@pytest.fixture
+def blocking(core4api, monkeypatch):
+    """
+    Records synchronous pymongo requests issued by core4 on the IOLoop thread
+    once the server is up. Synchronous MongoDB logging enabled by the test
+    setup is excluded.
+    """
+    thread = threading.current_thread()
+    calls = []
+    get_socket = pymongo.mongo_client.MongoClient._get_socket
+
+    def _get_socket(self, *args, **kwargs):
+        if threading.current_thread() is thread:
+            stack = traceback.extract_stack()
+            files = [f.filename for f in stack]
+            if (any(f.startswith(CORE4_PATH) for f in files)
+                    and not any(f.endswith(os.path.join(
+                        "logging", "__init__.py")) for f in files)):
+                calls.append("".join(traceback.format_list(stack[-12:])))
+        return get_socket(self, *args, **kwargs)
+
+    monkeypatch.setattr(
+        pymongo.mongo_client.MongoClient, "_get_socket", _get_socket)
+    return calls
+
+
+async def test_no_sync_mongo(core4api, blocking, mongodb):
+    await core4api.login()
+    # enqueue
+    rv = await core4api.post(
+        "/core4/api/v1/job",
+        json={"qual_name": "core4.queue.helper.job.example.DummyJob",
+              "args": {"sleep": 5}, "follow": False})
+    assert rv.code == 200
+    _id = rv.json()["data"]
+    rv = await core4api.post(
+        "/core4/api/v1/job",
+        json={"qual_name": "core4.queue.helper.job.example.DummyJob",
+              "args": {"sleep": 5}, "follow": False})
+    assert rv.code == 400
+    rv = await core4api.post(
+        "/core4/api/v1/job/batch",
+        json={"qual_name": "core4.queue.helper.job.example.DummyJob",
+              "args": [{"i": 1}, {"i": 2}]})
+    assert rv.code == 200
+    assert len(rv.json()["data"]) == 2
+    # kill, restart and remove
+    rv = await core4api.put("/core4/api/v1/job/kill/" + _id)
+    assert rv.code == 200
+    mongodb.sys.queue.update_one(
+        {"_id": ObjectId(_id)}, {"$set": {"state": "error"}})
+    rv = await core4api.put(
+        "/core4/api/v1/job/restart/" + _id + "?follow=false")
+    assert rv.code == 200
+    new_id = rv.json()["data"]
+    assert new_id != _id
+    assert mongodb.sys.journal.count_documents({"_id": ObjectId(_id)}) == 1
+    rv = await core4api.put("/core4/api/v1/job/remove/" + new_id)
+    assert rv.code == 200
+    doc = mongodb.sys.queue.find_one({"_id": ObjectId(new_id)})
+    assert doc["removed_at"] is not None
+    # role delete
+    rv = await core4api.post("/core4/api/v1/roles", body={
+        "name": "test_role1", "realname": "test role1"})
+    assert rv.code == 200
+    data = rv.json()["data"]
+    rv = await core4api.delete(
+        "/core4/api/v1/roles/" + data["_id"] + "?etag=" + data["etag"])
+    assert rv.code == 200
+    # web socket message
+    ws = await websocket_connect(
+        "ws://127.0.0.1:{}/core4/api/v1/event?token={}".format(
+            core4api._http_port, core4api.token))
+    await ws.write_message(json.dumps(
+        {"type": "message", "channel": "test", "text": "hello"}))
+    msg = json.loads(await ws.read_message())
+    assert msg["type"] == "interest"
+    assert msg["message_id"] is not None
+    ws.close()
+    assert mongodb.sys.event.count_documents({"name": "message"}) == 1
+    assert mongodb.sys.event.count_documents({"name": "enqueue_job"}) == 3
+    assert blocking == []
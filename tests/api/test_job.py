@@ -73,6 +73,24 @@ async def test_post(core4api, worker):
                "name"] == "core4.queue.helper.job.example.DummyJob"
 
 
+async def test_post_batch(core4api):
+    await core4api.login()
+    data = {
+        "name": "core4.queue.helper.job.example.DummyJob",
+        "args": [{"sleep": 1}, {"sleep": 2}, {"sleep": 1}]
+    }
+    resp = await core4api.post('/core4/api/v1/jobs/enqueue/batch', json=data)
+    assert resp.code == 200
+    _id = resp.json()["data"]["_id"]
+    assert len(_id) == 3
+    assert _id[0] is not None
+    assert _id[1] is not None
+    assert _id[2] is None
+    data["name"] = "core4.queue.helper.job.example.NotFound"
+    resp = await core4api.post('/core4/api/v1/jobs/enqueue/batch', json=data)
+    assert resp.code == 404
+
+
 class MyJob(core4.queue.helper.job.example.DummyJob):
     author = "mra"
 
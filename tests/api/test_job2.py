@@ -558,3 +558,35 @@ async def test_syntax_error(core4api, worker):
     assert 'error' in set(sorted(set([i["state"] for i in states])))
 
 
+
+
+class PrintJob(CoreJob):
+    author = "mra"
+
+    def execute(self, **kwargs):
+        for i in range(3):
+            print("line %d" % i, flush=True)
+            time.sleep(3)
+
+
+async def test_job_stdout(core4api, worker):
+    worker.start(1)
+    await core4api.login()
+    resp = await core4api.post(
+        '/core4/api/v1/job',
+        json={"qual_name": "tests.api.test_job2.PrintJob", "follow": False},
+        request_timeout=120.
+    )
+    assert resp.code == 200
+    jid = resp.json()["data"]
+    resp = await core4api.get(
+        '/core4/api/v1/job/stdout/' + jid + "?follow=true",
+        request_timeout=120.
+    )
+    assert resp.code == 200
+    assert resp.body == b"line 0\nline 1\nline 2\n"
+    resp = await core4api.get(
+        '/core4/api/v1/job/stdout/' + jid + "?offset=7&length=6")
+    assert resp.code == 200
+    assert resp.body == b"line 1"
+    worker.stop()
@@ -53,10 +53,11 @@ class PagingHandler(CoreRequestHandler):
         current_page = int(self.get_argument("page", default=0))
         sort_by = self.get_argument("sort", default=[('idx', -1)])
         filter = self.get_argument("filter", as_type=dict, default={})
+        after = self.get_argument("after", as_type=str, default=None)
 
         pager = CorePager(per_page=per_page, current_page=current_page,
                           length=_length, query=_query, sort_by=sort_by,
-                          filter=filter)
+                          filter=filter, after=after)
         self.reply(await pager.page())
 
 
@@ -121,3 +122,70 @@ async def test_empty(page_server, data):
     assert rv.code == 200
     assert rv.json()["page_count"] == 0
     assert rv.json()["data"] == []
+
+
+async def test_keyset(page_server, data):
+    await page_server.login()
+    filter = {"idx": {"$lte": 45}}
+    for sort in ([("idx", -1)], [("value", 1), ("idx", 1)],
+                 [("segment", -1), ("real", 1)]):
+        url = "/test/pager?per_page=7&sort={}&filter={}".format(
+            json.dumps(sort), json.dumps(filter))
+        expected = []
+        for i in range(7):
+            rv = await page_server.get(url + "&page=%d" % i)
+            assert rv.code == 200
+            expected.extend(d["_id"] for d in rv.json()["data"])
+        found = []
+        after = ""
+        page = 0
+        while after is not None:
+            rv = await page_server.get(url + "&after=" + after)
+            assert rv.code == 200
+            assert rv.json()["total_count"] == 45
+            assert rv.json()["page_count"] == 7
+            assert rv.json()["page"] == page
+            found.extend(d["_id"] for d in rv.json()["data"])
+            after = rv.json()["after"]
+            page += 1
+        assert page == 7
+        assert len(found) == 45
+        assert found == expected
+
+
+async def test_keyset_null(page_server, data):
+    await page_server.login()
+    data.update_many({"idx": {"$lte": 10}}, {"$unset": {"value": ""}})
+    data.update_many({"idx": {"$gt": 50}}, {"$set": {"value": None}})
+    for sort in ([("value", 1)], [("value", -1)],
+                 [("value", -1), ("idx", 1)]):
+        url = "/test/pager?per_page=7&sort={}".format(json.dumps(sort))
+        # keyset pagination sorts by _id last
+        skip_url = "/test/pager?per_page=7&sort={}".format(
+            json.dumps(sort + [("_id", sort[-1][1])]))
+        expected = []
+        for i in range(9):
+            rv = await page_server.get(skip_url + "&page=%d" % i)
+            expected.extend(d["_id"] for d in rv.json()["data"])
+        found = []
+        after = ""
+        while after is not None:
+            rv = await page_server.get(url + "&after=" + after)
+            assert rv.code == 200
+            found.extend(d["_id"] for d in rv.json()["data"])
+            after = rv.json()["after"]
+        assert len(found) == 60
+        assert found == expected
+
+
+async def test_keyset_invalid(page_server, data):
+    await page_server.login()
+    rv = await page_server.get("/test/pager?after=invalid")
+    assert rv.code == 400
+    rv = await page_server.get("/test/pager?per_page=5&after=")
+    assert rv.code == 200
+    after = rv.json()["after"]
+    rv = await page_server.get(
+        "/test/pager?per_page=5&after={}&sort={}".format(
+            after, json.dumps([("value", 1)])))
+    assert rv.code == 400
@@ -1,7 +1,12 @@
+import base64
+
 import pytest
+from bson.objectid import ObjectId
 
 import core4.api.v1.request.role.field
 from core4.api.v1.request.role.main import CoreRole
+from core4.api.v1.request.role.credential import CredentialCache
+from core4.api.v1.request.role.perm import CompiledPerm, PermCache
 from tests.api.test_test import setup, mongodb, core4api
 
 _ = setup
@@ -953,3 +958,188 @@ async def test_passwd_no_mail(core4api):
     rv = await core4api.post("/core4/api/v1/roles", headers=header, body=data)
     assert rv.json()["code"] == 400
 
+
+def test_compiled_perm():
+    perm = CompiledPerm([
+        "job://core4.queue.helper.*/r",
+        "job://project.job.Exec/x",
+        "api://core4.api.v1.request.standard.*",
+        "api://core4.api.v1.request.role.*/r",
+        "api://core4.api.v1.request.job.*/cu",
+        "app://client/client1/unit2",
+        "app://store/a",
+        "api://invalid(/r"
+    ])
+    assert not perm.admin
+    assert perm.has_job_access("core4.queue.helper.job.example.DummyJob",
+                               ("x", "r"))
+    assert not perm.has_job_access(
+        "core4.queue.helper.job.example.DummyJob", ("x",))
+    assert perm.has_job_access("project.job.Exec", ("x",))
+    assert not perm.has_job_access("project.job.Other", ("x", "r"))
+    assert perm.has_api_access(
+        "core4.api.v1.request.standard.login.LoginHandler", "DELETE")
+    assert perm.has_api_access("core4.api.v1.request.role.main.RoleHandler")
+    assert perm.has_api_access(
+        "core4.api.v1.request.role.main.RoleHandler", "POST") is None
+    assert perm.has_api_access(
+        "core4.api.v1.request.role.main.RoleHandler", "POST",
+        info_request=True)
+    assert perm.has_api_access(
+        "core4.api.v1.request.job.JobRequest", "PUT")
+    assert perm.has_api_access(
+        "core4.api.v1.request.job.JobRequest", "GET") is None
+    assert perm.has_api_access("invalid", info_request=True) is None
+    assert perm.has_client_access("client1/unit2")
+    assert not perm.has_client_access("client1")
+    query = perm.job_filter(("x", "r"))
+    assert [r.pattern for r in query["name"]["$in"]] == [
+        "^(?:core4.queue.helper.*)", "^(?:project.job.Exec)"]
+    query = perm.job_filter(("x",), field="qual_name")
+    assert [r.pattern for r in query["qual_name"]["$in"]] == [
+        "^(?:project.job.Exec)"]
+    assert CompiledPerm([]).job_filter(("x", "r")) == {"name": {"$in": []}}
+    admin = CompiledPerm(["cop"])
+    assert admin.admin
+    assert admin.job_filter(("x", "r")) is None
+    assert admin.has_job_access("project.job.Exec", ("x",))
+    assert admin.has_api_access("any.Handler", "DELETE")
+    assert admin.has_client_access("client1")
+
+
+async def test_perm_cache(core4api, mongodb, monkeypatch):
+    monkeypatch.setattr(PermCache, "watching", False)
+    role1 = CoreRole(name="role1", is_active=True,
+                     perm=["job://project.job.*/r"])
+    await role1.save()
+    role2 = CoreRole(name="role2", is_active=True, role=["role1"],
+                     perm=["api://project.api.*"])
+    await role2.save()
+    user = CoreRole(name="user", is_active=True, email="user@mail.com",
+                    password="hello world", role=["role2"])
+    await user.save()
+
+    user = await CoreRole.find_one(name="user")
+    assert await user.casc_perm() == [
+        "api://project.api.*", "job://project.job.*/r"]
+    assert await user.has_job_access("project.job.Job")
+    assert not await user.has_job_exec_access("project.job.Job")
+    assert await user.has_api_access("project.api.Handler")
+    assert not await user.is_admin()
+    compiled = await user.compiled_perm()
+    user = await CoreRole.find_one(name="user")
+    assert await user.compiled_perm() is compiled
+
+    # update outside of this process
+    mongodb.sys.role.update_one(
+        {"_id": role1._id},
+        {"$set": {"perm": ["job://project.job.*/x"], "etag": ObjectId()}})
+    user = await CoreRole.find_one(name="user")
+    assert await user.compiled_perm() is compiled
+    assert not await user.has_job_exec_access("project.job.Job")
+    compiled.verified -= user.config.api.perm_cache
+    user = await CoreRole.find_one(name="user")
+    assert await user.compiled_perm() is not compiled
+    assert await user.has_job_exec_access("project.job.Job")
+
+    # update in this process
+    compiled = await user.compiled_perm()
+    role2 = await CoreRole.find_one(name="role2")
+    role2.perm = ["cop"]
+    await role2.save()
+    assert PermCache.cache == {}
+    user = await CoreRole.find_one(name="user")
+    assert await user.is_admin()
+
+    role2 = await CoreRole.find_one(name="role2")
+    await role2.delete()
+    user = await CoreRole.find_one(name="user")
+    assert await user.casc_perm() == []
+
+
+async def test_find_name(core4api, mongodb):
+    await core4api.login()
+    rv = await core4api.post("/core4/api/v1/roles", body=dict(
+        name="MixedCase",
+        realname="mixed case",
+        email="mixed@mail.com",
+        passwd="hello world",
+        perm=["api://core4.api.v1.request.standard.*"]
+    ))
+    assert rv.code == 200
+    doc = mongodb.sys.role.find_one({"name": "MixedCase"})
+    assert doc["name_lower"] == "mixedcase"
+    assert "name_lower" not in rv.json()["data"]
+    user = await CoreRole.find_name("MIXEDCASE")
+    assert user.name == "MixedCase"
+    assert await CoreRole.find_name("mixed.*") is None
+    await core4api.login("mixedcase", "hello world")
+    rv = await core4api.get("/core4/api/v1/profile")
+    assert rv.code == 200
+    assert rv.json()["data"]["name"] == "MixedCase"
+    await core4api.login("mixed.*", "hello world", 401)
+    core4api.set_admin()
+    rv = await core4api.post("/core4/api/v1/roles", body=dict(
+        name="mixedcase",
+        realname="mixed case"
+    ))
+    assert rv.code == 400
+
+
+async def test_find_name_ambiguous(core4api, mongodb):
+    await core4api.login()
+    rv = await core4api.post("/core4/api/v1/roles", body=dict(
+        name="MixedCase",
+        realname="mixed case",
+        email="mixed@mail.com",
+        passwd="hello world",
+        perm=["api://core4.api.v1.request.standard.*"]
+    ))
+    assert rv.code == 200
+    # duplicate from before the unique index on name_lower
+    mongodb.sys.role.drop_index("unique_name_lower")
+    doc = mongodb.sys.role.find_one({"name": "MixedCase"})
+    doc.update(_id=ObjectId(), name="mixedcase", email="other@mail.com")
+    mongodb.sys.role.insert_one(doc)
+    assert await CoreRole.find_name("MIXEDCASE") is None
+    user = await CoreRole.find_name("MixedCase")
+    assert user.email == "mixed@mail.com"
+    user = await CoreRole.find_name("mixedcase")
+    assert user.email == "other@mail.com"
+    await core4api.login("MIXEDCASE", "hello world", 401)
+    await core4api.login("MixedCase", "hello world")
+
+
+async def test_credential_cache(core4api, mongodb):
+    await core4api.login()
+    rv = await core4api.post("/core4/api/v1/roles", body=dict(
+        name="user",
+        realname="test user",
+        email="user@mail.com",
+        passwd="hello world",
+        perm=["api://core4.api.v1.request.standard.*"]
+    ))
+    assert rv.code == 200
+    CredentialCache.clear()
+    core4api.token = None
+    auth = base64.b64encode(b"user:hello world").decode("utf-8")
+    header = {"Authorization": "Basic " + auth}
+    rv = await core4api.get("/core4/api/v1/profile", headers=header)
+    assert rv.code == 200
+    assert len(CredentialCache.cache) == 1
+    last_login = mongodb.sys.role.find_one({"name": "user"})["last_login"]
+    assert last_login is not None
+    rv = await core4api.get("/core4/api/v1/profile", headers=header)
+    assert rv.code == 200
+    assert len(CredentialCache.cache) == 1
+    doc = mongodb.sys.role.find_one({"name": "user"})
+    assert doc["last_login"] == last_login
+
+    user = await CoreRole.find_name("user")
+    assert await user.check_password("hello world")
+    assert not await user.check_password("hello")
+    user.password = "new password"
+    await user.save()
+    assert not CredentialCache.get(user, "hello world")
+    rv = await core4api.get("/core4/api/v1/login", headers=header)
+    assert rv.code == 401
@@ -40,6 +40,7 @@ def setup(tmpdir):
     os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = MONGO_URL
     os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = MONGO_DATABASE
     os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
+    os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
     os.environ["CORE4_OPTION_logging__stderr"] = "DEBUG"
     os.environ["CORE4_OPTION_api__token__expiration"] = "!!int 60"
     os.environ["CORE4_OPTION_api__setting__debug"] = "!!bool True"
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import re
@@ -8,6 +9,7 @@ import pytest
 
 import core4.base
 import core4.base.collection
+import core4.base.main
 import core4.config
 import core4.config.tag
 import core4.error
@@ -44,6 +46,7 @@ def reset(tmpdir):
     os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = MONGO_URL
     os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = MONGO_DATABASE
     os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
+    os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
     os.environ["CORE4_OPTION_logging__write_concern"] = "!!int 1"
     os.environ["CORE4_OPTION_worker__min_free_ram"] = "!!int 32"
 
@@ -95,6 +98,52 @@ def test_base():
     assert "core4.base.main.CoreBase" == b.qual_name(short=False)
 
 
+def test_identifier():
+    assert core4.base.CoreBase().identifier is None
+    with core4.base.main.identify("outer"):
+        assert core4.base.CoreBase().identifier == "outer"
+        with core4.base.main.identify("inner"):
+            assert core4.base.CoreBase().identifier == "inner"
+        assert core4.base.CoreBase().identifier == "outer"
+
+        class Owner(core4.base.CoreBase):
+            identifier = "owner"
+
+        assert Owner().identifier == "owner"
+    assert core4.base.CoreBase().identifier is None
+
+
+def test_identifier_task():
+
+    async def create(identifier):
+        core4.base.main.IDENTIFIER.set(identifier)
+        await asyncio.sleep(0.01)
+        child = await asyncio.ensure_future(make())
+        return (core4.base.CoreBase().identifier, child)
+
+    async def make():
+        return core4.base.CoreBase().identifier
+
+    async def main():
+        return await asyncio.gather(create("A"), create("B"))
+
+    assert asyncio.run(main()) == [("A", "A"), ("B", "B")]
+    assert core4.base.CoreBase().identifier is None
+
+
+def test_frame_identifier():
+
+    class Parent(core4.base.CoreBase):
+        def make(self):
+            return core4.base.CoreBase()
+
+    parent = Parent()
+    parent.identifier = "parent"
+    assert parent.make().identifier is None
+    os.environ["CORE4_OPTION_base__frame_identifier"] = "!!bool True"
+    assert parent.make().identifier == "parent"
+
+
 def test_project():
     import project.test
     t = project.test.Test()
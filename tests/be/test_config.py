@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import os
+import shutil
+import tempfile
 import unittest
 
 import datetime
@@ -891,6 +893,94 @@ class TestConfig(unittest.TestCase):
         assert config.get_folder("temp") == "/tmp/core4/temp"
         assert config.get_folder("home") is None
 
+    def test_snapshot(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        local = os.path.join(tmpdir, "local.yaml")
+        with open(local, "w", encoding="utf-8") as fh:
+            fh.write("worker:\n  slots: 4\n")
+        conf1 = core4.config.CoreConfig(config_file=local)
+        conf2 = core4.config.CoreConfig(config_file=local)
+        self.assertEqual(4, conf1.worker.slots)
+        self.assertIs(conf1._config, conf2._config)
+        conf3 = core4.config.CoreConfig(config_file=local,
+                                        extra_dict={"test": {"x": 1}})
+        self.assertIsNot(conf1._config, conf3._config)
+        self.assertEqual(1, conf3.test.x)
+        os.environ["CORE4_OPTION_worker__slots"] = "!!int 2"
+        conf4 = core4.config.CoreConfig(config_file=local)
+        self.assertEqual(2, conf4.worker.slots)
+        del os.environ["CORE4_OPTION_worker__slots"]
+        with open(local, "w", encoding="utf-8") as fh:
+            fh.write("worker:\n  slots: 16\n")
+        stat = os.stat(local)
+        os.utime(local, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        conf5 = core4.config.CoreConfig(config_file=local)
+        self.assertEqual(16, conf5.worker.slots)
+        self.assertEqual(4, conf1.worker.slots)
+        conf6 = MyConfig(config_file=local)
+        self.assertIsNot(conf5._config, conf6._config)
+
+
+    def test_persisted(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        os.environ["CORE4_CONFIG_CACHE"] = os.path.join(tmpdir, "cache")
+        local = tests.be.util.asset("config/empty.yaml")
+        core4.config.CoreConfig._snapshot.clear()
+        conf1 = core4.config.CoreConfig(config_file=local)
+        self.assertIsNone(conf1.worker.slots)
+        files = os.listdir(os.path.join(tmpdir, "cache"))
+        self.assertEqual(1, len(files))
+        core4.config.CoreConfig._snapshot.clear()
+        conf2 = core4.config.CoreConfig(config_file=local)
+        self.assertIsNot(conf1._config, conf2._config)
+        self.assertEqual(conf1.worker, conf2.worker)
+        self.assertEqual(str(conf1.sys.queue), str(conf2.sys.queue))
+        self.assertEqual(
+            files, os.listdir(os.path.join(tmpdir, "cache")))
+        os.environ["CORE4_OPTION_worker__slots"] = "!!int 2"
+        conf3 = core4.config.CoreConfig(config_file=local)
+        self.assertEqual(2, conf3.worker.slots)
+        self.assertEqual(
+            2, len(os.listdir(os.path.join(tmpdir, "cache"))))
+
+    def test_snapshot_connect(self):
+        local = tests.be.util.asset("config/empty.yaml")
+        core4.config.CoreConfig._snapshot.clear()
+        conf1 = core4.config.CoreConfig(config_file=local)
+        conf2 = core4.config.CoreConfig(config_file=local)
+        self.assertIs(conf1._config_base, conf2._config_base)
+        self.assertIs(conf1.worker, conf2.worker)
+        self.assertIsNot(conf1.sys.queue, conf2.sys.queue)
+        self.assertEqual(conf1.sys.queue.conn_str, conf2.sys.queue.conn_str)
+        conf1.sys.queue.connect_async()
+        self.assertIsNotNone(conf1.sys.queue._mongo)
+        self.assertIsNone(conf2.sys.queue._mongo)
+
+    def test_snapshot_sys_conf(self):
+        local = tests.be.util.asset("config/local3.yaml")
+        core4.config.CoreConfig._snapshot.clear()
+        core4.config.CoreConfig._db_verified.clear()
+        self.mongo.core4test.sys.conf.insert_one(
+            {"_id": "test", "folder": {"transfer": "/tmp"}})
+        conf1 = core4.config.CoreConfig(config_file=local)
+        self.assertEqual(conf1.folder.transfer, "/tmp")
+        self.mongo.core4test.sys.conf.update_one(
+            {"_id": "test"}, {"$set": {"folder.transfer": "/tmp/new"}})
+        conf2 = core4.config.CoreConfig(config_file=local)
+        self.assertIs(conf1._config_base, conf2._config_base)
+        self.assertEqual(conf2.folder.transfer, "/tmp")
+        # SYS_CONF_TTL expired
+        verified = core4.config.CoreConfig._db_verified
+        for k, v in verified.items():
+            verified[k] = (v[0], 0)
+        conf3 = core4.config.CoreConfig(config_file=local)
+        self.assertIsNot(conf1._config_base, conf3._config_base)
+        self.assertEqual(conf3.folder.transfer, "/tmp/new")
+        self.assertEqual(conf1.folder.transfer, "/tmp")
+
+
 
 if __name__ == '__main__':
     unittest.main(exit=False)
@@ -43,6 +43,7 @@ def reset(tmpdir):
     os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = MONGO_URL
     os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = MONGO_DATABASE
     os.environ["CORE4_OPTION_logging__mongodb"] = "INFO"
+    os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
     os.environ["CORE4_OPTION_logging__write_concern"] = "!!int 1"
     os.environ["CORE4_OPTION_worker__min_free_ram"] = "!!int 32"
 
@@ -0,0 +1,47 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ("tornado", "pandas", "numpy", "pip", "sphinx", "docutils", "motor")
+
+COMMAND = """
+import json
+import sys
+import {module}
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+@pytest.mark.parametrize("module", [
+    "core4.queue.process",
+    "core4.script.chist",
+    "core4.script.coco",
+    "core4.util.pager"
+])
+def test_lazy_import(module):
+    out = subprocess.check_output(
+        [sys.executable, "-c", COMMAND.format(module=module)])
+    loaded = set(m.split(".")[0] for m in json.loads(out.decode("utf-8")))
+    assert loaded.intersection(HEAVY) == set()
+
+
+def test_error_import():
+    out = subprocess.check_output(
+        [sys.executable, "-c", COMMAND.format(module="core4.error")])
+    loaded = set(m.split(".")[0] for m in json.loads(out.decode("utf-8")))
+    assert "tornado" not in loaded
+    import core4.api.v1.request.error
+    import core4.error
+    assert (core4.error.ArgumentParsingError
+            is core4.api.v1.request.error.ArgumentParsingError)
+
+
+def test_argument_parsing_error():
+    import core4.api.v1.request.error
+    import tornado.web
+    exc = core4.api.v1.request.error.ArgumentParsingError("failed")
+    assert isinstance(exc, tornado.web.HTTPError)
+    assert exc.status_code == 400
+    assert exc.log_message == "failed"
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 
+import asyncio
 import logging
 import os
 
@@ -52,6 +53,7 @@ def reset(tmpdir):
     os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = MONGO_URL
     os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = MONGO_DATABASE
     os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
+    os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
     os.environ["CORE4_OPTION_logging__write_concern"] = "!!int 1"
     os.environ["CORE4_OPTION_worker__min_free_ram"] = "!!int 32"
 
@@ -574,4 +576,21 @@ def test_enqueue_exists():
         core4.queue.helper.functool.enqueue(job)
     core4.queue.helper.functool.enqueue("core4.queue.helper.job.example.DummyJob", sleep=1)
     with pytest.raises(core4.error.CoreJobNotFound):
-        core4.queue.helper.functool.enqueue("core4.queue.helper.job.example.DummyJob_XXX")
\ No newline at end of file
+        core4.queue.helper.functool.enqueue("core4.queue.helper.job.example.DummyJob_XXX")
+
+
+def test_enqueue_async():
+    core4.config.map.ConfigMap = MyConfigMap
+    job = core4.queue.helper.job.example.DummyJob
+    _id = asyncio.run(core4.queue.helper.functool.enqueue_async(job))
+    q = core4.queue.main.CoreQueue()
+    assert q.load_job(_id).qual_name() == job.qual_name()
+    # enqueue in the project's Python virtual environment
+    aq = core4.queue.main.AsyncCoreQueue()
+    root = os.path.abspath(os.path.join(q.project_path(), ".."))
+    aq.config._config["folder"]["home"] = root
+    with pytest.raises(core4.error.CoreJobExists):
+        asyncio.run(core4.queue.helper.functool.enqueue_async(job))
+    _id = asyncio.run(core4.queue.helper.functool.enqueue_async(
+        "core4.queue.helper.job.example.DummyJob", sleep=1))
+    assert q.load_job(_id).args == {"sleep": 1}
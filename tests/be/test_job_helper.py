@@ -46,6 +46,7 @@ def reset(tmpdir):
     os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = MONGO_URL
     os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = MONGO_DATABASE
     os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
+    os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
     os.environ["CORE4_OPTION_logging__write_concern"] = "!!int 1"
     os.environ["CORE4_OPTION_worker__min_free_ram"] = "!!int 32"
 
@@ -297,6 +298,37 @@ def test_job_collection():
     assert ret["state"] == "complete"
 
 
+class BulkJob(Job1):
+    author = "mra"
+
+    def execute(self, background=False):
+        coll = self.config.tests.test_collection
+        coll.delete_many({})
+        self.set_source("dirname/test.txt")
+        with coll.bulk_writer(batch_size=3, total=10,
+                              background=background) as bulk:
+            for i in range(8):
+                bulk.insert({"i": i})
+            bulk.upsert({"i": 8}, {"$set": {"x": 8}})
+            self.set_source("dirname/test2.txt")
+            bulk.update({"i": {"$lt": 4}}, {"$inc": {"x": 1}}, many=True)
+        assert bulk.written == 10
+        assert bulk.inserted == 8
+        assert bulk.upserted == 1
+        assert bulk.modified == 4
+        assert coll.count_documents({}) == 9
+        assert coll.count_documents({"_job_id": self._id}) == 9
+        assert coll.count_documents({"_src": "test.txt"}) == 5
+        assert coll.count_documents({"_src": "test2.txt"}) == 4
+
+
+def test_bulk_writer():
+    ret = execute(BulkJob)
+    assert ret["state"] == "complete"
+    ret = execute(BulkJob, background=True)
+    assert ret["state"] == "complete"
+
+
 class Job3(Job1):
     author = "mra"
 
@@ -44,6 +44,7 @@ class TestLogging(unittest.TestCase):
                                                  "testmongo:27017"
         os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = "core4test"
         os.environ["CORE4_CONFIG"] = tests.be.util.asset("config/empty.yaml")
+        os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
 
     def drop_logs(self):
         for fn in glob.glob("*.log*"):
@@ -158,6 +159,7 @@ class TestLogging(unittest.TestCase):
 
     def test_identifier(self):
         os.environ["CORE4_CONFIG"] = tests.be.util.asset("logger/simple.yaml")
+        os.environ["CORE4_OPTION_base__frame_identifier"] = "!!bool True"
         os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
         b = LogOn()
         b.logger.debug("*** START ***")
@@ -167,6 +169,7 @@ class TestLogging(unittest.TestCase):
 
     def test_massive(self):
         os.environ["CORE4_CONFIG"] = tests.be.util.asset("logger/simple.yaml")
+        os.environ["CORE4_OPTION_base__frame_identifier"] = "!!bool True"
         os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
         os.environ["CORE4_OPTION_logging__stderr"] = ""
         os.environ["CORE4_OPTION_logging__stdout"] = ""
@@ -422,6 +425,62 @@ class TestLogging(unittest.TestCase):
         assert info["capped"]
         assert mongo["core4test"]["sys.event"].count_documents({}) == 1
 
+    def test_batch(self):
+        os.environ["CORE4_CONFIG"] = tests.be.util.asset("logger/simple.yaml")
+        os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
+        os.environ["CORE4_OPTION_logging__batch__capacity"] = "!!int 1000"
+        os.environ["CORE4_OPTION_logging__batch__size"] = "!!int 10"
+        os.environ["CORE4_OPTION_logging__batch__interval"] = "!!float 60"
+        b = LogOn()
+        handler = core4.logger.handler.MongoLoggingHandler.instance()
+        for i in range(25):
+            b.logger.info("message %d", i)
+        self.assertTrue(handler.flush(timeout=10))
+        data = list(b.config.sys.log.find(
+            {"message": {"$regex": "^message"}}, sort=[("_id", 1)]))
+        self.assertEqual(["message {}".format(i) for i in range(25)],
+                         [d["message"] for d in data])
+
+    def test_batch_overflow(self):
+        os.environ["CORE4_CONFIG"] = tests.be.util.asset("logger/simple.yaml")
+        b = LogOn()
+        # bypass the singleton
+        handler = type.__call__(
+            core4.logger.handler.MongoLoggingHandler, b.config.sys.log,
+            capacity=3, size=100, interval=60)
+        handler._start()
+        # hold the background writer
+        with handler._cond:
+            for level in (logging.INFO, logging.DEBUG, logging.WARNING,
+                          logging.DEBUG, logging.ERROR, logging.DEBUG):
+                handler.handle(logging.LogRecord(
+                    "test", level, __file__, 0, "overflow", None, None))
+        self.assertEqual(3, handler.dropped)
+        handler.close()
+        data = list(b.config.sys.log.find(
+            {"message": "overflow"}, sort=[("_id", 1)]))
+        self.assertEqual(["INFO", "WARNING", "ERROR"],
+                         [d["level"] for d in data])
+        with self.assertRaises(ValueError):
+            type.__call__(core4.logger.handler.MongoLoggingHandler,
+                          b.config.sys.log, overflow="unknown")
+
+    def test_level_buffer(self):
+        buffer = core4.logger.handler.LevelBuffer()
+        for i, level in enumerate((logging.INFO, logging.DEBUG,
+                                   logging.WARNING, logging.DEBUG,
+                                   logging.ERROR, logging.DEBUG)):
+            buffer.append({"levelno": level, "i": i})
+        self.assertEqual(6, len(buffer))
+        self.assertEqual(logging.DEBUG, buffer.lowest())
+        self.assertEqual(1, buffer.drop()["i"])
+        self.assertEqual(3, buffer.drop()["i"])
+        self.assertEqual(4, len(buffer))
+        self.assertEqual([0, 2, 4, 5],
+                         [buffer.popleft()["i"] for _ in range(4)])
+        self.assertFalse(buffer)
+
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -48,6 +48,7 @@ def reset(tmpdir):
     os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = MONGO_URL
     os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = MONGO_DATABASE
     os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
+    os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
     os.environ["CORE4_OPTION_logging__write_concern"] = "!!int 1"
     os.environ["CORE4_OPTION_worker__min_free_ram"] = "!!int 32"
 
@@ -156,6 +157,35 @@ def test_enqueue_args():
         q.enqueue(core4.queue.helper.job.example.DummyJob)
 
 
+def test_enqueue_many(mongodb):
+    q = core4.queue.main.CoreQueue()
+    q.enqueue(core4.queue.helper.job.example.DummyJob, i=1)
+    ret = q.enqueue_many(
+        core4.queue.helper.job.example.DummyJob,
+        args=[{"i": 0}, {"i": 1}, {"i": 2}, {"i": 0},
+              {"i": 3, "priority": 5}])
+    assert len(ret) == 5
+    assert [_id is None for _id in ret] == [
+        False, True, False, True, False]
+    assert mongodb[MONGO_DATABASE].sys.queue.count_documents({}) == 4
+    doc = mongodb[MONGO_DATABASE].sys.queue.find_one({"_id": ret[4]})
+    assert doc["priority"] == 5
+    assert doc["args"] == {"i": 3}
+    job = q.job_factory(core4.queue.helper.job.example.DummyJob,
+                        args={"i": 2})
+    doc = mongodb[MONGO_DATABASE].sys.queue.find_one({"_id": ret[2]})
+    assert doc["_hash"] == job._hash
+    events = list(mongodb[MONGO_DATABASE].sys.event.find(
+        {"name": "enqueue_job"}))
+    assert len(events) == 2
+    assert sorted(events[1]["data"]["_id"]) == sorted(
+        [str(_id) for _id in ret if _id is not None])
+    count = mongodb[MONGO_DATABASE].sys.count.find_one({"_id": "pending"})
+    assert count["n"] == 4
+    assert q.enqueue_many(core4.queue.helper.job.example.DummyJob,
+                          args=[]) == []
+
+
 def test_invalid():
     q = core4.queue.main.CoreQueue()
 
@@ -170,6 +200,59 @@ def test_invalid():
     q.enqueue(T2)
 
 
+JOB_MODULE = """
+from core4.queue.job import CoreJob
+
+class RegistryJob(CoreJob):
+    author = "mra"
+    priority = {}
+"""
+
+
+def test_job_registry(tmpdir, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmpdir))
+    filename = str(tmpdir.join("registry_job.py"))
+    with open(filename, "w", encoding="utf-8") as fh:
+        fh.write(JOB_MODULE.format(1))
+    q = core4.queue.main.CoreQueue()
+    cls = q.job_class("registry_job.RegistryJob")
+    assert q.job_class("registry_job.RegistryJob") is cls
+    assert q.job_factory("registry_job.RegistryJob").priority == 1
+    assert q.job_factory("registry_job.RegistryJob", priority=3).priority == 3
+    with pytest.raises(AssertionError):
+        q.job_factory("registry_job.RegistryJob", priority="high")
+    # source modified
+    with open(filename, "w", encoding="utf-8") as fh:
+        fh.write(JOB_MODULE.format(1000))
+    mtime = os.stat(filename).st_mtime + 10
+    os.utime(filename, (mtime, mtime))
+    cls2 = q.job_class("registry_job.RegistryJob")
+    assert cls2 is not cls
+    assert q.job_factory("registry_job.RegistryJob").priority == 1000
+
+
+def test_deserialise_delta():
+    q = core4.queue.main.CoreQueue()
+    job = q.job_factory(core4.queue.helper.job.example.DummyJob, sleep=1)
+    doc = job.serialise()
+    obj = q.job_class(core4.queue.helper.job.example.DummyJob.qual_name()
+                      ).deserialise(**doc)
+    assert obj.serialise() == doc
+    doc["attempts"] = 0
+    with pytest.raises(AssertionError):
+        core4.queue.helper.job.example.DummyJob.deserialise(**doc)
+
+
+def test_class_default_copy():
+    q = core4.queue.main.CoreQueue()
+    job1 = q.job_factory(core4.queue.helper.job.example.DummyJob)
+    job1.dependency.append("core4.queue.helper.job.example.DummyJob")
+    job1.chain.append("core4.queue.helper.job.example.DummyJob")
+    job2 = q.job_factory(core4.queue.helper.job.example.DummyJob)
+    assert job2.dependency == []
+    assert job2.chain == []
+
+
 def test_project_maintenance():
     q = core4.queue.main.CoreQueue()
     assert not q.maintenance('project')
@@ -46,6 +46,7 @@ def reset(tmpdir):
     os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = MONGO_URL
     os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = MONGO_DATABASE
     os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
+    os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
     conn = pymongo.MongoClient(MONGO_URL)
     conn.drop_database(MONGO_DATABASE)
     core4.logger.mixin.logon()
@@ -232,6 +233,30 @@ def test_gap(mongodb):
             {'name': re.compile(e)}) == c
 
 
+def test_heap():
+    s = CoreScheduler()
+    s.job = {
+        "job1": {"schedule": "* * * * *"},
+        "job2": {"schedule": "30 0 * * *"},
+        "job3": {"schedule": "a b c"}
+    }
+    start = datetime.datetime(2018, 1, 1, 0, 0, 30)
+    assert s.get_next(None, start) == []
+    assert [e[1] for e in sorted(s._heap)] == ["job1", "job2"]
+    end = datetime.datetime(2018, 1, 1, 0, 1, 0)
+    assert s.get_next(start, end) == [("job1", "* * * * *")]
+    assert s._heap[0][0] == datetime.datetime(2018, 1, 1, 0, 2, 0)
+    # catch up once per job
+    start, end = end, datetime.datetime(2018, 1, 1, 1, 0, 0)
+    assert sorted(s.get_next(start, end)) == [
+        ("job1", "* * * * *"), ("job2", "30 0 * * *")]
+    # rebuild with reloaded jobs
+    s.job = {"job4": {"schedule": "0 2 * * *"}}
+    start, end = end, datetime.datetime(2018, 1, 1, 2, 0, 0)
+    assert s.get_next(start, end) == [("job4", "0 2 * * *")]
+    assert [e[1] for e in s._heap] == ["job4"]
+
+
 class ValidSchedule3(InvalidSchedule):
     author = "mra"
     schedule = "28 * * * *"
@@ -44,6 +44,7 @@ def reset(tmpdir):
     os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = MONGO_URL
     os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = MONGO_DATABASE
     os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
+    os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
     os.environ["CORE4_OPTION_logging__write_concern"] = "!!int 1"
     os.environ["CORE4_OPTION_worker__min_free_ram"] = "!!int 32"
 
@@ -86,3 +87,18 @@ def test_make_queue2():
     setup.make_folder()
     for f in ["transfer", "proc", "arch", "temp"]:
         assert os.path.exists(os.path.join(setup.config.folder.root, f))
+
+
+def test_migrate_role(mongodb):
+    coll = mongodb[MONGO_DATABASE].sys.role
+    coll.insert_many([
+        {"name": "Admin"},
+        {"name": "user", "name_lower": "user"}
+    ])
+    setup = core4.service.setup.CoreSetup()
+    setup.make_role()
+    assert sorted(d["name_lower"] for d in coll.find()) == ["admin", "user"]
+    assert "unique_name_lower" in coll.index_information()
+    with pytest.raises(pymongo.errors.DuplicateKeyError):
+        coll.insert_one({"name": "ADMIN", "name_lower": "admin"})
+    assert setup.migrate_role() == 0
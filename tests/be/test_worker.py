@@ -4,11 +4,15 @@ import ctypes
 import datetime
 import os
 import signal
+import subprocess
 import sys
 import threading
 import time
+import zlib
 
 import psutil
+from bson.binary import Binary
+from bson.objectid import ObjectId
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -19,6 +23,7 @@ import core4.queue.helper.job
 import core4.queue.helper.job.example
 import core4.queue.job
 import core4.queue.main
+import core4.queue.process
 import core4.queue.worker
 import core4.util.node
 
@@ -53,6 +58,7 @@ def reset(tmpdir):
     os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = MONGO_URL
     os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = MONGO_DATABASE
     os.environ["CORE4_OPTION_logging__mongodb"] = "DEBUG"
+    os.environ["CORE4_OPTION_logging__batch__capacity"] = "~"
     os.environ["CORE4_OPTION_logging__write_concern"] = "!!int 1"
     os.environ["CORE4_OPTION_worker__min_free_ram"] = "!!int 32"
     os.environ["CORE4_OPTION_worker__max_cpu"] = "!!int 100"
@@ -254,7 +260,8 @@ def test_maintenance():
     t.join()
     del worker.cycle["total"]
     assert worker.cycle == {
-        'collect_stats': 0, 'work_jobs': 0, 'flag_jobs': 0, 'remove_jobs': 0}
+        'collect_stats': 0, 'work_jobs': 0, 'flag_jobs': 0, 'remove_jobs': 0,
+        'reconcile_count': 0}
 
 
 @pytest.mark.timeout(120)
@@ -310,6 +317,79 @@ def test_lock():
     assert queue.lock_job(job["_id"], worker.identifier) is False
 
 
+def test_claim():
+    queue = core4.queue.main.CoreQueue()
+    worker1 = core4.queue.worker.CoreWorker(name="worker-1")
+    worker2 = core4.queue.worker.CoreWorker(name="worker-2")
+    for w in (worker1, worker2):
+        w.at = core4.util.node.now()
+    enqueued_id = []
+    for i in range(0, 3):
+        enqueued_id.append(queue.enqueue(
+            core4.queue.helper.job.example.DummyJob, i=i)._id)
+    prio = queue.enqueue(core4.queue.helper.job.example.DummyJob, i=3,
+                         priority=10)._id
+    assert worker1.get_next_job()["_id"] == prio
+    assert worker2.get_next_job()["_id"] == enqueued_id[0]
+    assert worker1.get_next_job()["_id"] == enqueued_id[1]
+    doc = queue.config.sys.queue.find_one({"_id": prio})
+    assert doc["locked"]["worker"] == worker1.identifier
+    assert doc["state"] == "pending"
+    assert queue.config.sys.lock.count_documents({}) == 3
+    assert worker1.running_count() == {
+        "core4.queue.helper.job.example.DummyJob": 2}
+    worker1.cleanup()
+    assert queue.config.sys.queue.count_documents({"locked": None}) == 3
+    assert queue.config.sys.lock.count_documents({}) == 1
+
+
+def test_claim_max_parallel():
+    queue = core4.queue.main.CoreQueue()
+    worker = core4.queue.worker.CoreWorker()
+    worker.at = core4.util.node.now()
+    for i in range(0, 3):
+        queue.enqueue(core4.queue.helper.job.example.DummyJob, i=i,
+                      max_parallel=2)
+    assert worker.get_next_job() is not None
+    assert worker.get_next_job() is not None
+    assert worker.get_next_job() is None
+
+
+def test_claim_maintenance():
+    queue = core4.queue.main.CoreQueue()
+    worker = core4.queue.worker.CoreWorker()
+    worker.at = core4.util.node.now()
+    queue.enqueue(core4.queue.helper.job.example.DummyJob)
+    queue.enter_maintenance("core4")
+    assert worker.get_next_job() is None
+    queue.leave_maintenance("core4")
+    assert worker.get_next_job() is not None
+
+
+def test_claim_lock_failure():
+    queue = core4.queue.main.CoreQueue()
+    worker = core4.queue.worker.CoreWorker()
+    worker.at = core4.util.node.now()
+    job1 = queue.enqueue(core4.queue.helper.job.example.DummyJob, i=1)
+    job2 = queue.enqueue(core4.queue.helper.job.example.DummyJob, i=2)
+    assert queue.lock_job("__user__", job1._id)
+    assert worker.get_next_job()["_id"] == job2._id
+    doc = queue.config.sys.queue.find_one({"_id": job1._id})
+    assert doc["locked"] is None
+
+
+def test_scan_fallback():
+    os.environ["CORE4_OPTION_worker__atomic_claim"] = "!!bool False"
+    queue = core4.queue.main.CoreQueue()
+    worker = core4.queue.worker.CoreWorker()
+    worker.at = core4.util.node.now()
+    job = queue.enqueue(core4.queue.helper.job.example.DummyJob)
+    assert worker.get_next_job()["_id"] == job._id
+    doc = queue.config.sys.queue.find_one({"_id": job._id})
+    assert doc["locked"] is None
+    assert queue.config.sys.lock.count_documents({}) == 1
+
+
 
 def test_remove(mongodb):
     queue = core4.queue.main.CoreQueue()
@@ -326,6 +406,56 @@ def test_remove(mongodb):
     assert 0 == mongodb.core4test.sys.lock.count_documents({})
 
 
+def test_remove_batch(mongodb):
+    os.environ["CORE4_OPTION_worker__remove_batch"] = "!!int 3"
+    queue = core4.queue.main.CoreQueue()
+    worker = core4.queue.worker.CoreWorker()
+    jobs = [queue.enqueue(core4.queue.helper.job.example.DummyJob, i=i)
+            for i in range(7)]
+    for job in jobs:
+        assert queue.remove_job(job._id)
+    # simulate an interrupted batch
+    assert queue.lock_job(worker.identifier, jobs[0]._id)
+    assert queue.journal(queue.config.sys.queue.find_one(
+        {"_id": jobs[0]._id}))
+    assert queue.lock_job("other", jobs[1]._id)
+    worker.remove_jobs()
+    assert 1 == mongodb.core4test.sys.queue.count_documents({})
+    assert 6 == mongodb.core4test.sys.journal.count_documents({})
+    assert 3 == mongodb.core4test.sys.event.count_documents(
+        {"name": "remove_job"})
+    assert queue.get_queue_count() == {"pending": 1}
+    queue.unlock_job(jobs[1]._id)
+    worker.remove_jobs()
+    assert 0 == mongodb.core4test.sys.queue.count_documents({})
+    assert 7 == mongodb.core4test.sys.journal.count_documents({})
+
+
+def test_remove_stale_lock(mongodb):
+    queue = core4.queue.main.CoreQueue()
+    worker = core4.queue.worker.CoreWorker()
+    jobs = [queue.enqueue(core4.queue.helper.job.example.DummyJob, i=i)
+            for i in range(3)]
+    # stale lock of a dead worker without sys.lock reservation
+    queue.config.sys.queue.update_one(
+        {"_id": jobs[0]._id},
+        {"$set": {"locked": {"worker": "dead", "pid": None,
+                             "heartbeat": None}}})
+    # job reserved by the worker itself
+    queue.config.sys.queue.update_one(
+        {"_id": jobs[1]._id},
+        {"$set": {"locked": {"worker": worker.identifier, "pid": None,
+                             "heartbeat": None}}})
+    assert queue.lock_job(worker.identifier, jobs[1]._id)
+    worker.reserved[jobs[1]._id] = jobs[1].qual_name()
+    for job in jobs:
+        assert queue.remove_job(job._id)
+    worker.remove_jobs()
+    assert [jobs[1]._id] == [
+        d["_id"] for d in mongodb.core4test.sys.queue.find()]
+    assert 2 == mongodb.core4test.sys.journal.count_documents({})
+
+
 @pytest.mark.timeout(120)
 def test_removing():
     queue = core4.queue.main.CoreQueue()
@@ -419,6 +549,7 @@ class WorkerHelper:
     def stop(self):
         for worker in self.worker:
             worker.exit = True
+            worker.wakeup.set()
         for t in self.pool:
             t.join()
 
@@ -649,6 +780,51 @@ def test_zombie(queue, worker):
                 if "successfully set zombie job" in d["message"]]) == 1
 
 
+class HeartbeatJob(core4.queue.job.CoreJob):
+    author = "mra"
+    progress_interval = 1
+
+    def execute(self, *args, **kwargs):
+        self.progress(0.5, "at %d", 50)
+        time.sleep(5)
+
+
+@pytest.mark.timeout(120)
+def test_heartbeat(queue, worker):
+    job = queue.enqueue(HeartbeatJob, zombie_time=3)
+    worker.start(1)
+    while queue.config.sys.queue.count_documents(
+            {"prog.message": "at 50"}) == 0:
+        time.sleep(0.1)
+    worker.wait_queue()
+    job = queue.find_job(job._id)
+    assert job.zombie_at is None
+
+
+def test_flag_batch(queue):
+    worker = core4.queue.worker.CoreWorker()
+    worker.at = core4.util.node.mongo_now()
+    past = worker.at - datetime.timedelta(seconds=10)
+    for i in range(5):
+        job = queue.enqueue(core4.queue.helper.job.example.DummyJob, i=i,
+                            wall_time=1, zombie_time=1)
+        queue.config.sys.queue.update_one(
+            {"_id": job._id},
+            {"$set": {"state": "running", "started_at": past,
+                      "locked": {"worker": worker.identifier, "pid": None,
+                                 "heartbeat": past}}})
+    worker.flag_jobs()
+    assert queue.config.sys.queue.count_documents(
+        {"wall_at": {"$ne": None}, "zombie_at": {"$ne": None}}) == 5
+    for event in ("flag_nonstop", "flag_zombie"):
+        doc = queue.config.sys.event.find_one({"name": event})
+        assert len(doc["data"]["_id"]) == 5
+        assert queue.config.sys.event.count_documents({"name": event}) == 1
+    worker.flag_jobs()
+    assert queue.config.sys.event.count_documents(
+        {"name": {"$in": ["flag_nonstop", "flag_zombie"]}}) == 2
+
+
 class ForeverJob(core4.queue.job.CoreJob):
     author = "mra"
 
@@ -879,14 +1055,14 @@ def test_stdout(queue, worker, mongodb):
     job = queue.enqueue(OutputTestJob)
     worker.start(3)
     worker.wait_queue()
-    assert mongodb.core4test.sys.stdout.count_documents({}) == 1
-    doc = mongodb.core4test.sys.stdout.find_one()
-    print(doc)
-    assert doc["_id"] == job._id
+    assert mongodb.core4test.sys.stdout.count_documents(
+        {"job_id": job._id}) >= 1
+    stdout = queue.get_job_stdout(job._id)
+    print(stdout)
     assert ("this output comes from tests.be.test_worker.OutputTestJob"
-            in doc["stdout"])
-    assert ("this comes from echo" in doc["stdout"])
-    assert ("this comes from C" in doc["stdout"])
+            in stdout)
+    assert ("this comes from echo" in stdout)
+    assert ("this comes from C" in stdout)
 
 
 class BinaryOutputTestJob(core4.queue.job.CoreJob):
@@ -901,10 +1077,54 @@ def test_binary_out(queue, worker, mongodb):
     job = queue.enqueue(BinaryOutputTestJob)
     worker.start(3)
     worker.wait_queue()
-    assert mongodb.core4test.sys.stdout.count_documents({}) == 1
-    doc = mongodb.core4test.sys.stdout.find_one()
-    assert doc["_id"] == job._id
-    assert doc["stdout"] == b"evil payload \xDE\xAD\xBE\xEF."
+    assert queue.get_job_stdout(job._id) == (
+        b"evil payload \xDE\xAD\xBE\xEF.")
+    assert queue.get_job_stdout(job._id, offset=5, length=7) == "payload"
+
+
+class ChattyJob(core4.queue.job.CoreJob):
+    author = 'mra'
+
+    def execute(self, *args, **kwargs):
+        line = "x" * 99 + "\n"
+        for i in range(200000):
+            sys.stdout.write(line)
+
+
+@pytest.mark.timeout(120)
+def test_stdout_chunks(queue, worker, mongodb):
+    job = queue.enqueue(ChattyJob)
+    worker.start(1)
+    worker.wait_queue()
+    size = 200000 * 100
+    count = mongodb.core4test.sys.stdout.count_documents({"job_id": job._id})
+    assert count > size // core4.queue.process.STDOUT_CHUNK
+    assert sum(len(c) for c in queue.iter_job_stdout(job._id)) == size
+    tail = queue.get_job_stdout(job._id, offset=size - 150)
+    assert tail == "x" * 50 + "\n" + "x" * 99 + "\n"
+
+
+def test_stdout_chunk_exists(queue, tmpdir):
+    core4.service.setup.CoreSetup().make_stdout()
+    coll = queue.config.sys.stdout
+    _id = ObjectId()
+    with open(str(tmpdir.join("stdout")), "w+b") as fh:
+        fh.write(b"hello world")
+        fh.flush()
+        capture = core4.queue.process.StdoutCapture(
+            _id, fh.fileno(), coll, 1, queue.logger)
+        # chunk saved before without acknowledgement
+        coll.insert_one({
+            "job_id": _id,
+            "offset": 0,
+            "end": 5,
+            "data": Binary(zlib.compress(b"hello")),
+            "timestamp": core4.util.node.mongo_now()
+        })
+        capture.upload()
+        assert capture.offset == 11
+    assert coll.count_documents({"job_id": _id}) == 2
+    assert queue.get_job_stdout(_id) == "hello world"
 
 
 @pytest.mark.timeout(120)
@@ -1014,3 +1234,270 @@ def test_project_process(queue):
     while queue.config.sys.queue.count_documents({}) > 0:
         print("waiting")
         time.sleep(1)
+
+
+@pytest.mark.timeout(120)
+def test_fork_server(queue):
+    os.environ["CORE4_OPTION_worker__fork_server"] = "!!bool True"
+    worker = core4.queue.worker.CoreWorker()
+    worker.at = core4.util.node.now()
+    job1 = queue.enqueue(core4.queue.helper.job.example.DummyJob, sleep=1)
+    worker.work_jobs()
+    server = worker.fork_server["core4"]
+    while True:
+        try:
+            fork_pid = server.ping()
+            break
+        except OSError:
+            time.sleep(0.25)
+    job2 = queue.enqueue(core4.queue.helper.job.example.DummyJob, sleep=1)
+    worker.at = core4.util.node.now()
+    worker.work_jobs()
+    doc = queue.config.sys.queue.find_one({"_id": job2._id})
+    while doc and doc["locked"]["pid"] is None:
+        time.sleep(0.25)
+        doc = queue.config.sys.queue.find_one({"_id": job2._id})
+    if doc:
+        assert psutil.Process(doc["locked"]["pid"]).ppid() == fork_pid
+    while queue.config.sys.queue.count_documents({}) > 0:
+        time.sleep(1)
+    for _id in (job1._id, job2._id):
+        assert queue.find_job(_id).state == "complete"
+        assert queue.get_job_stdout(_id) is not None
+    worker.cleanup()
+    assert not server.alive()
+
+
+def test_fork_server_outdated(tmpdir):
+    import core4.queue.forkserver
+    package = tmpdir.mkdir("outdated")
+    package.join("__init__.py").write("X = 1\n")
+    sys.path.insert(0, str(tmpdir))
+    os.environ["PYTHONPATH"] = os.pathsep.join([str(tmpdir)] + sys.path)
+    try:
+        server = core4.queue.forkserver.CoreForkServer("outdated")
+        cmd = core4.queue.forkserver.FORKSERVER.format(
+            address=server.address, project="outdated")
+        server.proc = subprocess.Popen([sys.executable, "-c", cmd])
+        while True:
+            try:
+                server.ping()
+                break
+            except OSError:
+                time.sleep(0.25)
+        assert os.stat(server.address).st_mode & 0o777 == 0o600
+        filename = str(package.join("__init__.py"))
+        st = os.stat(filename)
+        os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        with pytest.raises(OSError):
+            server.execute(str(ObjectId()), worker="worker", trial=1)
+        assert not server.alive()
+    finally:
+        sys.path.remove(str(tmpdir))
+        del os.environ["PYTHONPATH"]
+
+
+class FailingForkServer:
+
+    def alive(self):
+        return True
+
+    def __init__(self):
+        self.request = []
+
+    def execute(self, job_id, worker=None, trial=None):
+        self.request.append(dict(job_id=job_id, worker=worker, trial=trial))
+        raise RuntimeError("response lost")
+
+
+def test_fork_failed(queue):
+    os.environ["CORE4_OPTION_worker__fork_server"] = "!!bool True"
+    worker = core4.queue.worker.CoreWorker()
+    worker.at = core4.util.node.now()
+    worker.fork_server["core4"] = FailingForkServer()
+    job = queue.enqueue(core4.queue.helper.job.example.DummyJob)
+    worker.work_jobs()
+    doc = queue.config.sys.queue.find_one({"_id": job._id})
+    assert doc["state"] == "pending"
+    assert doc["locked"] is None
+    assert doc["trial"] == 0
+    assert job._id not in worker.reserved
+    assert queue.config.sys.lock.count_documents({}) == 0
+    assert queue.get_queue_count() == {"pending": 1}
+
+
+def test_fork_stale(queue):
+    os.environ["CORE4_OPTION_worker__fork_server"] = "!!bool True"
+    worker = core4.queue.worker.CoreWorker()
+    worker.at = core4.util.node.now()
+    server = FailingForkServer()
+    worker.fork_server["core4"] = server
+    job = queue.enqueue(core4.queue.helper.job.example.DummyJob)
+    worker.work_jobs()
+    request = server.request[0]
+    assert request == dict(job_id=str(job._id), worker=worker.identifier,
+                           trial=1)
+    # the job is claimed again by another worker
+    locked = {"at": worker.at, "heartbeat": worker.at, "pid": None,
+              "hostname": core4.util.node.get_hostname(), "worker": "other"}
+    queue.config.sys.queue.update_one(
+        {"_id": job._id},
+        {"$set": {"state": "running", "trial": 1, "locked": locked}})
+    # the stale child of the failed fork request starts late
+    proc = core4.queue.process.CoreWorkerProcess()
+    assert proc.start(request["job_id"], redirect=False,
+                      worker=request["worker"],
+                      trial=request["trial"]) is False
+    doc = queue.config.sys.queue.find_one({"_id": job._id})
+    assert doc["locked"]["worker"] == "other"
+    assert doc["locked"]["pid"] is None
+    assert doc["state"] == "running"
+    # the job is claimed again by the same worker and has started
+    locked.update(worker=worker.identifier, pid=4711)
+    queue.config.sys.queue.update_one(
+        {"_id": job._id}, {"$set": {"locked": locked}})
+    proc = core4.queue.process.CoreWorkerProcess()
+    assert proc.start(request["job_id"], redirect=False,
+                      worker=request["worker"],
+                      trial=request["trial"]) is False
+    doc = queue.config.sys.queue.find_one({"_id": job._id})
+    assert doc["locked"]["pid"] == 4711
+    assert doc["state"] == "running"
+
+
+@pytest.mark.timeout(120)
+def test_change_stream(queue, worker):
+    # falls back to polling if mongod does not run as a replica set
+    os.environ["CORE4_OPTION_worker__change_stream"] = "!!bool True"
+    worker.start(1)
+    time.sleep(3)
+    queue.enqueue(core4.queue.helper.job.example.DummyJob, sleep=0)
+    worker.wait_queue()
+    assert queue.config.sys.journal.count_documents({}) == 1
+
+
+def test_idle_until(queue):
+    os.environ["CORE4_OPTION_worker__change_stream_timeout"] = "!!int 60"
+    worker = core4.queue.worker.CoreWorker()
+    worker.at = core4.util.node.mongo_now().replace(microsecond=0)
+    assert worker.idle_until() == worker.at + datetime.timedelta(seconds=60)
+    job = queue.enqueue(core4.queue.helper.job.example.DummyJob)
+    query_at = worker.at + datetime.timedelta(seconds=10)
+    queue.config.sys.queue.update_one(
+        {"_id": job._id},
+        {"$set": {"state": "deferred", "query_at": query_at}})
+    assert worker.idle_until() == query_at
+    worker.plan[0]["next"] = worker.at + datetime.timedelta(
+        milliseconds=100)
+    assert 0 < worker.wait_timeout() <= 1.1
+
+
+@pytest.mark.timeout(120)
+def test_queue_count(queue, worker):
+    import tests.project.work
+    queue.enqueue(tests.project.work.ErrorJob, attempts=1)
+    queue.enqueue(tests.project.work.DeferJob, defer_max=3)
+    job = queue.enqueue(core4.queue.helper.job.example.DummyJob, sleep=0)
+    assert queue.get_queue_count() == {"pending": 3}
+    worker.start(1)
+    while queue.config.sys.queue.count_documents(
+            {"state": {"$in": ["error", "inactive"]}}) < 2:
+        time.sleep(0.5)
+    worker.stop()
+    assert queue.find_job(job._id).state == "complete"
+    assert queue.get_queue_count() == {"error": 1, "inactive": 1}
+    assert queue.get_queue_count() == queue.aggregate_queue_count()
+    queue.config.sys.count.update_one({"_id": "error"}, {"$inc": {"n": 5}})
+    queue.config.sys.count.delete_one({"_id": "inactive"})
+    assert queue.get_queue_count() == {"error": 6}
+    assert queue.reconcile_count() == {"error": 1, "inactive": 1}
+    assert queue.get_queue_count() == {"error": 1, "inactive": 1}
+
+
+def test_reconcile_concurrent(queue):
+    queue.config.sys.count.insert_one({"_id": "pending", "n": 5})
+    aggregate = queue.aggregate_queue_count
+
+    def concurrent():
+        # a job is enqueued while the queue is aggregated
+        ret = aggregate()
+        queue.config.sys.count.update_one(
+            {"_id": "pending"}, {"$inc": {"n": 1}})
+        return ret
+
+    queue.aggregate_queue_count = concurrent
+    assert queue.reconcile_count() == {}
+    assert queue.get_queue_count() == {"pending": 6}
+    queue.aggregate_queue_count = aggregate
+    assert queue.reconcile_count() == {}
+    assert queue.get_queue_count() == {}
+
+
+@pytest.mark.timeout(120)
+def test_slots(queue):
+    os.environ["CORE4_OPTION_worker__slots"] = "!!int 2"
+    for i in range(4):
+        queue.enqueue(core4.queue.helper.job.example.DummyJob, i=i, sleep=3)
+    worker = core4.queue.worker.CoreWorker()
+    worker.register()
+    worker.at = core4.util.node.mongo_now()
+    assert worker.work_jobs()
+    assert len(worker.slot) == 2
+    assert queue.config.sys.queue.count_documents({"state": "running"}) == 2
+    doc = queue.config.sys.worker.find_one({"_id": worker.identifier})
+    assert doc["slot"] == {"max": 2, "used": 2}
+    assert worker.work_jobs() is None
+    while worker.free_slots() < 2:
+        time.sleep(0.5)
+    worker.at = core4.util.node.mongo_now()
+    assert worker.work_jobs()
+    while queue.config.sys.queue.count_documents({}) > 0:
+        time.sleep(1)
+    assert queue.config.sys.journal.count_documents({}) == 4
+    worker.cleanup()
+
+
+def test_no_slots(queue):
+    for i in range(3):
+        queue.enqueue(core4.queue.helper.job.example.DummyJob, i=i)
+    worker = core4.queue.worker.CoreWorker()
+    worker.register()
+    assert worker.config.worker.slots is None
+    started = []
+    worker.start_job = lambda doc: started.append(doc["_id"])
+    worker.at = core4.util.node.mongo_now()
+    assert worker.free_slots() is None
+    assert worker.work_jobs()
+    assert len(started) == 1
+    doc = queue.config.sys.worker.find_one({"_id": worker.identifier})
+    assert doc["slot"] == {"max": None, "used": 0}
+
+
+@pytest.mark.timeout(120)
+def test_running_count(queue):
+    for i in range(3):
+        queue.enqueue(core4.queue.helper.job.example.DummyJob, i=i, sleep=1,
+                      max_parallel=1)
+    worker = core4.queue.worker.CoreWorker()
+    calls = []
+    maintenance = worker.queue.maintenance
+
+    def count_maintenance(*args, **kwargs):
+        calls.append(args)
+        return maintenance(*args, **kwargs)
+
+    worker.queue.maintenance = count_maintenance
+    worker.at = core4.util.node.mongo_now()
+    assert worker.work_jobs()
+    assert len(calls) == 1
+    assert worker.running_count() == {
+        "core4.queue.helper.job.example.DummyJob": 1}
+    assert worker.work_jobs() is None
+    while worker.running_count():
+        time.sleep(0.5)
+        worker.free_slots()
+    worker.at = core4.util.node.mongo_now()
+    assert worker.work_jobs()
+    assert queue.config.sys.queue.count_documents({"state": "running"}) == 1
+    del worker.queue.maintenance
+    worker.cleanup()
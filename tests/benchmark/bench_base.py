@@ -0,0 +1,67 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks the instantiation cost of :class:`.CoreBase` objects with and
+without the process-wide compiled configuration snapshot.
+
+Usage:
+  bench_base.py [--objects=<n>] [--repeat=<n>]
+
+Options:
+  --objects=<n>  number of objects to create per run [default: 1000]
+  --repeat=<n>   number of runs, the best run is reported [default: 5]
+"""
+
+import os
+import timeit
+
+from docopt import docopt
+
+import core4.base.main
+import core4.config.main
+
+
+class NoSnapshotConfig(core4.config.main.CoreConfig):
+    snapshot = False
+
+
+class Base(core4.base.main.CoreBase):
+    pass
+
+
+class NoSnapshotBase(core4.base.main.CoreBase):
+
+    def _make_config(self, *args, **kwargs):
+        return NoSnapshotConfig(*args, **kwargs)
+
+
+def setup_env():
+    os.environ["CORE4_OPTION_logging__stderr"] = "~"
+    os.environ["CORE4_OPTION_logging__mongodb"] = "~"
+
+
+def run(cls, objects, repeat):
+    cls()  # warm up file cache and snapshot
+    best = min(timeit.repeat(cls, number=objects, repeat=repeat))
+    return best / objects * 1e6
+
+
+def main():
+    args = docopt(__doc__)
+    setup_env()
+    objects = int(args["--objects"])
+    repeat = int(args["--repeat"])
+    before = run(NoSnapshotBase, objects, repeat)
+    after = run(Base, objects, repeat)
+    print("without snapshot: {:>9.1f} usec/object".format(before))
+    print("with snapshot:    {:>9.1f} usec/object".format(after))
+    print("speedup:          {:>9.1f}x".format(before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks job claims per second of :meth:`.CoreWorker.get_next_job` with
+1, 4 and 16 concurrent workers against a local mongod.
+
+Usage:
+  bench_claim.py [--jobs=<n>] [--mongo=<url>] [--database=<db>] [--scan]
+
+Options:
+  --jobs=<n>       number of jobs to enqueue per run [default: 2000]
+  --mongo=<url>    MongoDB connection [default: mongodb://localhost:27017]
+  --database=<db>  MongoDB database, dropped before each run [default: core4bench]
+  --scan           also benchmark the sys.lock scan fallback
+"""
+
+import multiprocessing
+import os
+import time
+
+import pymongo
+from docopt import docopt
+
+WORKERS = (1, 4, 16)
+
+
+def setup_env(args, atomic):
+    os.environ["CORE4_OPTION_DEFAULT__mongo_url"] = args["--mongo"]
+    os.environ["CORE4_OPTION_DEFAULT__mongo_database"] = args["--database"]
+    os.environ["CORE4_OPTION_logging__stderr"] = "~"
+    os.environ["CORE4_OPTION_logging__mongodb"] = "~"
+    os.environ["CORE4_OPTION_worker__max_cpu"] = "!!int 100"
+    os.environ["CORE4_OPTION_worker__min_free_ram"] = "!!int 0"
+    os.environ["CORE4_OPTION_worker__atomic_claim"] = "!!bool {}".format(
+        atomic)
+
+
+def claim(name, start, result):
+    import core4.queue.worker
+    import core4.util.node
+    worker = core4.queue.worker.CoreWorker(name=name)
+    worker.at = core4.util.node.mongo_now()
+    start.wait()
+    n = 0
+    while worker.get_next_job() is not None:
+        n += 1
+    result.put(n)
+
+
+def run(args, nworker, atomic):
+    import core4.queue.main
+    import core4.queue.helper.job.example
+    conn = pymongo.MongoClient(args["--mongo"])
+    conn.drop_database(args["--database"])
+    queue = core4.queue.main.CoreQueue()
+    njobs = int(args["--jobs"])
+    for i in range(njobs):
+        queue.enqueue(core4.queue.helper.job.example.DummyJob, i=i,
+                      max_parallel=njobs)
+    start = multiprocessing.Event()
+    result = multiprocessing.Queue()
+    pool = [multiprocessing.Process(
+        target=claim, args=("bench-{}".format(i), start, result))
+        for i in range(nworker)]
+    for p in pool:
+        p.start()
+    time.sleep(2)
+    t0 = time.perf_counter()
+    start.set()
+    claimed = sum([result.get() for _ in pool])
+    runtime = time.perf_counter() - t0
+    for p in pool:
+        p.join()
+    assert claimed == njobs, "claimed {} of {}".format(claimed, njobs)
+    return claimed / runtime
+
+
+def main():
+    args = docopt(__doc__)
+    modes = [True]
+    if args["--scan"]:
+        modes.append(False)
+    for atomic in modes:
+        setup_env(args, atomic)
+        for nworker in WORKERS:
+            rate = run(args, nworker, atomic)
+            print("{:>6s} {:>3d} worker: {:>9.1f} claims/sec".format(
+                "atomic" if atomic else "scan", nworker, rate))
+
+
+if __name__ == '__main__':
+    main()
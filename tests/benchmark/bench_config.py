@@ -0,0 +1,67 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks the configuration startup cost of a job process with and without
+the persisted configuration snapshot, see
+:data:`core4.config.main.CACHE_ENV`.
+
+Usage:
+  bench_config.py [--processes=<n>]
+
+Options:
+  --processes=<n>  number of processes to launch per mode [default: 20]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from docopt import docopt
+
+import core4.config.main
+
+#: job process startup, reports the configuration load time in seconds
+COMMAND = """
+import time
+import core4.queue.main
+import core4.queue.process
+t0 = time.perf_counter()
+core4.queue.main.CoreQueue()
+core4.queue.process.CoreWorkerProcess()
+print(time.perf_counter() - t0)
+"""
+
+
+def run(processes, env):
+    runtime = []
+    for _ in range(processes):
+        out = subprocess.check_output([sys.executable, "-c", COMMAND],
+                                      env=env)
+        runtime.append(float(out.decode("utf-8").strip()))
+    return sorted(runtime)[len(runtime) // 2] * 1e3
+
+
+def main():
+    args = docopt(__doc__)
+    processes = int(args["--processes"])
+    env = os.environ.copy()
+    env["CORE4_OPTION_logging__stderr"] = "~"
+    env["CORE4_OPTION_logging__mongodb"] = "~"
+    env.pop(core4.config.main.CACHE_ENV, None)
+    before = run(processes, env)
+    with tempfile.TemporaryDirectory() as folder:
+        env[core4.config.main.CACHE_ENV] = folder
+        run(1, env)  # persist snapshots
+        after = run(processes, env)
+    print("without persisted snapshot: {:>7.1f} msec/process".format(before))
+    print("with persisted snapshot:    {:>7.1f} msec/process".format(after))
+
+
+if __name__ == '__main__':
+    main()
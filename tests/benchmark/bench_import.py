@@ -0,0 +1,83 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks the import time of core4 entry points with ``python -X
+importtime`` and verifies the import time budget and the heavy dependencies
+which must not be loaded by each entry point.
+
+Usage:
+  bench_import.py [--repeat=<n>] [--strict]
+
+Options:
+  --repeat=<n>  number of interpreter launches, the best run is reported
+                [default: 5]
+  --strict      exit with status 1 if an entry point exceeds its budget
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+from docopt import docopt
+
+#: entry points with import time budget in msec
+BUDGET = (
+    ("core4.queue.process", 300),
+    ("core4.script.chist", 250),
+    ("core4.script.coco", 400),
+)
+#: modules which must not be loaded by any of the entry points
+FORBIDDEN = ("tornado", "pandas", "numpy", "pip", "sphinx", "docutils",
+             "motor", "jinja2", "passlib")
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def run(module, env):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env,
+        check=True)
+    total = None
+    loaded = set()
+    for line in proc.stderr.decode("utf-8").splitlines():
+        match = LINE.match(line)
+        if match is None:
+            continue
+        name = match.group(4)
+        loaded.add(name.split(".")[0])
+        if name == module and len(match.group(3)) == 1:
+            total = int(match.group(2)) / 1e3
+    return total, sorted(loaded.intersection(FORBIDDEN))
+
+
+def main():
+    args = docopt(__doc__)
+    repeat = int(args["--repeat"])
+    env = os.environ.copy()
+    env["CORE4_OPTION_logging__stderr"] = "~"
+    env["CORE4_OPTION_logging__mongodb"] = "~"
+    failed = False
+    for module, budget in BUDGET:
+        runtime = []
+        for _ in range(repeat):
+            total, forbidden = run(module, env)
+            runtime.append(total)
+        best = min(runtime)
+        ok = best <= budget and not forbidden
+        failed = failed or not ok
+        print("{:24s} {:>7.1f} msec (budget {:>4d}) {:4s} {}".format(
+            module, best, budget, "ok" if ok else "FAIL",
+            ", ".join(forbidden)))
+    if failed and args["--strict"]:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks the job class resolution, job creation and deserialisation of
+``sys.queue`` documents with the per process job registry, see
+:meth:`core4.queue.main.JobFactoryMixin.job_class` and
+:meth:`core4.queue.job.CoreJob.deserialise`.
+
+Usage:
+  bench_job.py [--jobs=<n>] [--repeat=<n>]
+
+Options:
+  --jobs=<n>    number of jobs to create per run [default: 1000]
+  --repeat=<n>  number of runs, the best run is reported [default: 5]
+"""
+
+import os
+import timeit
+
+from bson.objectid import ObjectId
+from docopt import docopt
+
+import core4.queue.main
+
+JOB = "core4.queue.helper.job.example.DummyJob"
+
+
+def setup_env():
+    os.environ["CORE4_OPTION_logging__stderr"] = "~"
+    os.environ["CORE4_OPTION_logging__mongodb"] = "~"
+
+
+def run(func, jobs, repeat):
+    func()  # warm up registry and snapshot
+    best = min(timeit.repeat(func, number=jobs, repeat=repeat))
+    return best / jobs * 1e6
+
+
+def main():
+    args = docopt(__doc__)
+    setup_env()
+    jobs = int(args["--jobs"])
+    repeat = int(args["--repeat"])
+    queue = core4.queue.main.CoreQueue()
+    doc = queue.job_factory(JOB, sleep=1).serialise()
+    doc["_id"] = ObjectId()
+    cls = queue.job_class(JOB)
+    for title, func in (
+            ("job_class:  ", lambda: queue.job_class(JOB)),
+            ("job_factory:", lambda: queue.job_factory(JOB, sleep=1)),
+            ("deserialise:", lambda: queue.job_class(
+                doc["name"]).deserialise(**doc)),
+            ("instantiate:", lambda: cls())):
+        print("{} {:>9.1f} usec/job".format(title, run(func, jobs, repeat)))
+
+
+if __name__ == '__main__':
+    main()
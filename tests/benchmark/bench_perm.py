@@ -0,0 +1,86 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks the permission checks of :class:`.CompiledPerm` compared to the
+evaluation of the permission strings with each check.
+
+Usage:
+  bench_perm.py [--perm=<n>] [--checks=<n>] [--repeat=<n>]
+
+Options:
+  --perm=<n>    number of api and job permissions [default: 200]
+  --checks=<n>  number of checks per run [default: 10000]
+  --repeat=<n>  number of runs, the best run is reported [default: 5]
+"""
+
+import os
+import re
+import timeit
+
+from docopt import docopt
+
+from core4.api.v1.request.role.field import METHOD_PERMISSION
+from core4.api.v1.request.role.perm import CompiledPerm
+
+QUAL_NAME = "project.api.Handler"
+
+
+def setup_env():
+    os.environ["CORE4_OPTION_logging__stderr"] = "~"
+    os.environ["CORE4_OPTION_logging__mongodb"] = "~"
+
+
+def make_perm(count):
+    perm = []
+    for i in range(count // 2):
+        perm.append("api://project.api{}.*/r".format(i))
+        perm.append("job://project.job{}.*/x".format(i))
+    perm.append("api://" + QUAL_NAME + "/cr")
+    return perm
+
+
+def linear_api_access(perm, qual_name, method="GET"):
+    # evaluation of all permission strings with each check
+    perm = sorted(set(perm))
+    if "cop" in perm:
+        return True
+    for p in perm:
+        (*proto, qn, acc) = p.split("/")
+        if proto[0] == "api:":
+            if qn:
+                if re.match(qn, qual_name):
+                    if set(acc.lower()).intersection(
+                            METHOD_PERMISSION.get(method)):
+                        return True
+            elif re.match(acc, qual_name):
+                return True
+    return False
+
+
+def run(func, checks, repeat):
+    assert func()
+    best = min(timeit.repeat(func, number=checks, repeat=repeat))
+    return best / checks * 1e6
+
+
+def main():
+    args = docopt(__doc__)
+    setup_env()
+    perm = make_perm(int(args["--perm"]))
+    checks = int(args["--checks"])
+    repeat = int(args["--repeat"])
+    compiled = CompiledPerm(perm)
+    for title, func in (
+            ("compiled:", lambda: compiled.has_api_access(QUAL_NAME)),
+            ("linear:  ", lambda: linear_api_access(perm, QUAL_NAME))):
+        print("{} {:>9.1f} usec/check".format(
+            title, run(func, checks, repeat)))
+
+
+if __name__ == '__main__':
+    main()
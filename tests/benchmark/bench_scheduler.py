@@ -0,0 +1,103 @@
+#
+# Copyright 2018 Plan.Net Business Intelligence GmbH & Co. KG
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks the cost of :meth:`.CoreScheduler.get_next` per scheduler cycle
+with the next execution time heap compared to the evaluation of all job
+schedules with each cycle.
+
+Usage:
+  bench_scheduler.py [--jobs=<n>] [--cycles=<n>] [--seed=<n>]
+
+Options:
+  --jobs=<n>    number of scheduled jobs [default: 10000]
+  --cycles=<n>  number of scheduler cycles of 1 second [default: 3600]
+  --seed=<n>    random seed of the job schedules [default: 42]
+"""
+
+import datetime
+import os
+import random
+import time
+
+from croniter import croniter
+from docopt import docopt
+
+from core4.queue.scheduler import CoreScheduler
+
+START = datetime.datetime(2018, 1, 1, 23, 50, 0)
+
+
+def setup_env():
+    os.environ["CORE4_OPTION_logging__stderr"] = "~"
+    os.environ["CORE4_OPTION_logging__mongodb"] = "~"
+
+
+def make_job(jobs, seed):
+    rnd = random.Random(seed)
+    ret = {}
+    for i in range(jobs):
+        schedule = rnd.choice([
+            "* * * * *",
+            "*/{} * * * *".format(rnd.randint(2, 30)),
+            "{} * * * *".format(rnd.randint(0, 59)),
+            "{} {} * * *".format(rnd.randint(0, 59), rnd.randint(0, 23)),
+        ])
+        ret["project.job.Job{}".format(i)] = {"schedule": schedule}
+    return ret
+
+
+def linear_next(job, start, end):
+    # evaluation of all job schedules with each cycle
+    ret = []
+    for job_name, doc in job.items():
+        cron = croniter(doc["schedule"], start)
+        if cron.get_next(datetime.datetime) <= end:
+            ret.append((job_name, doc["schedule"]))
+    return ret
+
+
+def run(get_next, cycles):
+    previous = START - datetime.timedelta(hours=1)  # catch up
+    at = START
+    enqueued = 0
+    runtime = []
+    for _ in range(cycles):
+        t0 = time.perf_counter()
+        enqueued += len(get_next(previous, at))
+        runtime.append(time.perf_counter() - t0)
+        previous = at
+        at += datetime.timedelta(seconds=1)
+    return runtime, enqueued
+
+
+def report(title, runtime, enqueued):
+    print("{:8s} first cycle {:>9.1f} msec, cycle {:>9.3f} msec, "
+          "total {:>9.1f} sec, enqueued {:d}".format(
+            title, runtime[0] * 1e3,
+            sum(runtime[1:]) / max(1, len(runtime) - 1) * 1e3,
+            sum(runtime), enqueued))
+
+
+def main():
+    args = docopt(__doc__)
+    setup_env()
+    job = make_job(int(args["--jobs"]), int(args["--seed"]))
+    cycles = int(args["--cycles"])
+    scheduler = CoreScheduler()
+    scheduler.job = job
+    runtime, enqueued = run(scheduler.get_next, cycles)
+    report("heap", runtime, enqueued)
+    linear = max(1, min(cycles, 60))
+    runtime, enqueued = run(
+        lambda start, end: linear_next(job, start, end), linear)
+    report("linear", runtime, enqueued)
+    print("(linear: {} cycles only)".format(linear))
+
+
+if __name__ == '__main__':
+    main()